@@ -0,0 +1,40 @@
+# Cria os índices registrados e executa explain() em cada consulta
+# registrada, sinalizando as que fazem COLLSCAN.
+#
+# Uso (dentro de /app): python -m comandos.auditar_indices
+import asyncio
+import sys
+import app.services.balanco  # noqa: F401 (registra índices e consultas)
+import app.services.recorrente  # noqa: F401
+import app.services.usuario  # noqa: F401
+from database.database_async import AsyncDBConnection
+from database.indices import auditar_consultas, criar_indices
+
+
+async def auditar() -> int:
+    db_connection = AsyncDBConnection()
+    indices = await criar_indices(db_connection)
+    for collection, resultado in indices.items():
+        print(f"{collection}: {resultado}")
+
+    collscans = 0
+    for item in await auditar_consultas(db_connection):
+        if "erro" in item:
+            situacao = f"ERRO {item['erro']}"
+        elif item["collscan"]:
+            situacao = "COLLSCAN"
+            collscans += 1
+        else:
+            situacao = "ok"
+        estagios = " > ".join(item.get("estagios", []))
+        print(f"[{situacao}] {item['collection']}: {item['nome']} ({estagios})")
+
+    return collscans
+
+
+def main():
+    sys.exit(1 if asyncio.run(auditar()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Converte os valores monetários gravados em reais (double) para centavos
+# inteiros: o valor dos lançamentos de balanco e das transações recorrentes e
+# os limites das regras de categoria; recalcula balanco_resumo. Pode ser
+# rodado de novo sem efeito: só campos double são convertidos. Valores em
+# reais que já estavam gravados como inteiros não se distinguem de centavos e
+# não são alterados.
+#
+# Uso (dentro de /app): python -m comandos.migrar_centavos [--usuario-id ID]
+import argparse
+import asyncio
+from datetime import datetime
+from app.services.balanco import BalancoService
+from database.database_async import AsyncDBConnection
+from database.indices import criar_indices
+from utils.dinheiro import CENTAVOS
+
+
+# Campos em reais por coleção, fora de balanco
+CAMPOS_CONFIGURACAO = {
+    "transacoes_recorrentes": ["valor"],
+    "regras_categoria": ["valor_min", "valor_max"],
+}
+
+
+def _em_centavos(campo: str) -> dict:
+    return {"$toLong": {"$round": [{"$multiply": [f"${campo}", CENTAVOS]}, 0]}}
+
+
+async def converter(
+    db_connection: AsyncDBConnection,
+    colecao: str,
+    campo: str,
+    usuario_id: str = None,
+    extra: dict = None,
+) -> int:
+    # Conversão feita no próprio servidor, num único update com pipeline
+    filtro = {campo: {"$type": "double"}}
+    if usuario_id:
+        filtro["usuario_id"] = usuario_id
+    resultado = await db_connection.atualizar_lote(
+        colecao, filtro, [{"$set": {campo: _em_centavos(campo), **(extra or {})}}]
+    )
+    if resultado is None:
+        raise RuntimeError(f"Falha ao converter {colecao}.{campo}")
+    return resultado["modificados"]
+
+
+async def migrar(usuario_id: str = None) -> tuple:
+    service = BalancoService()
+    await criar_indices(service.db_connection)
+
+    # atualizado_em faz os snapshots colunares relerem os documentos
+    lancamentos = await converter(
+        service.db_connection,
+        "balanco",
+        "valor",
+        usuario_id,
+        {"atualizado_em": datetime.now().isoformat()},
+    )
+    configuracoes = 0
+    for colecao, campos in CAMPOS_CONFIGURACAO.items():
+        for campo in campos:
+            configuracoes += await converter(
+                service.db_connection, colecao, campo, usuario_id
+            )
+
+    resumos = 0
+    if lancamentos:
+        resumos = await service.reconstruir_resumo(usuario_id)
+    return lancamentos, configuracoes, resumos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte os valores monetários de reais para centavos"
+    )
+    parser.add_argument(
+        "--usuario-id", help="Converte apenas os documentos deste usuário"
+    )
+    args = parser.parse_args()
+
+    lancamentos, configuracoes, resumos = asyncio.run(migrar(args.usuario_id))
+    print(
+        f"{lancamentos} lançamentos e {configuracoes} valores de recorrentes e "
+        f"regras convertidos para centavos, {resumos} resumos mensais gravados "
+        "em balanco_resumo"
+    )
+
+
+if __name__ == "__main__":
+    main()
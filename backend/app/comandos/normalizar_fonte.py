@@ -0,0 +1,49 @@
+# Preenche fonte_busca e fonte_trigramas nos documentos de balanco que
+# ainda não têm os campos de busca.
+#
+# Uso (dentro de /app): python -m comandos.normalizar_fonte [--lote N]
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from app.services.balanco import campos_busca
+from database.database_async import AsyncDBConnection
+
+
+async def normalizar(tamanho_lote: int) -> int:
+    db_connection = AsyncDBConnection()
+    cursor = db_connection.iterar(
+        "balanco",
+        {"fonte_busca": {"$exists": False}},
+        {"_id": 1, "fonte": 1},
+        batch_size=tamanho_lote,
+    )
+
+    total = 0
+    operacoes = []
+    async for doc in cursor:
+        operacoes.append(
+            UpdateOne({"_id": doc["_id"]}, {"$set": campos_busca(doc.get("fonte"))})
+        )
+        if len(operacoes) == tamanho_lote:
+            await db_connection.bulk_write("balanco", operacoes)
+            total += len(operacoes)
+            operacoes = []
+    if operacoes:
+        await db_connection.bulk_write("balanco", operacoes)
+        total += len(operacoes)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Normaliza a fonte dos lançamentos para a busca"
+    )
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    total = asyncio.run(normalizar(args.lote))
+    print(f"{total} lançamentos normalizados")
+
+
+if __name__ == "__main__":
+    main()
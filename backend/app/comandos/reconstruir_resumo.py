@@ -0,0 +1,30 @@
+# Recalcula a coleção balanco_resumo a partir dos documentos de balanco.
+#
+# Uso (dentro de /app): python -m comandos.reconstruir_resumo [--usuario-id ID]
+import argparse
+import asyncio
+from app.services.balanco import BalancoService
+from database.indices import criar_indices
+
+
+async def reconstruir(usuario_id: str = None) -> int:
+    service = BalancoService()
+    await criar_indices(service.db_connection)
+    return await service.reconstruir_resumo(usuario_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recalcula os resumos mensais materializados"
+    )
+    parser.add_argument(
+        "--usuario-id", help="Recalcula apenas os resumos deste usuário"
+    )
+    args = parser.parse_args()
+
+    total = asyncio.run(reconstruir(args.usuario_id))
+    print(f"{total} resumos mensais gravados em balanco_resumo")
+
+
+if __name__ == "__main__":
+    main()
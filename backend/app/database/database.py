@@ -1,92 +1,66 @@
-from typing import List
-from pymongo import MongoClient
-from utils.settings import MONGO_URL, MONGO_ENVIROMENT
+import threading
+from pymongo.monitoring import ConnectionPoolListener
 
 
-class DBConnection:
+class MonitorPool(ConnectionPoolListener):
+    # Contadores dos eventos do pool de conexões do MongoClient
     def __init__(self) -> None:
-        self.__client = MongoClient(MONGO_URL)
-        self._connection = self.__client[MONGO_ENVIROMENT]
-
-    def find_one(
-        self, collection: str, query: dict, projection: dict = {"_id": 0}, **kwargs: any
-    ) -> dict or bool:
-        try:
-            result = self._connection[collection].find_one(query, projection, **kwargs)
-            return result
-        except Exception as error:
-            return None
-
-    def find(
-        self,
-        collection: str,
-        query: dict,
-        projection: dict = {"_id": 0},
-        **kwargs: any,
-    ) -> list:
-        try:
-            result = list(
-                self._connection[collection].find(query, projection, **kwargs)
-            )
-
-            return result
-        except Exception as error:
-            return []
-
-    def aggregate(self, collection: str, pipeline: list = []) -> list or bool:
-        try:
-            result = list(self._connection[collection].aggregate(pipeline))
-            return result
-        except Exception as error:
-            return None
-
-    def insert_one(self, collection: str, dados: dict) -> bool:
-        try:
-            self._connection[collection].insert_one(dados)
-            return True
-        except Exception as error:
-            print(error)
-            return None
-
-    def insert_many(self, collection: str, dados: List[dict]) -> bool:
-        try:
-            result = self._connection[collection].insert_many(dados)
-            return result
-        except Exception as error:
-            return None
-
-    def update_one(
-        self, collection: str, filter: dict, update: dict, **kwargs: any
-    ) -> bool:
-        try:
-            update = self._connection[collection].update_one(filter, update, **kwargs)
-            if update.modified_count == 0:
-                return None
-            return True
-        except Exception as error:
-            return None
-
-    def update_many(
-        self, collection: str, filter: dict, update: dict, **kwargs: any
-    ) -> bool:
-        try:
-            update = self._connection[collection].update_many(filter, update, **kwargs)
-            if update.modified_count == 0:
-                return None
-            return True
-        except Exception as error:
-            return None
-
-    def delete_one(self, collection: str, query: dict) -> bool | None:
-        try:
-            result = self._connection[collection].delete_one(query)
-            return True if result.deleted_count > 0 else None
-        except Exception as error:
-            return None
-
-    def delete_many(self, collection: str, query: dict) -> bool | None:
-        try:
-            result = self._connection[collection].delete_many(query)
-            return True if result.deleted_count > 0 else None
-        except Exception as error:
-            return None
+        self._lock = threading.Lock()
+        self.contadores = {
+            "pools_criados": 0,
+            "pools_limpos": 0,
+            "conexoes_criadas": 0,
+            "conexoes_fechadas": 0,
+            "checkouts": 0,
+            "checkouts_falhos": 0,
+            "checkins": 0,
+        }
+
+    def _incrementar(self, chave: str) -> None:
+        with self._lock:
+            self.contadores[chave] += 1
+
+    def pool_created(self, event) -> None:
+        self._incrementar("pools_criados")
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        self._incrementar("pools_limpos")
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self._incrementar("conexoes_criadas")
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self._incrementar("conexoes_fechadas")
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        self._incrementar("checkouts_falhos")
+
+    def connection_checked_out(self, event) -> None:
+        self._incrementar("checkouts")
+
+    def connection_checked_in(self, event) -> None:
+        self._incrementar("checkins")
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            contadores = dict(self.contadores)
+        contadores["conexoes_abertas"] = (
+            contadores["conexoes_criadas"] - contadores["conexoes_fechadas"]
+        )
+        contadores["conexoes_em_uso"] = contadores["checkouts"] - contadores["checkins"]
+        return contadores
+
+
+monitor_pool = MonitorPool()
@@ -0,0 +1,271 @@
+from typing import List, Optional
+from pymongo import AsyncMongoClient, IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError
+from database.database import monitor_pool
+from utils.settings import (
+    MONGO_URL,
+    MONGO_ENVIROMENT,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE,
+)
+
+_cliente: Optional[AsyncMongoClient] = None
+
+
+def conectar_async() -> AsyncMongoClient:
+    # Cliente assíncrono único do processo, usado pelas rotas
+    global _cliente
+    if _cliente is None:
+        _cliente = AsyncMongoClient(
+            MONGO_URL,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            readPreference=MONGO_READ_PREFERENCE,
+            event_listeners=[monitor_pool],
+        )
+    return _cliente
+
+
+async def desconectar_async() -> None:
+    global _cliente
+    if _cliente is not None:
+        await _cliente.close()
+        _cliente = None
+
+
+def estatisticas_pool() -> dict:
+    return {
+        "configuracao": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        "clientes_abertos": {"async": _cliente is not None},
+        **monitor_pool.estatisticas(),
+    }
+
+
+class AsyncDBConnection:
+    # Acesso ao Mongo pelo cliente assíncrono compartilhado do processo
+    def __init__(self, cliente: AsyncMongoClient = None) -> None:
+        self.__client = cliente
+
+    @property
+    def _connection(self):
+        return (self.__client or conectar_async())[MONGO_ENVIROMENT]
+
+    async def find_one(
+        self, collection: str, query: dict, projection: dict = {"_id": 0}, **kwargs: any
+    ) -> dict or bool:
+        try:
+            return await self._connection[collection].find_one(
+                query, projection, **kwargs
+            )
+        except Exception as error:
+            return None
+
+    async def find(
+        self,
+        collection: str,
+        query: dict,
+        projection: dict = {"_id": 0},
+        **kwargs: any,
+    ) -> list:
+        try:
+            cursor = self._connection[collection].find(query, projection, **kwargs)
+            return await cursor.to_list(None)
+        except Exception as error:
+            return []
+
+    def iterar(
+        self,
+        collection: str,
+        query: dict,
+        projection: dict = {"_id": 0},
+        sort: list = None,
+        limit: int = 0,
+        batch_size: int = 1000,
+    ):
+        # Retorna o cursor assíncrono (async for) sem materializar o resultado
+        cursor = self._connection[collection].find(
+            query, projection, limit=limit or 0, batch_size=batch_size
+        )
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor
+
+    async def aggregate(self, collection: str, pipeline: list = []) -> list or bool:
+        try:
+            cursor = await self._connection[collection].aggregate(pipeline)
+            return await cursor.to_list(None)
+        except Exception as error:
+            return None
+
+    async def criar_indices(
+        self, collection: str, indices: List[IndexModel]
+    ) -> List[str]:
+        return await self._connection[collection].create_indexes(indices)
+
+    async def explain(self, collection: str, query: dict, sort: list = None) -> dict:
+        cursor = self._connection[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        return await cursor.explain()
+
+    async def insert_one(self, collection: str, dados: dict) -> bool:
+        try:
+            await self._connection[collection].insert_one(dados)
+            return True
+        except Exception as error:
+            print(error)
+            return None
+
+    async def insert_many(self, collection: str, dados: List[dict]) -> bool:
+        try:
+            return await self._connection[collection].insert_many(dados)
+        except Exception as error:
+            return None
+
+    async def inserir_lote(
+        self, collection: str, dados: List[dict], ordered: bool = False
+    ) -> List[dict]:
+        try:
+            await self._connection[collection].insert_many(dados, ordered=ordered)
+            return []
+        except BulkWriteError as error:
+            return [
+                {"indice": e["index"], "erro": e.get("errmsg", "")}
+                for e in error.details.get("writeErrors", [])
+            ]
+        except Exception as error:
+            return [{"indice": i, "erro": str(error)} for i in range(len(dados))]
+
+    async def upsert_lote(self, collection: str, operacoes: list) -> tuple:
+        try:
+            resultado = await self._connection[collection].bulk_write(
+                operacoes, ordered=False
+            )
+            return set(resultado.upserted_ids), []
+        except BulkWriteError as error:
+            inseridos = {u["index"] for u in error.details.get("upserted", [])}
+            falhas = [
+                {"indice": e["index"], "erro": e.get("errmsg", "")}
+                for e in error.details.get("writeErrors", [])
+            ]
+            return inseridos, falhas
+        except Exception as error:
+            return set(), [
+                {"indice": i, "erro": str(error)} for i in range(len(operacoes))
+            ]
+
+    async def update_one(
+        self, collection: str, filter: dict, update: dict, **kwargs: any
+    ) -> bool:
+        try:
+            update = await self._connection[collection].update_one(
+                filter, update, **kwargs
+            )
+            if update.modified_count == 0:
+                return None
+            return True
+        except Exception as error:
+            return None
+
+    async def update_many(
+        self, collection: str, filter: dict, update: dict, **kwargs: any
+    ) -> bool:
+        try:
+            update = await self._connection[collection].update_many(
+                filter, update, **kwargs
+            )
+            if update.modified_count == 0:
+                return None
+            return True
+        except Exception as error:
+            return None
+
+    async def atualizar_lote(
+        self, collection: str, filter: dict, update: dict
+    ) -> dict | None:
+        # Como update_many, mas devolve as contagens em vez de um booleano
+        try:
+            resultado = await self._connection[collection].update_many(filter, update)
+            return {
+                "encontrados": resultado.matched_count,
+                "modificados": resultado.modified_count,
+            }
+        except Exception as error:
+            print(error)
+            return None
+
+    async def find_one_and_update(
+        self,
+        collection: str,
+        filter: dict,
+        update: dict,
+        projection: dict = {"_id": 0},
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs: any,
+    ) -> dict | None:
+        try:
+            return await self._connection[collection].find_one_and_update(
+                filter,
+                update,
+                projection,
+                return_document=return_document,
+                **kwargs,
+            )
+        except Exception as error:
+            return None
+
+    async def find_one_and_delete(
+        self, collection: str, query: dict, projection: dict = {"_id": 0}
+    ) -> dict | None:
+        try:
+            return await self._connection[collection].find_one_and_delete(
+                query, projection
+            )
+        except Exception as error:
+            return None
+
+    async def bulk_write(
+        self, collection: str, operacoes: list, ordered: bool = False
+    ):
+        try:
+            if not operacoes:
+                return None
+            return await self._connection[collection].bulk_write(
+                operacoes, ordered=ordered
+            )
+        except Exception as error:
+            print(error)
+            return None
+
+    async def delete_one(self, collection: str, query: dict) -> bool | None:
+        try:
+            result = await self._connection[collection].delete_one(query)
+            return True if result.deleted_count > 0 else None
+        except Exception as error:
+            return None
+
+    async def delete_many(self, collection: str, query: dict) -> bool | None:
+        try:
+            result = await self._connection[collection].delete_many(query)
+            return True if result.deleted_count > 0 else None
+        except Exception as error:
+            return None
+
+    async def remover_lote(self, collection: str, query: dict) -> int | None:
+        try:
+            result = await self._connection[collection].delete_many(query)
+            return result.deleted_count
+        except Exception as error:
+            print(error)
+            return None
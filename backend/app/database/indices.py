@@ -0,0 +1,64 @@
+from typing import Dict, List
+from pymongo import IndexModel
+from database.database_async import AsyncDBConnection
+
+# Registro de índices e formatos de consulta declarados pelos serviços.
+# Os índices são criados na inicialização da aplicação e as consultas são
+# usadas pela auditoria de planos (explain) para detectar COLLSCAN.
+INDICES: Dict[str, List[IndexModel]] = {}
+CONSULTAS: List[dict] = []
+
+
+def registrar_indices(collection: str, indices: List[IndexModel]) -> None:
+    INDICES.setdefault(collection, []).extend(indices)
+
+
+def registrar_consulta(
+    nome: str, collection: str, query: dict, sort: list = None
+) -> None:
+    CONSULTAS.append(
+        {"nome": nome, "collection": collection, "query": query, "sort": sort}
+    )
+
+
+async def criar_indices(db_connection: AsyncDBConnection) -> Dict[str, dict]:
+    # create_indexes é idempotente para índices com a mesma definição
+    resultado = {}
+    for collection, indices in INDICES.items():
+        try:
+            nomes = await db_connection.criar_indices(collection, indices)
+            resultado[collection] = {"indices": nomes}
+        except Exception as error:
+            print(f"Erro ao criar índices de {collection}: {error}")
+            resultado[collection] = {"erro": str(error)}
+    return resultado
+
+
+def _estagios(plano: dict) -> List[str]:
+    estagios = []
+    if not isinstance(plano, dict):
+        return estagios
+    if "stage" in plano:
+        estagios.append(plano["stage"])
+    for chave in ["inputStage", "queryPlan"]:
+        estagios.extend(_estagios(plano.get(chave)))
+    for filho in plano.get("inputStages", []):
+        estagios.extend(_estagios(filho))
+    return estagios
+
+
+async def auditar_consultas(db_connection: AsyncDBConnection) -> List[dict]:
+    relatorio = []
+    for consulta in CONSULTAS:
+        item = {"nome": consulta["nome"], "collection": consulta["collection"]}
+        try:
+            explain = await db_connection.explain(
+                consulta["collection"], consulta["query"], consulta["sort"]
+            )
+            plano = explain.get("queryPlanner", {}).get("winningPlan", {})
+            item["estagios"] = _estagios(plano)
+            item["collscan"] = "COLLSCAN" in item["estagios"]
+        except Exception as error:
+            item["erro"] = str(error)
+        relatorio.append(item)
+    return relatorio
@@ -1,10 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import usuario, authenticate, balanco, recorrente, importar_notion
+from app.routes import (
+    usuario,
+    authenticate,
+    balanco,
+    recorrente,
+    importar_notion,
+    importacao,
+    regra_categoria,
+    diagnostico,
+)
+from database.database_async import AsyncDBConnection, conectar_async, desconectar_async
+from database.indices import criar_indices
+from app.services.fila_importacao import encerrar_workers, iniciar_workers
+from app.services.recorrente import encerrar_agendador, iniciar_agendador
+from utils.executores import encerrar_executores
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cliente = conectar_async()
+    await criar_indices(AsyncDBConnection(cliente))
+    await iniciar_workers()
+    iniciar_agendador()
+    yield
+    await encerrar_agendador()
+    await encerrar_workers()
+    encerrar_executores()
+    await desconectar_async()
+
 
 app = FastAPI(
     title="Projeto Controle Financeiro",
     description="Projeto FastAPI para a criação de Controle Financeiro",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -13,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Proximo-Cursor"],
 )
 
 app.include_router(usuario.router)
@@ -20,3 +51,7 @@ app.include_router(authenticate.router)
 app.include_router(balanco.router)
 app.include_router(recorrente.router)
 app.include_router(importar_notion.router)
+app.include_router(importacao.router)
+app.include_router(regra_categoria.router)
+app.include_router(diagnostico.router)
+
@@ -1,32 +1,40 @@
-from typing import Literal, Optional
+from typing import List, Literal, Optional, get_args
 from pydantic import BaseModel
+from typing_extensions import NotRequired, TypedDict
+
+
+Mes = Literal[
+    "Janeiro",
+    "Fevereiro",
+    "Março",
+    "Abril",
+    "Maio",
+    "Junho",
+    "Julho",
+    "Agosto",
+    "Setembro",
+    "Outubro",
+    "Novembro",
+    "Dezembro",
+]
+MESES = list(get_args(Mes))
+Tipo = Literal["Entrada", "Saída"]
+TIPOS = list(get_args(Tipo))
+Tag = Literal[
+    "Inter PF", "Inter PJ", "Inter Cartão", "Nubank Cartão", "Nubank PF", "Caju"
+]
+TAGS = list(get_args(Tag))
 
 
 class BalancoModel(BaseModel):
     fonte: str
     valor: float
-    mes: Literal[
-        "Janeiro",
-        "Fevereiro",
-        "Março",
-        "Abril",
-        "Maio",
-        "Junho",
-        "Julho",
-        "Agosto",
-        "Setembro",
-        "Outubro",
-        "Novembro",
-        "Dezembro",
-    ]
+    mes: Mes
     observacao: Optional[str] = None
-    tipo: Optional[Literal["Entrada", "Saída"]] = None
+    data: Optional[str] = None  # Data da transação no extrato
+    tipo: Optional[Tipo] = None
     ano: Optional[int] = None
-    tag: Optional[
-        Literal[
-            "Inter PF", "Inter PJ", "Inter Cartão", "Nubank Cartão", "Nubank PF", "Caju"
-        ]
-    ] = None
+    tag: Optional[Tag] = None
     categoria: Optional[str] = "Outros"
     # categoria: Optional[
     #     Literal[
@@ -52,12 +60,47 @@ class BalancoModel(BaseModel):
     # ] = None
 
 
+class BalancoRegistro(TypedDict):
+    # Mesmos campos de BalancoModel, validados em lote (TypeAdapter) e
+    # devolvidos como dict, sem instanciar um modelo por linha; valor já em
+    # centavos
+    fonte: str
+    valor: int
+    mes: Mes
+    observacao: NotRequired[Optional[str]]
+    data: NotRequired[Optional[str]]
+    tipo: NotRequired[Optional[Tipo]]
+    ano: NotRequired[Optional[int]]
+    tag: NotRequired[Optional[Tag]]
+    categoria: NotRequired[Optional[str]]
+    recorrente_id: NotRequired[Optional[str]]
+
+
 class BalancoAtualizacaoModel(BaseModel):
     fonte: Optional[str] = None
     valor: Optional[float] = None
     mes: Optional[str] = None
     observacao: Optional[str] = None
+    data: Optional[str] = None
     tipo: Optional[str] = None
     ano: Optional[int] = None
     tag: Optional[str] = None
     categoria: Optional[str] = None
+
+
+class BalancoFiltroLoteModel(BaseModel):
+    mes: Optional[Mes] = None
+    ano: Optional[int] = None
+    tag: Optional[str] = None
+    categoria: Optional[str] = None
+    fonte: Optional[str] = None
+    busca: Literal["prefixo", "contem", "texto"] = "contem"
+
+
+class BalancoLoteModel(BaseModel):
+    ids: Optional[List[str]] = None
+    filtro: Optional[BalancoFiltroLoteModel] = None
+
+
+class BalancoEdicaoLoteModel(BalancoLoteModel):
+    dados: BalancoAtualizacaoModel
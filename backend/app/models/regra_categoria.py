@@ -0,0 +1,22 @@
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+class RegraCategoriaModel(BaseModel):
+    categoria: str
+    fonte: Optional[str] = None  # Trecho, prefixo ou regex da fonte
+    modo: Literal["contem", "prefixo", "regex"] = "contem"
+    valor_min: Optional[float] = None
+    valor_max: Optional[float] = None
+    tag: Optional[str] = None
+    prioridade: int = 0  # Regras de maior prioridade são aplicadas primeiro
+
+
+class RegraCategoriaAtualizacaoModel(BaseModel):
+    categoria: Optional[str] = None
+    fonte: Optional[str] = None
+    modo: Optional[Literal["contem", "prefixo", "regex"]] = None
+    valor_min: Optional[float] = None
+    valor_max: Optional[float] = None
+    tag: Optional[str] = None
+    prioridade: Optional[int] = None
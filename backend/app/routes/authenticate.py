@@ -4,7 +4,7 @@ from app.services.usuario import UsuarioService
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from utils.validador_rota import validador_rota
+from utils.validador_rota import usuario_autenticado
 
 
 router = APIRouter(tags=["Autenticação"])
@@ -14,8 +14,8 @@ usuario_service = UsuarioService()
 
 
 @router.post("/login")
-def login(data: LoginModel):
-    usuario = usuario_service.login(data)
+async def login(data: LoginModel):
+    usuario = await usuario_service.login(data)
     if not usuario:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,13 +27,7 @@ def login(data: LoginModel):
 
 
 @router.get("/me")
-def me(current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    if not usuario:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": "Usuário não autenticado!"},
-        )
+async def me(usuario=Depends(usuario_autenticado)):
     return JSONResponse(
         status_code=status.HTTP_200_OK, content=jsonable_encoder(usuario)
     )
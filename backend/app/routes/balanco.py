@@ -8,37 +8,73 @@ from fastapi import (
     HTTPException,
     Query,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-import math
-from database.database import DBConnection
-from app.services.usuario import UsuarioService
-from app.services.balanco import BalancoService
-from utils.validador_rota import validador_rota
-from models.balanco import BalancoModel, BalancoAtualizacaoModel
-
-from typing import Literal, List
-from uuid import uuid4
-from datetime import datetime
-import pandas as pd
-import io
+import json
+from app.services.balanco import (
+    BalancoService,
+    CAMPOS_BALANCO,
+    CAMPOS_ORDENACAO,
+    codificar_cursor,
+)
+from app.services.fila_importacao import (
+    ImportacaoService,
+    enfileirar,
+    registrar_processador,
+    salvar_upload,
+)
+from app.services.exportacao import (
+    EXPORTADORES,
+    FORMATOS_EXPORTACAO,
+    nome_arquivo,
+    verificar_formato,
+)
+from app.services.importacao import FORMATOS, identificar_formato
+from app.services.snapshot import CAMPOS_AGRUPAVEIS
+from utils.dinheiro import para_centavos, registro_em_reais
+from utils.validador_rota import usuario_autenticado, validador_rota
+from app.models.balanco import (
+    BalancoModel,
+    BalancoAtualizacaoModel,
+    BalancoEdicaoLoteModel,
+    BalancoLoteModel,
+    Mes,
+    Tipo,
+)
 
-from app.models.balanco import BalancoModel
+from typing import Literal, List, Optional
+from uuid import uuid4
 
 
 router = APIRouter(
     prefix="/balance", tags=["Balanço"], dependencies=[Depends(validador_rota)]
 )
 
-db_connection = DBConnection()
-usuario_service = UsuarioService()
 balanco_service = BalancoService()
+importacao_service = ImportacaoService()
+
+
+async def processar_upload_csv(job: dict, usuario: dict, progresso) -> None:
+    parametros = job["parametros"]
+    with open(job["arquivos"][0], "rb") as arquivo:
+        await balanco_service.importar_csv_em_lotes(
+            arquivo,
+            parametros["tipo_arquivo"],
+            parametros["mes"],
+            parametros["ano"],
+            usuario,
+            progresso=progresso,
+        )
+
+
+registrar_processador("csv", processar_upload_csv)
 
 
 @router.post("/")
-def criar_balanco(data: BalancoModel, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    balanco = balanco_service.criar_balanco(data.dict(), usuario)
+async def criar_balanco(data: BalancoModel, usuario=Depends(usuario_autenticado)):
+    dados = data.dict()
+    dados["valor"] = para_centavos(dados["valor"])
+    balanco = await balanco_service.criar_balanco(dados, usuario)
 
     if not balanco:
         return JSONResponse(
@@ -55,112 +91,255 @@ def criar_balanco(data: BalancoModel, current_user=Depends(validador_rota)):
 
 
 @router.get("/resumo_mensal")
-def resumo_mensal(ano: int, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    filtros = {"usuario_id": usuario.get("info", {}).get("id"), "ano": ano}
-    registros = db_connection.find("balanco", filtros, {"_id": 0})
-
-    meses_do_ano = [
-        "Janeiro",
-        "Fevereiro",
-        "Março",
-        "Abril",
-        "Maio",
-        "Junho",
-        "Julho",
-        "Agosto",
-        "Setembro",
-        "Outubro",
-        "Novembro",
-        "Dezembro",
-    ]
-
-    resumo = {
-        mes: {"entradas": 0.0, "saidas": 0.0, "liquido": 0.0} for mes in meses_do_ano
-    }
-
-    for r in registros:
-        mes = r.get("mes")
-        valor = r.get("valor", 0)
-        tipo = r.get("tipo")
+async def resumo_mensal(
+    ano: int,
+    por_categoria: bool = Query(False),
+    por_tag: bool = Query(False),
+    usuario=Depends(usuario_autenticado),
+):
+    resumo = await balanco_service.resumo_mensal(usuario, ano, por_categoria, por_tag)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=resumo)
 
-        if mes not in resumo:
-            continue  # ignora mês inválido
 
-        if tipo == "Entrada":
-            resumo[mes]["entradas"] += valor
-        elif tipo == "Saída":
-            resumo[mes]["saidas"] += valor
+@router.get("/analise")
+async def analise(
+    ano_inicio: int = Query(None),
+    ano_fim: int = Query(None),
+    usuario=Depends(usuario_autenticado),
+):
+    analise = await balanco_service.analise(usuario, ano_inicio, ano_fim)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=analise)
 
-        resumo[mes]["liquido"] = resumo[mes]["entradas"] - resumo[mes]["saidas"]
 
-    return JSONResponse(status_code=status.HTTP_200_OK, content=resumo)
+@router.get("/relatorio")
+async def relatorio(
+    agrupar: str = Query("categoria"),
+    ano: int = Query(None),
+    mes: Mes = Query(None),
+    tipo: Tipo = Query(None),
+    tag: str = Query(None),
+    categoria: str = Query(None),
+    origem: Literal["snapshot", "aggregate"] = Query("snapshot"),
+    usuario=Depends(usuario_autenticado),
+):
+    campos = [c.strip() for c in agrupar.split(",") if c.strip()]
+    invalidos = set(campos) - set(CAMPOS_AGRUPAVEIS)
+    if not campos or invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": f"Agrupe por um ou mais de: {', '.join(CAMPOS_AGRUPAVEIS)}"
+            },
+        )
+    filtros = {
+        campo: valor
+        for campo, valor in {
+            "ano": ano,
+            "mes": mes,
+            "tipo": tipo,
+            "tag": tag,
+            "categoria": categoria,
+        }.items()
+        if valor is not None
+    }
+    grupos = await balanco_service.relatorio(usuario, campos, filtros, origem)
+    if grupos is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "Falha ao gerar o relatório"},
+        )
+    return JSONResponse(status_code=status.HTTP_200_OK, content=grupos)
 
 
 @router.get("/")
-def listar_balanco(
+async def listar_balanco(
     mes: str = Query(None),
     ano: int = Query(None),
     tipo: str = Query(None),
     categoria: str = Query(None),
     fonte: str = Query(None),
     tag: str = Query(None),
-    current_user=Depends(validador_rota),
+    busca: Literal["prefixo", "contem", "texto"] = Query("contem"),
+    campos: str = Query(None, alias="fields"),
+    ordenar_por: Literal[tuple(CAMPOS_ORDENACAO)] = Query("criado_em"),
+    ordem: Literal["asc", "desc"] = Query("asc"),
+    limite: int = Query(None, ge=1, le=5000),
+    cursor: str = Query(None),
+    formato: Literal["json", "json_stream", "ndjson"] = Query("json"),
+    usuario=Depends(usuario_autenticado),
 ):
-    usuario = usuario_service.decodificar_token(current_user)
-
-    filtros = {"usuario_id": usuario.get("info", {}).get("id")}
-
-    if mes:
-        filtros["mes"] = mes
-    if ano:
-        filtros["ano"] = ano
-    if tipo:
-        filtros["tipo"] = tipo
-    if categoria:
-        filtros["categoria"] = categoria
-    if tag:
-        filtros["tag"] = tag
-    if fonte:
-        filtros["fonte"] = {"$regex": fonte, "$options": "i"}
-
-    print("filtros")
-    print(filtros)
-    registros = db_connection.find("balanco", filtros, {"_id": 0})
+    filtros = balanco_service.montar_filtros(
+        usuario, mes, ano, tipo, categoria, fonte, tag, busca
+    )
+    lista_campos = validar_campos(campos)
+
+    try:
+        registros = balanco_service.listar_balanco(
+            filtros, lista_campos, ordenar_por, ordem, limite, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail={"error": str(e)}
+        )
+
+    if formato == "ndjson":
+        return StreamingResponse(
+            gerar_ndjson(em_reais(registros)), media_type="application/x-ndjson"
+        )
+    if formato == "json_stream":
+        return StreamingResponse(
+            gerar_array_json(em_reais(registros)), media_type="application/json"
+        )
+
+    registros = await registros.to_list(None)
+    cabecalhos = {}
+    if limite and len(registros) == limite:
+        # O cursor usa o valor gravado, em centavos
+        cabecalhos["X-Proximo-Cursor"] = codificar_cursor(registros[-1], ordenar_por)
     return JSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(
-            registros,
-            # include_none=True,
-            # custom_encoder={
-            #     float: lambda x: 0.0 if math.isnan(x) or math.isinf(x) else x
-            # },
-        ),
+        content=jsonable_encoder([registro_em_reais(r) for r in registros]),
+        headers=cabecalhos,
     )
 
 
-@router.get("/{id}")
-def buscar_balanco(id: str, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
+@router.get("/export")
+async def exportar_balanco(
+    mes: str = Query(None),
+    ano: int = Query(None),
+    tipo: str = Query(None),
+    categoria: str = Query(None),
+    fonte: str = Query(None),
+    tag: str = Query(None),
+    busca: Literal["prefixo", "contem", "texto"] = Query("contem"),
+    campos: str = Query(None, alias="fields"),
+    ordenar_por: Literal[tuple(CAMPOS_ORDENACAO)] = Query("criado_em"),
+    ordem: Literal["asc", "desc"] = Query("asc"),
+    formato: Literal[tuple(FORMATOS_EXPORTACAO)] = Query("csv", alias="format"),
+    usuario=Depends(usuario_autenticado),
+):
+    # Mesmos filtros da listagem, lidos do cursor e escritos em lotes
+    erro = verificar_formato(formato)
+    if erro:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail={"error": erro}
+        )
+    filtros = balanco_service.montar_filtros(
+        usuario, mes, ano, tipo, categoria, fonte, tag, busca
+    )
+    colunas = validar_campos(campos) or CAMPOS_BALANCO
+    registros = balanco_service.listar_balanco(filtros, colunas, ordenar_por, ordem)
+    return StreamingResponse(
+        EXPORTADORES[formato](em_reais(registros), colunas),
+        media_type=FORMATOS_EXPORTACAO[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo(formato)}"'
+        },
+    )
+
 
-    registro = db_connection.find_one(
-        "balanco",
-        {"id": id, "usuario_id": usuario.get("info", {}).get("id")},
-        {"_id": 0},
+def validar_campos(campos: Optional[str]) -> Optional[List[str]]:
+    if not campos:
+        return None
+    lista_campos = [c.strip() for c in campos.split(",") if c.strip()]
+    invalidos = set(lista_campos) - set(CAMPOS_BALANCO)
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": f"Campos inválidos: {', '.join(sorted(invalidos))}"},
+        )
+    return lista_campos
+
+
+async def em_reais(registros):
+    async for r in registros:
+        yield registro_em_reais(r)
+
+
+async def gerar_ndjson(registros):
+    async for r in registros:
+        yield json.dumps(r, default=str) + "\n"
+
+
+async def gerar_array_json(registros):
+    yield "["
+    primeiro = True
+    async for r in registros:
+        yield ("" if primeiro else ",") + json.dumps(r, default=str)
+        primeiro = False
+    yield "]"
+
+
+def filtros_lote(data: BalancoLoteModel, usuario: dict) -> dict:
+    filtro = data.filtro.dict(exclude_none=True) if data.filtro else {}
+    busca = filtro.pop("busca", "contem")
+    if not data.ids and not filtro:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Informe ids ou ao menos um filtro."},
+        )
+    return balanco_service.filtros_lote(usuario, data.ids, busca=busca, **filtro)
+
+
+@router.patch("/bulk")
+async def editar_balancos_em_lote(
+    data: BalancoEdicaoLoteModel, usuario=Depends(usuario_autenticado)
+):
+    dados = data.dados.dict(exclude_none=True)
+    if not dados:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Nenhum campo para editar."},
+        )
+    if "valor" in dados:
+        dados["valor"] = para_centavos(dados["valor"])
+    resultado = await balanco_service.editar_balancos_em_lote(
+        filtros_lote(data, usuario), dados
     )
+
+    if resultado is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "Balanços não editados!"},
+        )
+    return JSONResponse(status_code=status.HTTP_200_OK, content=resultado)
+
+
+@router.delete("/bulk")
+async def deletar_balancos_em_lote(
+    data: BalancoLoteModel, usuario=Depends(usuario_autenticado)
+):
+    removidos = await balanco_service.deletar_balancos_em_lote(
+        filtros_lote(data, usuario)
+    )
+
+    if removidos is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "Balanços não deletados!"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK, content={"removidos": removidos}
+    )
+
+
+@router.get("/{id}")
+async def buscar_balanco(id: str, usuario=Depends(usuario_autenticado)):
+    registro = await balanco_service.buscar_balanco(id, usuario)
     return JSONResponse(
-        status_code=status.HTTP_200_OK, content=jsonable_encoder(registro)
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(registro_em_reais(registro)),
     )
 
 
 @router.put("/{id}")
-def editar_balanco(
-    id: str, data: BalancoAtualizacaoModel, current_user=Depends(validador_rota)
+async def editar_balanco(
+    id: str, data: BalancoAtualizacaoModel, usuario=Depends(usuario_autenticado)
 ):
-    usuario = usuario_service.decodificar_token(current_user)
-    resultado = balanco_service.editar_balanco(
-        id, data.dict(exclude_none=True), usuario
-    )
+    dados = data.dict(exclude_none=True)
+    if "valor" in dados:
+        dados["valor"] = para_centavos(dados["valor"])
+    resultado = await balanco_service.editar_balanco(id, dados, usuario)
 
     if not resultado:
         return JSONResponse(
@@ -174,11 +353,8 @@ def editar_balanco(
 
 
 @router.delete("/deletar/{id}")
-def deletar_balanco(id: str, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    resultado = db_connection.delete_one(
-        "balanco", {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
-    )
+async def deletar_balanco(id: str, usuario=Depends(usuario_autenticado)):
+    resultado = await balanco_service.deletar_balanco(id, usuario)
 
     if not resultado:
         raise HTTPException(
@@ -194,67 +370,36 @@ def deletar_balanco(id: str, current_user=Depends(validador_rota)):
 @router.post("/upload")
 async def upload_balanco(
     file: UploadFile = File(...),
-    tipo_arquivo: Literal[
-        "extrato_inter", "fatura_inter", "extrato_nubank", "fatura_nubank"
-    ] = Form(...),
-    mes: Literal[
-        "Janeiro",
-        "Fevereiro",
-        "Março",
-        "Abril",
-        "Maio",
-        "Junho",
-        "Julho",
-        "Agosto",
-        "Setembro",
-        "Outubro",
-        "Novembro",
-        "Dezembro",
-    ] = Form(...),
+    tipo_arquivo: Optional[Literal[tuple(FORMATOS)]] = Form(None),
+    mes: Mes = Form(...),
     ano: int = Form(...),
-    usuario: dict = Depends(validador_rota),
+    usuario: dict = Depends(usuario_autenticado),
 ):
+    # O formato é conferido já na requisição (só o início do arquivo); a
+    # importação em si roda em segundo plano e é acompanhada em /imports
     try:
-        contents = await file.read()
-        if tipo_arquivo == "extrato_inter":
-            df = pd.read_csv(
-                io.StringIO(contents.decode("utf-8")),
-                sep=";",
-                engine="python",
-                skiprows=5,  # Ignora as 5 primeiras linhas (cabeçalho bagunçado)
-                skip_blank_lines=True,
-            )
-        else:
-            df = pd.read_csv(
-                io.StringIO(contents.decode("utf-8")), sep=None, engine="python"
-            )
-    except Exception as e:
+        formato = identificar_formato(file.file, tipo_arquivo)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Erro ao ler CSV: {e}")
 
-    registros = balanco_service.processar_balanco_upload(df, tipo_arquivo, mes, ano)
-
-    if not registros:
-        raise HTTPException(
-            status_code=400, detail="Nenhum registro válido encontrado."
-        )
-
-    current_usuario = usuario_service.decodificar_token(usuario)
-
-    usuario_id = current_usuario.get("info", {}).get("id", "")
-    agora = datetime.now().isoformat()
+    job_id = str(uuid4())
+    caminho = await salvar_upload(file, f"{job_id}.csv")
+    job = await importacao_service.criar_importacao(
+        usuario,
+        "csv",
+        [caminho],
+        {"tipo_arquivo": formato.nome, "mes": mes, "ano": ano},
+        id=job_id,
+    )
+    if not job:
+        raise HTTPException(status_code=500, detail="Importação não registrada.")
+    await enfileirar(job["id"])
 
-    # Inserir no banco com dados extras
-    try:
-        docs = []
-        for r in registros:
-            d = r.model_dump()
-            d["usuario_id"] = usuario_id
-            d["criado_em"] = agora
-            d["id"] = d.get("id", str(uuid4()))
-            docs.append(d)
-
-        db_connection.insert_many("balanco", docs)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao salvar no banco: {e}")
-
-    return {"status": "sucesso", "quantidade_registros": len(registros)}
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "job_id": job["id"],
+            "status": job["status"],
+            "tipo_arquivo": formato.nome,
+        },
+    )
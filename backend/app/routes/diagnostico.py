@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from database.database_async import AsyncDBConnection, estatisticas_pool
+from database.indices import auditar_consultas
+from app.services.usuario import cache_usuarios
+from utils.validador_rota import usuario_autenticado, validador_rota
+
+router = APIRouter(
+    prefix="/diagnostico",
+    tags=["Diagnóstico"],
+    dependencies=[Depends(validador_rota)],
+)
+
+db_connection = AsyncDBConnection()
+
+
+def validador_admin(usuario=Depends(usuario_autenticado)):
+    if not usuario.get("info", {}).get("admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"error": "Acesso restrito a administradores."},
+        )
+    return usuario
+
+
+@router.get("/indices")
+async def auditar_indices(usuario=Depends(validador_admin)):
+    relatorio = await auditar_consultas(db_connection)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "consultas": relatorio,
+            "collscans": [r["nome"] for r in relatorio if r.get("collscan")],
+        },
+    )
+
+
+@router.get("/cache")
+async def estatisticas_cache(usuario=Depends(validador_admin)):
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"usuarios": cache_usuarios.estatisticas()},
+    )
+
+
+@router.get("/pool")
+async def estatisticas_conexoes(usuario=Depends(validador_admin)):
+    return JSONResponse(
+        status_code=status.HTTP_200_OK, content={"mongo": estatisticas_pool()}
+    )
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+
+from app.services.fila_importacao import ImportacaoService
+from utils.validador_rota import usuario_autenticado, validador_rota
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["Importações"],
+    dependencies=[Depends(validador_rota)],
+)
+
+importacao_service = ImportacaoService()
+
+
+@router.get("/")
+async def listar_importacoes(usuario=Depends(usuario_autenticado)):
+    registros = await importacao_service.listar_importacoes(usuario)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(registros),
+    )
+
+
+@router.get("/{job_id}")
+async def buscar_importacao(job_id: str, usuario=Depends(usuario_autenticado)):
+    # Contadores de linhas lidas/inseridas/ignoradas/com falha e vazão
+    job = await importacao_service.buscar_importacao(job_id, usuario)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "Importação não encontrada"},
+        )
+    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(job))
@@ -1,95 +1,83 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
 from fastapi.responses import JSONResponse
-from pydantic import ValidationError
-import pandas as pd
-from io import StringIO
-from datetime import datetime
+from uuid import uuid4
 from app.services.balanco import BalancoService
-from app.services.usuario import UsuarioService
-from utils.validador_rota import validador_rota
+from app.services.categorizacao import categorizar_registros
+from app.services.fila_importacao import (
+    ImportacaoService,
+    enfileirar,
+    registrar_processador,
+    salvar_upload,
+)
+from app.services.importacao_notion import falhas_por_linha, ler_csv_notion
+from app.services.regra_categoria import RegraCategoriaService
+from utils.validador_rota import usuario_autenticado
+from utils.executores import executar_em_thread
 
 router = APIRouter(tags=["Upload Balanço"])
 
-MAPPING_MESES = {
-    "January": "Janeiro",
-    "February": "Fevereiro",
-    "March": "Março",
-    "April": "Abril",
-    "May": "Maio",
-    "June": "Junho",
-    "July": "Julho",
-    "August": "Agosto",
-    "September": "Setembro",
-    "October": "Outubro",
-    "November": "Novembro",
-    "December": "Dezembro",
-}
-
 balanco_service = BalancoService()
-usuario_service = UsuarioService()
-
-
-def parse_csv(content: bytes, tipo: str):
-    df = pd.read_csv(StringIO(content.decode("utf-8")))
-    registros = []
-
-    for _, row in df.iterrows():
-        fonte = row.get("Source")
-        if pd.isna(fonte):
-            continue
-
-        mes_str = str(row.get("Month", "")).split(" ")[0]
-        mes = MAPPING_MESES.get(mes_str)
-        if not mes:
-            continue
-
-        try:
-            valor_str = str(row.get("Amount", "0")).replace("R$", "").replace(",", "")
-            valor = float(valor_str)
-        except ValueError:
-            continue
-
-        registros.append(
-            {
-                "fonte": fonte,
-                "valor": valor,
-                "tipo": tipo,
-                "mes": mes,
-                "ano": 2025,
-                "tag": "" if pd.isna(row.get("Tags")) else row.get("Tags"),
-                "observacao": "" if pd.isna(row.get("Obs")) else row.get("Obs"),
-            }
-        )
-    return registros
+regra_service = RegraCategoriaService()
+importacao_service = ImportacaoService()
+
+
+async def processar_importacao_notion(job: dict, usuario: dict, progresso) -> None:
+    entradas_caminho, saidas_caminho = job["arquivos"]
+    entradas, linhas_entradas = await executar_em_thread(
+        ler_csv_notion, entradas_caminho, "Entrada"
+    )
+    saidas, linhas_saidas = await executar_em_thread(
+        ler_csv_notion, saidas_caminho, "Saída"
+    )
+    origens = [("entradas", linha) for linha in linhas_entradas] + [
+        ("saidas", linha) for linha in linhas_saidas
+    ]
+
+    regras = await regra_service.regras_compiladas(usuario)
+    registros = await executar_em_thread(
+        categorizar_registros, entradas + saidas, regras
+    )
+
+    resultado = await balanco_service.criar_balancos_em_lote(
+        registros, usuario, deduplicar=True, validar=True
+    )
+    await progresso(
+        {
+            "linhas_lidas": len(registros),
+            "inseridos": resultado["inseridos"],
+            "ignorados": resultado["ignorados"],
+            "falhas": falhas_por_linha(resultado["falhas"], origens),
+        }
+    )
+
+
+registrar_processador("notion", processar_importacao_notion)
 
 
 @router.post("/upload-financeiro")
-def upload_balanco(
+async def upload_balanco(
     income_file: UploadFile = File(...),
     expenses_file: UploadFile = File(...),
-    current_user=Depends(validador_rota),
+    usuario=Depends(usuario_autenticado),
 ):
-    usuario = usuario_service.decodificar_token(current_user)
-
-    try:
-        income_content = income_file.file.read()
-        expenses_content = expenses_file.file.read()
-
-        entradas = parse_csv(income_content, tipo="Entrada")
-        saidas = parse_csv(expenses_content, tipo="Saída")
-
-        total = 0
-        for registro in entradas + saidas:
-            try:
-                balanco_service.criar_balanco(registro, usuario)
-                total += 1
-            except ValidationError:
-                continue
-
-        return JSONResponse(
-            status_code=status.HTTP_201_CREATED,
-            content={"mensagem": f"{total} registros criados com sucesso."},
+    # Os arquivos vão para disco e a importação roda em segundo plano;
+    # o andamento é consultado em /imports/{job_id}
+    job_id = str(uuid4())
+    arquivos = [
+        await salvar_upload(income_file, f"{job_id}_entradas.csv"),
+        await salvar_upload(expenses_file, f"{job_id}_saidas.csv"),
+    ]
+    job = await importacao_service.criar_importacao(
+        usuario, "notion", arquivos, {}, id=job_id
+    )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Importação não registrada.",
         )
+    await enfileirar(job["id"])
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job["id"], "status": job["status"]},
+    )
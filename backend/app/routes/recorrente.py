@@ -1,13 +1,12 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, status, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from datetime import datetime
+from calendar import monthrange
+from datetime import date
 
-from database.database import DBConnection
-from app.services.usuario import UsuarioService
 from app.services.recorrente import RecorrenteService
-from app.services.balanco import BalancoService
-from utils.validador_rota import validador_rota
+from utils.dinheiro import registro_em_centavos, registro_em_reais
+from utils.validador_rota import usuario_autenticado, validador_rota
 from models.recorrente import RecorrenteModel, RecorrenteAtualizacaoModel
 
 router = APIRouter(
@@ -16,15 +15,18 @@ router = APIRouter(
     dependencies=[Depends(validador_rota)],
 )
 
-usuario_service = UsuarioService()
 recorrente_service = RecorrenteService()
-balanco_service = BalancoService()
+# Horizonte máximo da projeção (30 anos)
+MESES_PROJECAO = 360
 
 
 @router.post("/")
-def criar_recorrente(data: RecorrenteModel, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    recorrente = recorrente_service.criar_recorrente(data.dict(), usuario)
+async def criar_recorrente(
+    data: RecorrenteModel, usuario=Depends(usuario_autenticado)
+):
+    recorrente = await recorrente_service.criar_recorrente(
+        registro_em_centavos(data.dict()), usuario
+    )
 
     if not recorrente:
         return JSONResponse(
@@ -38,32 +40,38 @@ def criar_recorrente(data: RecorrenteModel, current_user=Depends(validador_rota)
 
 
 @router.get("/")
-def listar_recorrentes(current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    registros = recorrente_service.listar_recorrentes(usuario)
+async def listar_recorrentes(usuario=Depends(usuario_autenticado)):
+    registros = await recorrente_service.listar_recorrentes(usuario)
     return JSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(registros),
+        content=jsonable_encoder([registro_em_reais(r) for r in registros]),
     )
 
 
+@router.get("/projecao")
+async def projecao(
+    meses: int = Query(12, ge=1, le=MESES_PROJECAO),
+    usuario=Depends(usuario_autenticado),
+):
+    resultado = await recorrente_service.projecao(usuario, meses)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=resultado)
+
+
 @router.get("/{id}")
-def buscar_recorrente(id: str, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    registro = recorrente_service.buscar_recorrente(id, usuario)
+async def buscar_recorrente(id: str, usuario=Depends(usuario_autenticado)):
+    registro = await recorrente_service.buscar_recorrente(id, usuario)
     return JSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(registro),
+        content=jsonable_encoder(registro_em_reais(registro)),
     )
 
 
 @router.put("/{id}")
-def editar_recorrente(
-    id: str, data: RecorrenteAtualizacaoModel, current_user=Depends(validador_rota)
+async def editar_recorrente(
+    id: str, data: RecorrenteAtualizacaoModel, usuario=Depends(usuario_autenticado)
 ):
-    usuario = usuario_service.decodificar_token(current_user)
-    resultado = recorrente_service.editar_recorrente(
-        id, data.dict(exclude_none=True), usuario
+    resultado = await recorrente_service.editar_recorrente(
+        id, registro_em_centavos(data.dict(exclude_none=True)), usuario
     )
 
     if not resultado:
@@ -78,9 +86,8 @@ def editar_recorrente(
 
 
 @router.delete("/{id}")
-def deletar_recorrente(id: str, current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    resultado = recorrente_service.deletar_recorrente(id, usuario)
+async def deletar_recorrente(id: str, usuario=Depends(usuario_autenticado)):
+    resultado = await recorrente_service.deletar_recorrente(id, usuario)
 
     if not resultado:
         raise HTTPException(
@@ -94,61 +101,27 @@ def deletar_recorrente(id: str, current_user=Depends(validador_rota)):
 
 
 @router.post("/gerar-balance")
-def gerar_balance(current_user=Depends(validador_rota)):
-    usuario = usuario_service.decodificar_token(current_user)
-    recorrentes = recorrente_service.listar_recorrentes(usuario)
+async def gerar_balance(usuario=Depends(usuario_autenticado)):
+    # Gera o mês corrente inteiro (como antes) e os meses atrasados; as
+    # ocorrências já existentes são ignoradas
+    hoje = date.today()
+    resultado = await recorrente_service.gerar_ocorrencias(
+        date(hoje.year, hoje.month, monthrange(hoje.year, hoje.month)[1]), usuario
+    )
 
-    if not recorrentes:
+    # Nenhuma pendente não é erro (geração repetida); nenhuma cadastrada é
+    pendentes = resultado["recorrentes"]
+    if not pendentes and not await recorrente_service.listar_recorrentes(usuario):
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": "Nenhuma transação recorrente encontrada!"},
         )
 
-    mes_atual = datetime.now().strftime("%B")
-    ano_atual = datetime.now().year
-
-    # Mapeamento de meses em inglês para português
-    meses = {
-        "January": "Janeiro",
-        "February": "Fevereiro",
-        "March": "Março",
-        "April": "Abril",
-        "May": "Maio",
-        "June": "Junho",
-        "July": "Julho",
-        "August": "Agosto",
-        "September": "Setembro",
-        "October": "Outubro",
-        "November": "Novembro",
-        "December": "Dezembro",
-    }
-
-    mes_atual_pt = meses[mes_atual]
-    registros_criados = 0
-
-    for recorrente in recorrentes:
-        try:
-            balanco_data = {
-                "fonte": recorrente["descricao"],
-                "valor": recorrente["valor"],
-                "tipo": recorrente["tipo"],
-                "mes": mes_atual_pt,
-                "ano": ano_atual,
-                "tag": recorrente.get("tag"),
-                "categoria": recorrente.get("categoria"),
-                "observacao": f"Gerado automaticamente da transação recorrente {recorrente['descricao']}",
-            }
-
-            balanco_service.criar_balanco(balanco_data, usuario)
-            registros_criados += 1
-
-        except Exception as e:
-            print(f"Erro ao criar balanço para {recorrente['descricao']}: {str(e)}")
-            continue
-
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
-            "mensagem": f"{registros_criados} registros criados com sucesso no balanço"
+            "mensagem": f"{resultado['inseridos']} registros criados com sucesso no balanço",
+            "ignorados": resultado["ignorados"],
+            "falhas": resultado["falhas"],
         },
     )
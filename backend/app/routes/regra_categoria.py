@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, status, HTTPException, Query
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+
+from app.services.regra_categoria import RegraCategoriaService
+from app.services.balanco import BalancoService
+from utils.dinheiro import registro_em_centavos, registro_em_reais
+from utils.validador_rota import usuario_autenticado, validador_rota
+from models.regra_categoria import RegraCategoriaModel, RegraCategoriaAtualizacaoModel
+
+router = APIRouter(
+    prefix="/category-rules",
+    tags=["Regras de Categoria"],
+    dependencies=[Depends(validador_rota)],
+)
+
+regra_service = RegraCategoriaService()
+balanco_service = BalancoService()
+# Limites gravados em centavos, como os lançamentos; a API usa reais
+CAMPOS_VALOR = ("valor_min", "valor_max")
+
+
+@router.post("/")
+async def criar_regra(data: RegraCategoriaModel, usuario=Depends(usuario_autenticado)):
+    try:
+        regra = await regra_service.criar_regra(
+            registro_em_centavos(data.dict(), CAMPOS_VALOR), usuario
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail={"error": str(e)}
+        )
+
+    if not regra:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Regra de categoria não criada!"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "mensagem": "Regra de categoria criada com sucesso",
+            "id": regra["id"],
+        },
+    )
+
+
+@router.get("/")
+async def listar_regras(usuario=Depends(usuario_autenticado)):
+    registros = await regra_service.listar_regras(usuario)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            [registro_em_reais(r, CAMPOS_VALOR) for r in registros]
+        ),
+    )
+
+
+@router.post("/reaplicar")
+async def reaplicar_regras(
+    somente_pendentes: bool = Query(True),
+    usuario=Depends(usuario_autenticado),
+):
+    # Recategoriza o histórico; por padrão só lançamentos sem categoria/"Outros"
+    regras = await regra_service.regras_compiladas(usuario)
+    if not regras:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Nenhuma regra de categoria cadastrada!"},
+        )
+    resultado = await balanco_service.recategorizar(usuario, regras, somente_pendentes)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=resultado)
+
+
+@router.get("/{id}")
+async def buscar_regra(id: str, usuario=Depends(usuario_autenticado)):
+    registro = await regra_service.buscar_regra(id, usuario)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(registro_em_reais(registro, CAMPOS_VALOR)),
+    )
+
+
+@router.put("/{id}")
+async def editar_regra(
+    id: str, data: RegraCategoriaAtualizacaoModel, usuario=Depends(usuario_autenticado)
+):
+    dados = registro_em_centavos(data.dict(exclude_none=True), CAMPOS_VALOR)
+    try:
+        resultado = await regra_service.editar_regra(id, dados, usuario)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail={"error": str(e)}
+        )
+
+    if not resultado:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Regra de categoria não editada!"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"mensagem": "Regra de categoria editada com sucesso"},
+    )
+
+
+@router.delete("/{id}")
+async def deletar_regra(id: str, usuario=Depends(usuario_autenticado)):
+    resultado = await regra_service.deletar_regra(id, usuario)
+
+    if not resultado:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Regra de categoria não deletada"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"mensagem": "Regra de categoria deletada com sucesso"},
+    )
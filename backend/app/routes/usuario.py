@@ -11,9 +11,9 @@ usuario_service = UsuarioService()
 
 
 @router.post("/")
-def criar_usuario(data: UsuarioModel):
+async def criar_usuario(data: UsuarioModel):
     try:
-        usuario = usuario_service.criar_usuario(data.dict())
+        usuario = await usuario_service.criar_usuario(data.dict())
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
             content={
@@ -26,9 +26,9 @@ def criar_usuario(data: UsuarioModel):
 
 
 @router.get("")
-def listar_usuarios(email: Optional[str] = None):
+async def listar_usuarios(email: Optional[str] = None):
     try:
-        usuarios = usuario_service.listar_usuarios(email)
+        usuarios = await usuario_service.listar_usuarios(email)
         return JSONResponse(status_code=status.HTTP_200_OK, content=usuarios)
     except Exception as e:
         print(e)
@@ -39,9 +39,9 @@ def listar_usuarios(email: Optional[str] = None):
 
 
 @router.get("/{id}")
-def listar_usuario(id: str):
+async def listar_usuario(id: str):
     try:
-        usuario = usuario_service.listar_usuario(id)
+        usuario = await usuario_service.listar_usuario(id)
         if not usuario:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -57,10 +57,10 @@ def listar_usuario(id: str):
 
 
 @router.put("/{id}")
-def editar_usuario(id: str, data: EditarUsuarioModel):
+async def editar_usuario(id: str, data: EditarUsuarioModel):
     try:
         print("90")
-        usuario = usuario_service.editar_usuario_put(id, data.dict())
+        usuario = await usuario_service.editar_usuario_put(id, data.dict())
         print(usuario)
         if not usuario:
             raise HTTPException(
@@ -80,9 +80,9 @@ def editar_usuario(id: str, data: EditarUsuarioModel):
 
 
 @router.patch("/editar/{id}")
-def editar_usuario_patch(id: str, email: str):
+async def editar_usuario_patch(id: str, email: str):
     try:
-        usuario = usuario_service.editar_usuario_patch(id, email)
+        usuario = await usuario_service.editar_usuario_patch(id, email)
         if not usuario:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -101,9 +101,9 @@ def editar_usuario_patch(id: str, email: str):
 
 
 @router.delete("/{id}")
-def deletar_usuario(id: str):
+async def deletar_usuario(id: str):
     try:
-        usuario = usuario_service.deletar_usuario(id)
+        usuario = await usuario_service.deletar_usuario(id)
         if not usuario:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,208 @@
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+from app.models.balanco import MESES, TIPOS
+from utils.datas import indice_mes, indice_periodo, ler_data
+from utils.dinheiro import CENTAVOS, para_reais
+
+SERIES = ["entradas", "saidas", "liquido"]
+JANELAS = [3, 6, 12]
+
+
+def _lista(valores: np.ndarray) -> List[Optional[float]]:
+    # NaN (janela incompleta, divisão por zero) vira null no JSON
+    return [None if v != v else v for v in np.round(valores, 2).tolist()]
+
+
+def _reais(centavos: np.ndarray) -> List[Optional[float]]:
+    # As somas correm em centavos int64, exatas; só a saída vira reais
+    return _lista(centavos / CENTAVOS)
+
+
+def _centavos(valores) -> np.ndarray:
+    # Totais antigos gravados como float são arredondados, não truncados, ao
+    # entrar nas matrizes int64
+    return np.rint(np.asarray(valores, dtype=float)).astype(np.int64)
+
+
+def media_movel(valores: np.ndarray, janela: int) -> np.ndarray:
+    # Média dos últimos `janela` meses via soma acumulada; NaN até a janela
+    # estar completa
+    resultado = np.full(valores.shape, np.nan)
+    if len(valores) >= janela:
+        acumulado = np.cumsum(np.insert(valores, 0, 0.0))
+        resultado[janela - 1 :] = (acumulado[janela:] - acumulado[:-janela]) / janela
+    return resultado
+
+
+def variacao(valores: np.ndarray, defasagem: int) -> np.ndarray:
+    resultado = np.full(valores.shape, np.nan)
+    if len(valores) > defasagem:
+        resultado[defasagem:] = valores[defasagem:] - valores[:-defasagem]
+    return resultado
+
+
+def calcular_analise(resumos: List[dict]) -> dict:
+    # Monta uma matriz compacta (série x mês) cobrindo do primeiro ao último
+    # mês com lançamentos, com zeros nos meses sem movimento, e calcula tudo
+    # de forma vetorizada sobre ela
+    resumos = [r for r in resumos if r.get("mes") in MESES and r.get("ano")]
+    if not resumos:
+        return {
+            "periodos": [],
+            "series": {},
+            "medias_moveis": {},
+            "variacao_mensal": {},
+            "variacao_anual": {},
+            "participacao_categorias": {},
+        }
+
+    posicoes = np.array([r["ano"] * 12 + MESES.index(r["mes"]) for r in resumos])
+    inicio = posicoes.min()
+    indices = posicoes - inicio
+    meses = int(posicoes.max() - inicio) + 1
+
+    series = np.zeros((len(SERIES), meses), dtype=np.int64)
+    for i, campo in enumerate(SERIES):
+        np.add.at(
+            series[i], indices, _centavos([r.get(campo) or 0 for r in resumos])
+        )
+
+    categorias: Dict[str, int] = {}
+    colunas, linhas, valores = [], [], []
+    for r, indice in zip(resumos, indices.tolist()):
+        for categoria, detalhe in (r.get("categorias") or {}).items():
+            colunas.append(categorias.setdefault(categoria, len(categorias)))
+            linhas.append(indice)
+            valores.append(detalhe.get("saidas") or 0)
+    por_categoria = np.zeros((len(categorias), meses), dtype=np.int64)
+    np.add.at(por_categoria, (colunas, linhas), _centavos(valores))
+    saidas = series[SERIES.index("saidas")]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        participacao = np.where(saidas > 0, por_categoria / saidas, np.nan)
+
+    periodos = [
+        {"ano": int(p // 12), "mes": MESES[int(p % 12)]}
+        for p in range(inicio, inicio + meses)
+    ]
+    return {
+        "periodos": periodos,
+        "series": {c: _reais(series[i]) for i, c in enumerate(SERIES)},
+        "medias_moveis": {
+            str(janela): {
+                c: _reais(media_movel(series[i], janela))
+                for i, c in enumerate(SERIES)
+            }
+            for janela in JANELAS
+        },
+        "variacao_mensal": {
+            c: _reais(variacao(series[i], 1)) for i, c in enumerate(SERIES)
+        },
+        "variacao_anual": {
+            c: _reais(variacao(series[i], 12)) for i, c in enumerate(SERIES)
+        },
+        "participacao_categorias": {
+            categoria: _lista(participacao[i]) for categoria, i in categorias.items()
+        },
+    }
+
+
+def _ordinais(datas: List[Optional[str]], padrao: int) -> np.ndarray:
+    # Datas como ordinais (dias), com `padrao` para as ausentes ou inválidas
+    return np.array(
+        [d.toordinal() if d else padrao for d in map(ler_data, datas)],
+        dtype=np.int64,
+    )
+
+
+def calcular_projecao(
+    recorrentes: List[dict], resumos: List[dict], inicio: date, meses: int
+) -> dict:
+    # Expande as regras recorrentes numa matriz (regra x mês) de valores
+    # devidos, respeitando inicio/fim, o dia limitado ao tamanho do mês e os
+    # meses já gerados (que já estão no realizado), e a reduz para
+    # (mês x categoria) com um produto de matrizes. Os totais realizados de
+    # balanco_resumo são somados por cima
+    primeiro = indice_mes(inicio.year, inicio.month)
+    indices = np.arange(primeiro, primeiro + meses)
+    limites = np.array(
+        [
+            date(i // 12, i % 12 + 1, 1).toordinal()
+            for i in range(primeiro, primeiro + meses + 1)
+        ],
+        dtype=np.int64,
+    )
+    inicio_mes, tamanho_mes = limites[:-1], np.diff(limites)
+
+    recorrentes = [r for r in recorrentes if r.get("tipo") in TIPOS]
+    dia = np.array([r.get("dia") or 1 for r in recorrentes], dtype=np.int64)
+    valor = _centavos([r.get("valor") or 0 for r in recorrentes])
+    entrada = np.array([r["tipo"] == "Entrada" for r in recorrentes], dtype=bool)
+    gerado = np.array(
+        [indice_periodo(r.get("ultimo_periodo_gerado")) for r in recorrentes],
+        dtype=np.int64,
+    )
+    datas = inicio_mes + np.clip(dia[:, None], 1, tamanho_mes) - 1
+    devidas = (
+        (datas >= _ordinais([r.get("inicio") for r in recorrentes], 0)[:, None])
+        & (datas <= _ordinais([r.get("fim") for r in recorrentes], 2**62)[:, None])
+        & (indices > gerado[:, None])
+    )
+    valores = devidas * valor[:, None]
+    entradas = valores[entrada].sum(axis=0)
+    saidas = valores[~entrada].sum(axis=0)
+
+    # Realizado: meses do horizonte com lançamentos e saldo anterior a ele
+    saldo_inicial = 0
+    realizados = []
+    for r in resumos:
+        if r.get("mes") not in MESES or not r.get("ano"):
+            continue
+        posicao = indice_mes(r["ano"], MESES.index(r["mes"]) + 1) - primeiro
+        if posicao < 0:
+            saldo_inicial += round(r.get("liquido") or 0)
+        elif posicao < meses:
+            entradas[posicao] += round(r.get("entradas") or 0)
+            saidas[posicao] += round(r.get("saidas") or 0)
+            realizados.extend(
+                (posicao, categoria, detalhe.get("saidas") or 0)
+                for categoria, detalhe in (r.get("categorias") or {}).items()
+            )
+
+    nomes = [
+        r.get("categoria") or "Sem categoria"
+        for r, e in zip(recorrentes, entrada)
+        if not e
+    ]
+    categorias = {
+        c: i
+        for i, c in enumerate(dict.fromkeys(nomes + [c for _, c, _ in realizados]))
+    }
+    codigos = np.array([categorias[c] for c in nomes], dtype=np.int64)
+    por_categoria = np.zeros((len(nomes), len(categorias)))
+    por_categoria[np.arange(len(nomes)), codigos] = 1.0
+    # Produto em float64 (BLAS), exato para centavos abaixo de 2**53
+    saidas_categoria = np.rint(valores[~entrada].T @ por_categoria).astype(np.int64)
+    if realizados:
+        posicoes, nomes_realizados, valores_realizados = zip(*realizados)
+        np.add.at(
+            saidas_categoria,
+            (list(posicoes), [categorias[c] for c in nomes_realizados]),
+            _centavos(valores_realizados),
+        )
+
+    liquido = entradas - saidas
+    return {
+        "periodos": [
+            {"ano": int(i // 12), "mes": MESES[int(i % 12)]} for i in indices
+        ],
+        "saldo_inicial": para_reais(saldo_inicial),
+        "entradas": _reais(entradas),
+        "saidas": _reais(saidas),
+        "liquido": _reais(liquido),
+        "saldo": _reais(saldo_inicial + np.cumsum(liquido)),
+        "categorias": {
+            categoria: _reais(saidas_categoria[:, i])
+            for categoria, i in categorias.items()
+        },
+    }
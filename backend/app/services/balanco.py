@@ -1,182 +1,927 @@
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import weakref
 from datetime import datetime
 from uuid import uuid4
-from database.database import DBConnection
+from database.database_async import AsyncDBConnection
+from database.indices import registrar_consulta, registrar_indices
+from pymongo import ASCENDING, TEXT, IndexModel, UpdateMany, UpdateOne
 import pandas as pd
-from typing import List
-from app.models.balanco import BalancoModel
+from typing import Awaitable, BinaryIO, Callable, Iterable, List, Optional
+from utils.settings import (
+    BALANCO_TAMANHO_LOTE,
+    SNAPSHOT_RETENCAO_DIAS,
+    UPLOAD_TAMANHO_LOTE,
+    USUARIO_CACHE_TAMANHO,
+)
+from utils.cache import CacheTTL
+from utils.dinheiro import CENTAVOS, para_reais
+from utils.texto import normalizar_busca, normalizar_busca_serie, trigramas
+from utils.executores import executar_em_processo, iterar_em_thread
+from app.models.balanco import MESES
+from app.services.analise import SERIES, calcular_analise
+from app.services.categorizacao import CATEGORIAS_PENDENTES, categorizar
+from app.services.importacao import (
+    identificar_formato,
+    ler_csv_em_lotes,
+    processar_dataframe,
+)
+from app.services.regra_categoria import RegraCategoriaService
+from app.services.snapshot import SnapshotService, snapshot_disponivel
+from app.services.validacao import validar_registros
+
+
+CAMPOS_TIPO = {"Entrada": "entradas", "Saída": "saidas"}
+CAMPOS_BALANCO = [
+    "id",
+    "fonte",
+    "valor",
+    "mes",
+    "ano",
+    "tipo",
+    "tag",
+    "categoria",
+    "observacao",
+    "data",
+    "criado_em",
+]
+CAMPOS_ORDENACAO = ["criado_em", "valor", "fonte", "ano"]
+# Campos que alteram os totais de balanco_resumo quando editados
+CAMPOS_RESUMO = ["valor", "mes", "ano", "tipo", "categoria", "tag"]
+# Campos internos de busca e deduplicação, omitidos nas respostas
+PROJECAO_PADRAO = {
+    "_id": 0,
+    "fonte_busca": 0,
+    "fonte_trigramas": 0,
+    "hash_conteudo": 0,
+}
+# Campos de balanco_resumo usados pela análise de séries
+PROJECAO_ANALISE = {
+    "_id": 0,
+    "ano": 1,
+    "mes": 1,
+    "categorias": 1,
+    **dict.fromkeys(SERIES, 1),
+}
+# Versão do formato de balanco_resumo; usuários marcados com outra versão (ou
+# sem marca) são reconstruídos na primeira leitura do resumo
+RESUMO_VERSAO = 1
+
+# Usuários cujo resumo já foi conferido neste processo
+resumos_verificados = CacheTTL(USUARIO_CACHE_TAMANHO, 3600)
+_travas_resumo: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+registrar_indices(
+    "balanco",
+    [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel(
+            [
+                ("usuario_id", ASCENDING),
+                ("ano", ASCENDING),
+                ("mes", ASCENDING),
+                ("tipo", ASCENDING),
+            ]
+        ),
+        IndexModel(
+            [("usuario_id", ASCENDING), ("criado_em", ASCENDING), ("id", ASCENDING)]
+        ),
+        IndexModel([("usuario_id", ASCENDING), ("atualizado_em", ASCENDING)]),
+        IndexModel([("usuario_id", ASCENDING), ("fonte_busca", ASCENDING)]),
+        IndexModel([("usuario_id", ASCENDING), ("fonte_trigramas", ASCENDING)]),
+        IndexModel(
+            [("usuario_id", ASCENDING), ("fonte", TEXT)],
+            default_language="portuguese",
+        ),
+    ],
+)
+registrar_indices(
+    "balanco",
+    [
+        IndexModel(
+            [("usuario_id", ASCENDING), ("hash_conteudo", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"hash_conteudo": {"$exists": True}},
+        ),
+        # Uma ocorrência por transação recorrente e mês
+        IndexModel(
+            [("recorrente_id", ASCENDING), ("ano", ASCENDING), ("mes", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"recorrente_id": {"$exists": True}},
+        ),
+    ],
+)
+registrar_indices(
+    "balanco_resumo",
+    [
+        IndexModel(
+            [("usuario_id", ASCENDING), ("ano", ASCENDING), ("mes", ASCENDING)],
+            unique=True,
+        )
+    ],
+)
+registrar_indices(
+    "balanco_resumo_controle",
+    [IndexModel([("usuario_id", ASCENDING)], unique=True)],
+)
+# Ids removidos, lidos pela atualização incremental dos snapshots colunares;
+# expiram junto com a validade de um snapshot
+registrar_indices(
+    "balanco_removidos",
+    [
+        IndexModel([("usuario_id", ASCENDING), ("removido_em", ASCENDING)]),
+        IndexModel(
+            [("removido_em", ASCENDING)],
+            expireAfterSeconds=SNAPSHOT_RETENCAO_DIAS * 24 * 3600,
+        ),
+    ],
+)
+registrar_consulta("balanco por id", "balanco", {"id": "x", "usuario_id": "x"})
+registrar_consulta(
+    "balanco por ano e mês",
+    "balanco",
+    {"usuario_id": "x", "ano": 2025, "mes": "Janeiro"},
+)
+registrar_consulta(
+    "listagem de balanço",
+    "balanco",
+    {"usuario_id": "x"},
+    [("criado_em", 1), ("id", 1)],
+)
+registrar_consulta(
+    "busca de fonte por prefixo",
+    "balanco",
+    {"usuario_id": "x", "fonte_busca": {"$regex": "^mercado"}},
+)
+registrar_consulta(
+    "busca de fonte por trecho",
+    "balanco",
+    {"usuario_id": "x", "fonte_trigramas": {"$all": ["erc", "mer"]}},
+)
+registrar_consulta(
+    "resumo materializado", "balanco_resumo", {"usuario_id": "x", "ano": 2025}
+)
+registrar_consulta(
+    "alterações desde o snapshot",
+    "balanco",
+    {"usuario_id": "x", "atualizado_em": {"$gte": "2025-01-01T00:00:00"}},
+)
+
+
+def codificar_cursor(doc: dict, ordenar_por: str) -> str:
+    posicao = json.dumps([doc.get(ordenar_por), doc.get("id")])
+    return base64.urlsafe_b64encode(posicao.encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> list:
+    try:
+        posicao = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(posicao, list) or len(posicao) != 2:
+        raise ValueError("Cursor inválido")
+    return posicao
+
+
+def campos_busca(fonte) -> dict:
+    fonte_busca = normalizar_busca(fonte)
+    return {"fonte_busca": fonte_busca, "fonte_trigramas": trigramas(fonte_busca)}
+
+
+def filtro_fonte(fonte: str, busca: str = "contem") -> dict:
+    # "prefixo" e "contem" usam o campo normalizado (índices em fonte_busca e
+    # fonte_trigramas); "texto" usa o índice de texto do Mongo
+    if busca == "texto":
+        return {"$text": {"$search": fonte}}
+    termo = normalizar_busca(fonte)
+    if busca == "prefixo":
+        return {"fonte_busca": {"$regex": "^" + re.escape(termo)}}
+    filtro = {"fonte_busca": {"$regex": re.escape(termo)}}
+    if len(termo) >= 3:
+        filtro["fonte_trigramas"] = {"$all": trigramas(termo)}
+    return filtro
+
+
+def calcular_hash_conteudo(docs: List[dict], usuario_id: str, contagem: dict):
+    # Impressão digital determinística do lançamento; o ordinal diferencia
+    # lançamentos idênticos dentro do mesmo arquivo (contagem é compartilhada
+    # entre os lotes de uma importação)
+    for d in docs:
+        base = "|".join(
+            [
+                str(usuario_id),
+                str(d.get("tag") or ""),
+                str(d.get("data") or ""),
+                str(d.get("mes") or ""),
+                str(d.get("ano") or ""),
+                str(d.get("fonte") or ""),
+                # Em reais, como antes dos centavos, para manter os hashes
+                f"{(d.get('valor') or 0) / CENTAVOS:.2f}",
+            ]
+        )
+        ordinal = contagem.get(base, 0)
+        contagem[base] = ordinal + 1
+        d["hash_conteudo"] = hashlib.sha256(f"{base}|{ordinal}".encode()).hexdigest()
+
+
+def totais_em_reais(totais: dict) -> dict:
+    # Resumo de um mês (e seus detalhes por categoria/tag) convertido para
+    # reais na saída da API
+    convertido = {c: para_reais(v) if c in SERIES else v for c, v in totais.items()}
+    for faceta in ["categorias", "tags"]:
+        if faceta in totais:
+            convertido[faceta] = {
+                chave: totais_em_reais(detalhe)
+                for chave, detalhe in totais[faceta].items()
+            }
+    return convertido
+
+
+def chave_detalhe(valor, campo: str) -> str:
+    # Chaves de subdocumento não podem conter "." nem começar com "$"
+    chave = str(valor) if valor not in (None, "") else f"Sem {campo}"
+    return chave.replace(".", "_").lstrip("$")
 
 
 class BalancoService:
-    def __init__(self):
-        self.db_connection = DBConnection()
+    def __init__(self, db_connection: AsyncDBConnection = None):
+        self.db_connection = db_connection or AsyncDBConnection()
 
-    def criar_balanco(self, data, usuario):
+    async def criar_balanco(self, data, usuario):
         data["id"] = str(uuid4())
         data["criado_em"] = datetime.now().isoformat()
+        data["atualizado_em"] = data["criado_em"]
         data["usuario_id"] = usuario.get("info", {}).get("id", "")
 
         if "ano" not in data or data["ano"] in [None, 0]:
             data["ano"] = datetime.now().year
+        data.update(campos_busca(data.get("fonte")))
 
-        self.db_connection.insert_one("balanco", data)
+        if await self.db_connection.insert_one("balanco", data):
+            await self.atualizar_resumo([data])
         return data
 
-    def editar_balanco(self, id, data, usuario):
-        return self.db_connection.update_one(
+    async def criar_balancos_em_lote(
+        self,
+        registros: List[dict],
+        usuario,
+        tamanho_lote: int = BALANCO_TAMANHO_LOTE,
+        deduplicar: bool = False,
+        contagem: dict = None,
+        validar: bool = False,
+        chave: Optional[List[str]] = None,
+    ) -> dict:
+        # Com deduplicar, cada registro recebe hash_conteudo e é gravado por
+        # upsert ($setOnInsert): reimportar um arquivo só insere linhas novas.
+        # Com chave, o upsert usa esses campos do registro no lugar do hash.
+        # Com validar, a lista é validada de uma vez contra BalancoRegistro e
+        # as falhas continuam indexadas pela posição na lista recebida
+        usuario_id = usuario.get("info", {}).get("id", "")
+        ano_atual = datetime.now().year
+        contagem = {} if contagem is None else contagem
+        inseridos = 0
+        ignorados = 0
+        falhas = []
+        posicoes = range(len(registros))
+        if validar:
+            registros, falhas = validar_registros(registros)
+            invalidos = {f["indice"] for f in falhas}
+            posicoes = [i for i in posicoes if i not in invalidos]
+
+        for inicio in range(0, len(registros), tamanho_lote):
+            lote = registros[inicio : inicio + tamanho_lote]
+            # Carimbo por sub-lote, no momento da escrita: um só para a lista
+            # inteira ficaria para trás da marca de um snapshot lido no meio
+            agora = datetime.now().isoformat()
+            for d in lote:
+                d["id"] = d.get("id") or str(uuid4())
+                d["criado_em"] = agora
+                d["atualizado_em"] = agora
+                d["usuario_id"] = usuario_id
+                if d.get("ano") in [None, 0]:
+                    d["ano"] = ano_atual
+                if "fonte_busca" not in d:
+                    d.update(campos_busca(d.get("fonte")))
+
+            if deduplicar or chave:
+                if not chave:
+                    calcular_hash_conteudo(lote, usuario_id, contagem)
+                campos = chave or ["usuario_id", "hash_conteudo"]
+                upsertados, erros = await self.db_connection.upsert_lote(
+                    "balanco",
+                    [
+                        UpdateOne(
+                            {campo: d.get(campo) for campo in campos},
+                            {"$setOnInsert": d},
+                            upsert=True,
+                        )
+                        for d in lote
+                    ],
+                )
+                gravados = [lote[i] for i in sorted(upsertados)]
+                ignorados += len(lote) - len(gravados) - len(erros)
+            else:
+                erros = await self.db_connection.inserir_lote("balanco", lote)
+                indices_com_erro = {e["indice"] for e in erros}
+                gravados = [d for i, d in enumerate(lote) if i not in indices_com_erro]
+            await self.atualizar_resumo(gravados)
+
+            inseridos += len(gravados)
+            falhas.extend(
+                {"indice": posicoes[inicio + e["indice"]], "erro": e["erro"]}
+                for e in erros
+            )
+
+        falhas.sort(key=lambda f: f["indice"])
+        return {"inseridos": inseridos, "ignorados": ignorados, "falhas": falhas}
+
+    async def editar_balanco(self, id, data, usuario):
+        if "fonte" in data:
+            data.update(campos_busca(data["fonte"]))
+        data["atualizado_em"] = datetime.now().isoformat()
+        anterior = await self.db_connection.find_one_and_update(
             "balanco",
             {"id": id, "usuario_id": usuario.get("info", {}).get("id")},
             {"$set": data},
         )
+        if not anterior:
+            return None
+        await self.atualizar_resumo([anterior], -1)
+        await self.atualizar_resumo([{**anterior, **data}])
+        return True
 
-    def normalizar_categoria(self, c: str) -> str:
-        return c.capitalize() if isinstance(c, str) else ""
-
-    def extrair_nome_nubank(self, desc: str) -> str:
-        if not isinstance(desc, str):
-            return ""
-        partes = desc.split("-")
-        for p in partes:
-            if any(nome in p.lower() for nome in ["daniel", "luan", "petruitis"]):
-                return p.strip()
-        if len(partes) > 1:
-            return partes[1].strip()
-        else:
-            return partes[0].strip()
-
-    def tratar_title_fatura_nubank(self, title: str) -> tuple:
-        if not isinstance(title, str):
-            return "", ""
-        partes = title.split("-")
-        fonte = (
-            partes[0]
-            .replace("*3", " ")
-            .replace("Ebn*", "")
-            .replace("Hotmart*", "")
-            .replace("Htm*", "")
-            .replace("Unicef*", "")
-            .replace('"', "")
-            .replace("*", " ")
-            .strip()
-            if partes
-            else title
-        )
-        observacao = "-".join(partes[1:]).strip() if len(partes) > 1 else ""
-        return fonte, observacao
+    async def deletar_balanco(self, id, usuario):
+        removido = await self.db_connection.find_one_and_delete(
+            "balanco", {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
+        )
+        if not removido:
+            return None
+        await self.atualizar_resumo([removido], -1)
+        await self.registrar_remocoes(removido["usuario_id"], [id])
+        return True
 
-    def processar_balanco_upload(
-        self, df: pd.DataFrame, tipo_arquivo: str, mes: str, ano: int
-    ) -> List[BalancoModel]:
-        registros = []
-
-        for _, row in df.iterrows():
-            try:
-                if tipo_arquivo == "extrato_inter":
-                    if row.get("Histórico") == "Crédito Evento B3":
-                        continue
-                    desc = " ".join(str(row.get("Descrição", "")).split())
-
-                    if desc in [
-                        "Fatura cartão Inter",
-                        "Petruitis",
-                        "Luan Rodrigues Petruitis",
-                    ]:
-                        continue
-
-                    valor_str = (
-                        str(row.get("Valor", "0"))
-                        .replace(".", "")
-                        .replace(",", ".")
-                        .replace("R$", "")
-                        .strip()
-                    )
-                    valor = float(valor_str) if valor_str else 0.0
-                    tipo = "Saída" if valor < 0 else "Entrada"
-
-                    registros.append(
-                        BalancoModel(
-                            id=str(uuid4()),
-                            fonte=str(row.get("Descrição", "")).strip(),
-                            valor=abs(valor),
-                            tipo=tipo,
-                            mes=mes,
-                            ano=ano,
-                            tag="Inter PF",
-                        )
-                    )
-
-                elif tipo_arquivo == "fatura_inter":
-                    valor_str = (
-                        str(row.get("Valor", "0"))
-                        .replace("R$", "")
-                        .replace("\xa0", "")
-                        .replace(".", "")
-                        .replace(",", ".")
-                        .strip()
-                    )
-                    valor = float(valor_str) if valor_str else 0.0
-
-                    registros.append(
-                        BalancoModel(
-                            id=str(uuid4()),
-                            fonte=" ".join(row.get("Lançamento", "").split()),
-                            valor=abs(valor),
-                            tipo="Saída",
-                            mes=mes,
-                            ano=ano,
-                            tag="Inter Cartão",
-                            categoria=self.normalizar_categoria(
-                                row.get("Categoria", "")
-                            ),
-                            observacao=str(row.get("Tipo", "")).strip(),
-                        )
-                    )
-
-                elif tipo_arquivo == "extrato_nubank":
-                    if "pagamento de fatura" in str(row.get("Descrição", "")).lower():
-                        continue
-                    if (
-                        "luan rodrigues petruitis"
-                        in str(row.get("Descrição", "")).lower()
-                    ):
-                        continue
-
-                    valor = float(row.get("Valor", 0))
-                    tipo = "Saída" if valor < 0 else "Entrada"
-
-                    registros.append(
-                        BalancoModel(
-                            id=str(uuid4()),
-                            fonte=self.extrair_nome_nubank(row.get("Descrição", "")),
-                            valor=abs(valor),
-                            tipo=tipo,
-                            mes=mes,
-                            ano=ano,
-                            tag="Nubank PF",
-                        )
-                    )
-
-                elif tipo_arquivo == "fatura_nubank":
-                    valor = float(row.get("amount", 0))
-                    if valor < 0:
-                        continue
-                    fonte, observacao = self.tratar_title_fatura_nubank(
-                        row.get("title", "")
-                    )
-                    registros.append(
-                        BalancoModel(
-                            id=str(uuid4()),
-                            fonte=fonte,
-                            valor=abs(valor),
-                            tipo="Saída",
-                            mes=mes,
-                            ano=ano,
-                            tag="Nubank Cartão",
-                            observacao=observacao,
-                        )
-                    )
+    async def editar_balancos_em_lote(self, filtros: dict, data: dict) -> dict:
+        if "fonte" in data:
+            data.update(campos_busca(data["fonte"]))
+        data["atualizado_em"] = datetime.now().isoformat()
+        grupos = []
+        if set(data) & set(CAMPOS_RESUMO):
+            grupos = await self.agrupar_para_resumo(filtros)
+            if grupos is None:
+                return None
+
+        resultado = await self.db_connection.atualizar_lote(
+            "balanco", filtros, {"$set": data}
+        )
+        if resultado is None or not grupos:
+            return resultado
+
+        # Os grupos antigos saem do resumo e entram de novo com os campos
+        # editados; um valor fixo vale para cada documento do grupo
+        novos = []
+        for g in grupos:
+            novo = {**g, **data}
+            if "valor" in data:
+                novo["valor"] = data["valor"] * g["quantidade"]
+            novos.append(novo)
+        await self.atualizar_resumo(grupos, -1)
+        await self.atualizar_resumo(novos)
+        return resultado
+
+    async def deletar_balancos_em_lote(self, filtros: dict) -> int:
+        grupos = await self.agrupar_para_resumo(filtros)
+        if grupos is None:
+            return None
+        # Os ids removidos ficam registrados para os snapshots colunares; a
+        # remoção se limita a eles para não apagar algo sem registro
+        ids = [
+            d["id"]
+            async for d in self.db_connection.iterar(
+                "balanco", filtros, {"_id": 0, "id": 1}
+            )
+        ]
+        removidos = await self.db_connection.remover_lote(
+            "balanco", {"$and": [filtros, {"id": {"$in": ids}}]}
+        )
+        if removidos:
+            await self.atualizar_resumo(grupos, -1)
+            await self.registrar_remocoes(filtros["usuario_id"], ids)
+        return removidos
+
+    async def registrar_remocoes(self, usuario_id: str, ids: List[str]) -> None:
+        agora = datetime.now()
+        await self.db_connection.insert_many(
+            "balanco_removidos",
+            [{"usuario_id": usuario_id, "id": id, "removido_em": agora} for id in ids],
+        )
+
+    async def agrupar_para_resumo(self, filtros: dict) -> List[dict]:
+        # Soma dos documentos filtrados por grupo do resumo, no mesmo formato
+        # de documento aceito por atualizar_resumo
+        grupos = await self.db_connection.aggregate(
+            "balanco",
+            [
+                {"$match": filtros},
+                {
+                    "$group": {
+                        "_id": {
+                            "usuario_id": "$usuario_id",
+                            "ano": "$ano",
+                            "mes": "$mes",
+                            "tipo": "$tipo",
+                            "categoria": "$categoria",
+                            "tag": "$tag",
+                        },
+                        "valor": {"$sum": "$valor"},
+                        "quantidade": {"$sum": 1},
+                    }
+                },
+            ],
+        )
+        if grupos is None:
+            return None
+        return [
+            {**g["_id"], "valor": g["valor"], "quantidade": g["quantidade"]}
+            for g in grupos
+        ]
 
-            except Exception as err:
-                print(err)
+    async def atualizar_resumo(self, docs: List[dict], sinal: int = 1):
+        # Aplica em balanco_resumo os deltas ($inc) de documentos inseridos
+        # (sinal 1) ou removidos (sinal -1), agrupados por usuário/ano/mês
+        deltas = {}
+        for d in docs:
+            campo = CAMPOS_TIPO.get(d.get("tipo"))
+            if not campo or d.get("mes") not in MESES:
                 continue
+            valor = (d.get("valor") or 0) * sinal
+            chave = (d.get("usuario_id"), d.get("ano"), d.get("mes"))
+            inc = deltas.setdefault(chave, {})
+            for destino in [
+                campo,
+                f"categorias.{chave_detalhe(d.get('categoria'), 'categoria')}.{campo}",
+                f"tags.{chave_detalhe(d.get('tag'), 'tag')}.{campo}",
+            ]:
+                inc[destino] = inc.get(destino, 0) + valor
+            inc["liquido"] = inc.get("liquido", 0) + (
+                valor if campo == "entradas" else -valor
+            )
+
+        operacoes = [
+            UpdateOne(
+                {"usuario_id": usuario_id, "ano": ano, "mes": mes},
+                {"$inc": inc},
+                upsert=True,
+            )
+            for (usuario_id, ano, mes), inc in deltas.items()
+        ]
+        return await self.db_connection.bulk_write("balanco_resumo", operacoes)
+
+    async def reconstruir_resumo(self, usuario_id: str = None) -> int:
+        filtro = {"usuario_id": usuario_id} if usuario_id else {}
+        docs = await self.agregar_resumos(filtro)
+
+        await self.db_connection.delete_many("balanco_resumo", filtro)
+        if docs and not await self.db_connection.insert_many(
+            "balanco_resumo", docs
+        ):
+            raise RuntimeError("Falha ao gravar a coleção balanco_resumo")
+
+        usuarios = {d["usuario_id"] for d in docs}
+        if usuario_id:
+            usuarios.add(usuario_id)
+        agora = datetime.now().isoformat()
+        await self.db_connection.bulk_write(
+            "balanco_resumo_controle",
+            [
+                UpdateOne(
+                    {"usuario_id": u},
+                    {"$set": {"versao": RESUMO_VERSAO, "reconstruido_em": agora}},
+                    upsert=True,
+                )
+                for u in usuarios
+            ],
+        )
+        for u in usuarios:
+            resumos_verificados.definir(u, True)
+        return len(docs)
+
+    async def garantir_resumo(self, usuario_id: str) -> None:
+        # balanco_resumo só acompanha, via $inc, as escritas feitas depois que
+        # ele passou a existir; usuários sem a marca da versão atual (dados
+        # anteriores ao resumo ou a uma mudança de formato) são reconstruídos
+        # uma vez, antes da leitura
+        if resumos_verificados.obter(usuario_id):
+            return
+        trava = _travas_resumo.get(usuario_id)
+        if trava is None:
+            trava = _travas_resumo.setdefault(usuario_id, asyncio.Lock())
+        async with trava:
+            if resumos_verificados.obter(usuario_id):
+                return
+            controle = await self.db_connection.find_one(
+                "balanco_resumo_controle",
+                {"usuario_id": usuario_id, "versao": RESUMO_VERSAO},
+            )
+            if controle is None:
+                await self.reconstruir_resumo(usuario_id)
+            resumos_verificados.definir(usuario_id, True)
+
+    async def agregar_resumos(self, filtro: dict) -> List[dict]:
+        # Documentos de balanco_resumo calculados direto de balanco
+        grupos = await self.db_connection.aggregate(
+            "balanco",
+            [
+                {"$match": filtro},
+                {
+                    "$group": {
+                        "_id": {
+                            "usuario_id": "$usuario_id",
+                            "ano": "$ano",
+                            "mes": "$mes",
+                            "tipo": "$tipo",
+                            "categoria": "$categoria",
+                            "tag": "$tag",
+                        },
+                        "valor": {"$sum": "$valor"},
+                    }
+                },
+            ],
+        )
+        if grupos is None:
+            raise RuntimeError("Falha ao agregar a coleção balanco")
+
+        resumos = {}
+        for g in grupos:
+            chave = g["_id"]
+            campo = CAMPOS_TIPO.get(chave.get("tipo"))
+            if not campo or chave.get("mes") not in MESES:
+                continue
+            resumo = resumos.setdefault(
+                (chave.get("usuario_id"), chave.get("ano"), chave.get("mes")),
+                {"entradas": 0, "saidas": 0, "categorias": {}, "tags": {}},
+            )
+            resumo[campo] += g["valor"]
+            for faceta, campo_detalhe in [("categorias", "categoria"), ("tags", "tag")]:
+                detalhe = resumo[faceta].setdefault(
+                    chave_detalhe(chave.get(campo_detalhe), campo_detalhe),
+                    {"entradas": 0, "saidas": 0},
+                )
+                detalhe[campo] += g["valor"]
+
+        docs = []
+        for (uid, ano, mes), resumo in resumos.items():
+            resumo["liquido"] = resumo["entradas"] - resumo["saidas"]
+            docs.append({"usuario_id": uid, "ano": ano, "mes": mes, **resumo})
+        return docs
+
+    def montar_filtros(
+        self,
+        usuario,
+        mes: str = None,
+        ano: int = None,
+        tipo: str = None,
+        categoria: str = None,
+        fonte: str = None,
+        tag: str = None,
+        busca: str = "contem",
+    ) -> dict:
+        filtros = {"usuario_id": usuario.get("info", {}).get("id")}
+
+        if mes:
+            filtros["mes"] = mes
+        if ano:
+            filtros["ano"] = ano
+        if tipo:
+            filtros["tipo"] = tipo
+        if categoria:
+            filtros["categoria"] = categoria
+        if tag:
+            filtros["tag"] = tag
+        if fonte:
+            filtros.update(filtro_fonte(fonte, busca))
+
+        return filtros
+
+    def filtros_lote(self, usuario, ids: Optional[List[str]] = None, **filtros) -> dict:
+        # Edição/remoção em lote: por ids, por filtros ou pelos dois juntos
+        consulta = self.montar_filtros(usuario, **filtros)
+        if ids:
+            consulta["id"] = {"$in": ids}
+        return consulta
+
+    def listar_balanco(
+        self,
+        filtros: dict,
+        campos: Optional[List[str]] = None,
+        ordenar_por: str = "criado_em",
+        ordem: str = "asc",
+        limite: int = None,
+        cursor: str = None,
+    ) -> Iterable[dict]:
+        # Paginação por keyset: o cursor guarda (valor do campo de ordenação,
+        # id) do último documento da página anterior
+        direcao = 1 if ordem == "asc" else -1
+        if cursor:
+            valor, id = decodificar_cursor(cursor)
+            operador = "$gt" if direcao == 1 else "$lt"
+            filtros = {
+                "$and": [
+                    filtros,
+                    {
+                        "$or": [
+                            {ordenar_por: {operador: valor}},
+                            {ordenar_por: valor, "id": {operador: id}},
+                        ]
+                    },
+                ]
+            }
+
+        projecao = dict(PROJECAO_PADRAO)
+        if campos:
+            projecao = {"_id": 0}
+            for campo in set(campos) | {"id", ordenar_por}:
+                projecao[campo] = 1
+
+        return self.db_connection.iterar(
+            "balanco",
+            filtros,
+            projecao,
+            sort=[(ordenar_por, direcao), ("id", direcao)],
+            limit=limite,
+        )
+
+    async def buscar_balanco(self, id, usuario):
+        return await self.db_connection.find_one(
+            "balanco",
+            {"id": id, "usuario_id": usuario.get("info", {}).get("id")},
+            PROJECAO_PADRAO,
+        )
+
+    async def resumo_mensal(
+        self, usuario, ano: int, por_categoria: bool = False, por_tag: bool = False
+    ) -> dict:
+        projecao = {"_id": 0, "mes": 1, "entradas": 1, "saidas": 1, "liquido": 1}
+        if por_categoria:
+            projecao["categorias"] = 1
+        if por_tag:
+            projecao["tags"] = 1
+        usuario_id = usuario.get("info", {}).get("id")
+        await self.garantir_resumo(usuario_id)
+        materializados = await self.db_connection.find(
+            "balanco_resumo", {"usuario_id": usuario_id, "ano": ano}, projecao
+        )
+
+        resumo = {mes: {"entradas": 0, "saidas": 0, "liquido": 0} for mes in MESES}
+        for mes in MESES:
+            if por_categoria:
+                resumo[mes]["categorias"] = {}
+            if por_tag:
+                resumo[mes]["tags"] = {}
+        for r in materializados:
+            if r.get("mes") in resumo:
+                resumo[r.pop("mes")].update(r)
+        return {mes: totais_em_reais(t) for mes, t in resumo.items()}
+
+    async def resumo_agregado(
+        self, usuario, ano: int, por_categoria: bool = False, por_tag: bool = False
+    ) -> dict:
+        def agrupar(*campos):
+            chave = {"mes": "$mes", "tipo": "$tipo"}
+            for campo in campos:
+                chave[campo] = f"${campo}"
+            return [{"$group": {"_id": chave, "valor": {"$sum": "$valor"}}}]
+
+        facetas = {"totais": agrupar()}
+        if por_categoria:
+            facetas["categorias"] = agrupar("categoria")
+        if por_tag:
+            facetas["tags"] = agrupar("tag")
+
+        pipeline = [
+            {"$match": {"usuario_id": usuario.get("info", {}).get("id"), "ano": ano}},
+            {"$facet": facetas},
+        ]
+        resultado = await self.db_connection.aggregate("balanco", pipeline) or [{}]
+        grupos = resultado[0] if resultado else {}
+
+        resumo = {mes: {"entradas": 0, "saidas": 0, "liquido": 0} for mes in MESES}
+        for g in grupos.get("totais", []):
+            mes, campo = g["_id"].get("mes"), CAMPOS_TIPO.get(g["_id"].get("tipo"))
+            if mes in resumo and campo:
+                resumo[mes][campo] += g["valor"]
+
+        for faceta, campo_detalhe in [("categorias", "categoria"), ("tags", "tag")]:
+            if faceta not in facetas:
+                continue
+            for mes in MESES:
+                resumo[mes][faceta] = {}
+            for g in grupos.get(faceta, []):
+                mes, campo = g["_id"].get("mes"), CAMPOS_TIPO.get(g["_id"].get("tipo"))
+                if mes not in resumo or not campo:
+                    continue
+                chave = chave_detalhe(g["_id"].get(campo_detalhe), campo_detalhe)
+                detalhe = resumo[mes][faceta].setdefault(
+                    chave, {"entradas": 0, "saidas": 0}
+                )
+                detalhe[campo] += g["valor"]
+
+        for mes in MESES:
+            resumo[mes]["liquido"] = resumo[mes]["entradas"] - resumo[mes]["saidas"]
+
+        return resumo
+
+    async def analise(self, usuario, ano_inicio: int = None, ano_fim: int = None):
+        # Uma única leitura de balanco_resumo (um documento por mês); séries,
+        # médias móveis e variações são calculadas em NumPy sobre esse array
+        filtro = {"usuario_id": usuario.get("info", {}).get("id")}
+        await self.garantir_resumo(filtro["usuario_id"])
+        if ano_inicio or ano_fim:
+            filtro["ano"] = {}
+            if ano_inicio:
+                filtro["ano"]["$gte"] = ano_inicio
+            if ano_fim:
+                filtro["ano"]["$lte"] = ano_fim
+        resumos = await self.db_connection.find(
+            "balanco_resumo",
+            filtro,
+            PROJECAO_ANALISE,
+        )
+        return calcular_analise(resumos)
+
+    async def relatorio(
+        self,
+        usuario,
+        campos: List[str],
+        filtros: dict,
+        origem: str = "snapshot",
+    ) -> List[dict]:
+        # Soma e contagem de valor agrupadas por `campos`. Com o snapshot
+        # colunar disponível o agrupamento roda em Arrow sobre o arquivo
+        # mapeado; senão, num $group no Mongo
+        usuario_id = usuario.get("info", {}).get("id")
+        if origem == "snapshot" and snapshot_disponivel():
+            return await SnapshotService(self.db_connection).agrupar(
+                usuario_id, campos, filtros
+            )
+
+        grupos = await self.db_connection.aggregate(
+            "balanco",
+            [
+                {"$match": {"usuario_id": usuario_id, **filtros}},
+                {
+                    "$group": {
+                        "_id": {campo: f"${campo}" for campo in campos},
+                        "total": {"$sum": "$valor"},
+                        "quantidade": {"$sum": 1},
+                    }
+                },
+                {"$sort": {"total": -1}},
+            ],
+        )
+        if grupos is None:
+            return None
+        return [
+            {
+                **{campo: g["_id"].get(campo) for campo in campos},
+                "total": para_reais(g["total"]),
+                "quantidade": g["quantidade"],
+            }
+            for g in grupos
+        ]
+
+    def processar_balanco_upload(
+        self,
+        df: pd.DataFrame,
+        tipo_arquivo: str,
+        mes: str,
+        ano: int,
+        regras: Optional[List[dict]] = None,
+    ) -> tuple:
+        return processar_dataframe(df, tipo_arquivo, mes, ano, regras)
+
+    async def importar_csv_em_lotes(
+        self,
+        arquivo: BinaryIO,
+        tipo_arquivo: Optional[str],
+        mes: str,
+        ano: int,
+        usuario: dict,
+        tamanho_lote: int = UPLOAD_TAMANHO_LOTE,
+        progresso: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> dict:
+        # A leitura roda no pool de threads e o processamento dos lotes no pool
+        # de processos, liberando o event loop durante a importação; progresso
+        # recebe as contagens de cada lote assim que ele é gravado. Falhas de
+        # validação e de gravação são reportadas pela linha de dados do arquivo
+        inseridos = 0
+        ignorados = 0
+        falhas = []
+        contagem = {}
+        regras = await RegraCategoriaService(self.db_connection).regras_compiladas(
+            usuario
+        )
+
+        # Sem tipo_arquivo o formato é reconhecido pelo cabeçalho do arquivo
+        formato = identificar_formato(arquivo, tipo_arquivo)
+        lotes = ler_csv_em_lotes(arquivo, formato, tamanho_lote)
+        async for lote in iterar_em_thread(lotes):
+            docs, linhas, invalidos = await executar_em_processo(
+                processar_dataframe, lote, formato.nome, mes, ano, regras
+            )
+            resultado = {"inseridos": 0, "ignorados": 0, "falhas": []}
+            if docs:
+                resultado = await self.criar_balancos_em_lote(
+                    docs,
+                    usuario,
+                    deduplicar=True,
+                    contagem=contagem,
+                )
+            falhas_lote = invalidos + [
+                {"linha": linhas[f["indice"]], "erro": f["erro"]}
+                for f in resultado["falhas"]
+            ]
+            falhas_lote.sort(key=lambda f: f["linha"])
+            inseridos += resultado["inseridos"]
+            ignorados += resultado["ignorados"]
+            falhas.extend(falhas_lote)
+            if progresso:
+                await progresso(
+                    {
+                        "linhas_lidas": len(lote),
+                        "inseridos": resultado["inseridos"],
+                        "ignorados": resultado["ignorados"],
+                        "falhas": falhas_lote,
+                    }
+                )
+
+        return {
+            "tipo_arquivo": formato.nome,
+            "inseridos": inseridos,
+            "ignorados": ignorados,
+            "falhas": falhas,
+        }
+
+    async def recategorizar(
+        self,
+        usuario: dict,
+        regras: List[dict],
+        somente_pendentes: bool = True,
+        tamanho_lote: int = BALANCO_TAMANHO_LOTE,
+    ) -> dict:
+        # Reaplica as regras aos lançamentos já gravados, em lotes, e grava
+        # um update_many por categoria nova; o resumo é recalculado no fim
+        usuario_id = usuario.get("info", {}).get("id")
+        filtros = {"usuario_id": usuario_id}
+        if somente_pendentes:
+            filtros["categoria"] = {"$in": CATEGORIAS_PENDENTES + [None]}
+        projecao = {"_id": 0, "id": 1, "fonte": 1, "valor": 1, "tag": 1, "categoria": 1}
+
+        analisados = 0
+        alterados = 0
+        lote = []
+        cursor = self.db_connection.iterar(
+            "balanco", filtros, projecao, batch_size=tamanho_lote
+        )
+        async for doc in cursor:
+            lote.append(doc)
+            if len(lote) == tamanho_lote:
+                alterados += await self._recategorizar_lote(
+                    lote, regras, somente_pendentes
+                )
+                analisados += len(lote)
+                lote = []
+        if lote:
+            alterados += await self._recategorizar_lote(lote, regras, somente_pendentes)
+            analisados += len(lote)
+
+        if alterados:
+            await self.reconstruir_resumo(usuario_id)
+        return {"analisados": analisados, "alterados": alterados}
+
+    async def _recategorizar_lote(
+        self, lote: List[dict], regras: List[dict], somente_pendentes: bool
+    ) -> int:
+        df = pd.DataFrame(lote)
+        for coluna in ["fonte", "tag", "categoria"]:
+            if coluna not in df.columns:
+                df[coluna] = None
+        df["fonte_busca"] = normalizar_busca_serie(df["fonte"])
+        novas = await executar_em_processo(categorizar, df, regras, somente_pendentes)
 
-        return registros
+        alteradas = novas.ne(df["categoria"]) & novas.notna()
+        agora = datetime.now().isoformat()
+        ids_por_categoria = df.loc[alteradas, "id"].groupby(novas[alteradas]).agg(list)
+        operacoes = [
+            UpdateMany(
+                {"id": {"$in": ids}},
+                {"$set": {"categoria": categoria, "atualizado_em": agora}},
+            )
+            for categoria, ids in ids_por_categoria.items()
+        ]
+        await self.db_connection.bulk_write("balanco", operacoes)
+        return int(alteradas.sum())
@@ -0,0 +1,172 @@
+import re
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from utils.settings import REGRA_REGEX_TAMANHO_MAXIMO
+from utils.texto import normalizar_busca, normalizar_busca_serie
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Categorias consideradas "não categorizadas", as únicas alteradas pelas regras
+CATEGORIAS_PENDENTES = ["", "Outros"]
+
+
+def compilar_padrao(modo: str, fonte: Optional[str]) -> Optional[re.Pattern]:
+    # "contem" e "prefixo" casam com a fonte normalizada (fonte_busca);
+    # "regex" casa com a fonte original, sem diferenciar maiúsculas
+    if not fonte:
+        return None
+    if modo == "regex":
+        return re.compile(fonte, re.IGNORECASE)
+    termo = re.escape(normalizar_busca(fonte))
+    return re.compile("^" + termo if modo == "prefixo" else termo)
+
+
+def _subpadroes(valor):
+    if isinstance(valor, sre_parse.SubPattern):
+        yield valor
+    elif isinstance(valor, (tuple, list)):
+        for item in valor:
+            yield from _subpadroes(item)
+
+
+def _repeticao_aninhada(padrao, dentro: bool = False) -> bool:
+    # Quantificador ilimitado dentro de outro, como (a+)+ ou (\w*)*: o
+    # backtracking cresce exponencialmente em textos que quase casam
+    for op, argumentos in padrao:
+        ilimitada = (
+            op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+            and argumentos[1] == sre_parse.MAXREPEAT
+        )
+        if ilimitada and dentro:
+            return True
+        if any(
+            _repeticao_aninhada(sub, dentro or ilimitada)
+            for sub in _subpadroes(argumentos)
+        ):
+            return True
+    return False
+
+
+def validar_regex(fonte: str) -> None:
+    # As regex dos usuários rodam em toda importação sem limite de tempo;
+    # barra as grandes demais e as de backtracking catastrófico
+    if len(fonte) > REGRA_REGEX_TAMANHO_MAXIMO:
+        raise ValueError(f"Regex maior que {REGRA_REGEX_TAMANHO_MAXIMO} caracteres")
+    try:
+        arvore = sre_parse.parse(fonte, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Regex inválida: {e}")
+    if _repeticao_aninhada(arvore):
+        raise ValueError("Regex com quantificadores aninhados")
+
+
+def compilar_regras(regras: List[dict]) -> List[dict]:
+    # Ordena por prioridade (maior primeiro) e compila os padrões uma vez por
+    # importação; o resultado é enviado ao pool de processos a cada lote
+    ordenadas = sorted(
+        regras, key=lambda r: (-(r.get("prioridade") or 0), r.get("criado_em") or "")
+    )
+    return [
+        {
+            "categoria": r["categoria"],
+            "campo": "fonte" if r.get("modo") == "regex" else "fonte_busca",
+            "padrao": compilar_padrao(r.get("modo", "contem"), r.get("fonte")),
+            "valor_min": r.get("valor_min"),
+            "valor_max": r.get("valor_max"),
+            "tag": r.get("tag"),
+        }
+        for r in ordenadas
+    ]
+
+
+def _casamentos(serie: pd.Series, padroes: List[re.Pattern]) -> List[np.ndarray]:
+    # Avalia os padrões uma vez por valor distinto da coluna; uma regex
+    # combinada descarta primeiro os valores que não casam com nenhuma regra.
+    # Só padrões sem grupos entram nela: juntá-los renumeraria os grupos,
+    # quebrando referências como \1 e nomes repetidos entre regras
+    codigos, unicos = pd.factorize(serie.fillna("").astype(str))
+    todos = candidatos = np.arange(len(unicos))
+    simples = [p for p in padroes if not p.groups]
+    if len(simples) > 1:
+        try:
+            combinado = re.compile(
+                "|".join(f"(?:{p.pattern})" for p in simples),
+                re.IGNORECASE if any(p.flags & re.IGNORECASE for p in simples) else 0,
+            )
+            candidatos = np.flatnonzero([bool(combinado.search(u)) for u in unicos])
+        except re.error:
+            # Flags embutidas (ex.: "(?i)") não podem ser combinadas
+            pass
+
+    resultado = []
+    for padrao in padroes:
+        indices = todos if padrao.groups else candidatos
+        casou = np.zeros(len(unicos), dtype=bool)
+        casou[indices] = [bool(padrao.search(unicos[i])) for i in indices]
+        resultado.append(casou[codigos])
+    return resultado
+
+
+def categorizar(
+    df: pd.DataFrame, regras: List[dict], somente_pendentes: bool = True
+) -> pd.Series:
+    # Aplica as regras compiladas, em ordem de prioridade, às linhas sem
+    # categoria (ou a todas); a primeira regra que casa define a categoria
+    categoria = (
+        df["categoria"]
+        if "categoria" in df.columns
+        else pd.Series("", index=df.index, dtype=object)
+    )
+    pendentes = categoria.isna() | categoria.isin(CATEGORIAS_PENDENTES)
+    livres = pendentes.to_numpy(copy=True)
+    if not somente_pendentes:
+        livres[:] = True
+    if not regras or not livres.any():
+        return categoria
+
+    casamentos = {}
+    for campo in ["fonte", "fonte_busca"]:
+        padroes = [r["padrao"] for r in regras if r["campo"] == campo and r["padrao"]]
+        if padroes and campo in df.columns:
+            casamentos[campo] = iter(_casamentos(df[campo], padroes))
+
+    valor = pd.to_numeric(df["valor"], errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    tag = df["tag"].to_numpy() if "tag" in df.columns else None
+    novas = categoria.to_numpy(dtype=object, copy=True)
+    for regra in regras:
+        mascara = livres.copy()
+        if regra["padrao"] is not None:
+            if regra["campo"] not in casamentos:
+                continue
+            mascara &= next(casamentos[regra["campo"]])
+        if regra["valor_min"] is not None:
+            mascara &= valor >= regra["valor_min"]
+        if regra["valor_max"] is not None:
+            mascara &= valor <= regra["valor_max"]
+        if regra["tag"]:
+            if tag is None:
+                continue
+            mascara &= tag == regra["tag"]
+        novas[mascara] = regra["categoria"]
+        livres &= ~mascara
+        if not livres.any():
+            break
+    return pd.Series(novas, index=df.index, dtype=object)
+
+
+def categorizar_registros(registros: List[dict], regras: List[dict]) -> List[dict]:
+    # Versão para listas de dicts (ex.: importação do Notion)
+    if not registros or not regras:
+        return registros
+    df = pd.DataFrame(registros)
+    df["fonte_busca"] = normalizar_busca_serie(df["fonte"])
+    for registro, categoria in zip(registros, categorizar(df, regras)):
+        if categoria:
+            registro["categoria"] = categoria
+    return registros
@@ -0,0 +1,160 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from utils.executores import executar_em_thread
+from utils.settings import EXPORTACAO_TAMANHO_LOTE
+
+# Dependências opcionais: sem elas o formato correspondente fica indisponível
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+FORMATOS_EXPORTACAO = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEPENDENCIAS_EXPORTACAO = {"xlsx": ("openpyxl", Workbook), "parquet": ("pyarrow", pa)}
+TIPOS_PARQUET = {"valor": "float64", "ano": "int64"}
+TAMANHO_BLOCO_ARQUIVO = 1024 * 1024
+
+
+def verificar_formato(formato: str) -> Optional[str]:
+    # Mensagem de erro quando a biblioteca do formato não está instalada
+    if formato in DEPENDENCIAS_EXPORTACAO:
+        pacote, modulo = DEPENDENCIAS_EXPORTACAO[formato]
+        if modulo is None:
+            return f"Exportação em {formato} requer o pacote {pacote}"
+    return None
+
+
+async def em_lotes(
+    registros, tamanho_lote: int = EXPORTACAO_TAMANHO_LOTE
+) -> AsyncIterator[List[dict]]:
+    lote = []
+    async for r in registros:
+        lote.append(r)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _celula(valor):
+    if valor is None or isinstance(valor, (str, int, float)):
+        return valor
+    return str(valor)
+
+
+def _linhas_csv(lote: List[dict], colunas: List[str]) -> bytes:
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerows([[r.get(c) for c in colunas] for r in lote])
+    return saida.getvalue().encode("utf-8")
+
+
+async def exportar_csv(registros, colunas: List[str]) -> AsyncIterator[bytes]:
+    # BOM para o Excel reconhecer UTF-8; cada lote do cursor vira um bloco
+    yield ("\ufeff" + ",".join(colunas) + "\r\n").encode("utf-8")
+    async for lote in em_lotes(registros):
+        yield await executar_em_thread(_linhas_csv, lote, colunas)
+
+
+class SaidaEmBlocos(io.RawIOBase):
+    # Destino do ParquetWriter que guarda só o que foi escrito desde o último
+    # esvaziar(), mantendo a posição absoluta que o writer consulta via tell()
+    def __init__(self):
+        self.blocos: List[bytes] = []
+        self.posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self.blocos.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self.posicao
+
+    def esvaziar(self) -> bytes:
+        dados = b"".join(self.blocos)
+        self.blocos = []
+        return dados
+
+
+def esquema_parquet(colunas: List[str]):
+    return pa.schema([(c, TIPOS_PARQUET.get(c, "string")) for c in colunas])
+
+
+def lote_arrow(lote: List[dict], esquema):
+    # Uma coluna por vez; valores fora do tipo das colunas de texto viram str
+    colunas = []
+    for campo in esquema:
+        valores = [r.get(campo.name) for r in lote]
+        if pa.types.is_string(campo.type):
+            valores = [None if v is None else str(v) for v in valores]
+        colunas.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(colunas, schema=esquema)
+
+
+async def exportar_parquet(registros, colunas: List[str]) -> AsyncIterator[bytes]:
+    # Cada lote do cursor vira um record batch do Arrow e um row group do
+    # arquivo; os bytes de cada row group são enviados assim que escritos
+    esquema = esquema_parquet(colunas)
+    saida = SaidaEmBlocos()
+    escritor = pq.ParquetWriter(saida, esquema, compression="zstd")
+
+    def escrever(lote: List[dict]) -> bytes:
+        escritor.write_batch(lote_arrow(lote, esquema))
+        return saida.esvaziar()
+
+    try:
+        async for lote in em_lotes(registros):
+            yield await executar_em_thread(escrever, lote)
+    finally:
+        escritor.close()
+    yield saida.esvaziar()
+
+
+async def exportar_xlsx(registros, colunas: List[str]) -> AsyncIterator[bytes]:
+    # O modo write_only do openpyxl grava as linhas num arquivo temporário em
+    # vez de mantê-las em memória; o .xlsx (zip) só existe ao final, então é
+    # montado em disco e enviado em blocos
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet("Balanço")
+    aba.append(colunas)
+
+    def escrever(lote: List[dict]) -> None:
+        for r in lote:
+            aba.append([_celula(r.get(c)) for c in colunas])
+
+    async for lote in em_lotes(registros):
+        await executar_em_thread(escrever, lote)
+
+    with tempfile.TemporaryFile() as arquivo:
+        await executar_em_thread(planilha.save, arquivo)
+        arquivo.seek(0)
+        while bloco := await executar_em_thread(arquivo.read, TAMANHO_BLOCO_ARQUIVO):
+            yield bloco
+
+
+EXPORTADORES: Dict[str, Callable[..., AsyncIterator[bytes]]] = {
+    "csv": exportar_csv,
+    "xlsx": exportar_xlsx,
+    "parquet": exportar_parquet,
+}
+
+
+def nome_arquivo(formato: str) -> str:
+    return f"balanco_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
@@ -0,0 +1,340 @@
+import asyncio
+import os
+import shutil
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+from fastapi import UploadFile
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from database.database_async import AsyncDBConnection
+from database.indices import registrar_consulta, registrar_indices
+from utils.executores import executar_em_thread
+from utils.settings import (
+    IMPORTACAO_DIRETORIO,
+    IMPORTACAO_PRAZO_SEGUNDOS,
+    IMPORTACOES_SIMULTANEAS,
+)
+
+registrar_indices(
+    "importacoes",
+    [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("usuario_id", ASCENDING), ("criado_em", DESCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+    ],
+)
+registrar_consulta("importação por id", "importacoes", {"id": "x", "usuario_id": "x"})
+registrar_consulta(
+    "importações com posse vencida",
+    "importacoes",
+    {"status": "processando", "expira_em": {"$lt": datetime(2025, 1, 1)}},
+)
+registrar_consulta(
+    "importações disponíveis",
+    "importacoes",
+    {
+        "$or": [
+            {"status": "pendente"},
+            {
+                "status": "processando",
+                "expira_em": {"$not": {"$gte": datetime(2025, 1, 1)}},
+            },
+        ]
+    },
+)
+
+# Falhas guardadas no documento da importação (o total fica em contadores)
+LIMITE_FALHAS = 100
+CONTADORES_ZERADOS = {
+    "linhas_lidas": 0,
+    "inseridos": 0,
+    "ignorados": 0,
+    "falhas": 0,
+}
+
+# Identifica este processo da API como dono das importações que executa
+DONO = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+# Função que executa cada tipo de importação, registrada pela rota que a
+# cria: processador(job, usuario, progresso)
+Progresso = Callable[[dict], Awaitable[None]]
+PROCESSADORES: Dict[str, Callable[[dict, dict, Progresso], Awaitable[None]]] = {}
+
+
+def registrar_processador(tipo: str, processador: Callable) -> None:
+    PROCESSADORES[tipo] = processador
+
+
+async def salvar_upload(arquivo: UploadFile, nome: str) -> str:
+    # Copia o upload para disco em blocos, fora do event loop; o arquivo
+    # precisa sobreviver ao fim da requisição
+    os.makedirs(IMPORTACAO_DIRETORIO, exist_ok=True)
+    caminho = os.path.join(IMPORTACAO_DIRETORIO, nome)
+
+    def copiar():
+        arquivo.file.seek(0)
+        with open(caminho, "wb") as destino:
+            shutil.copyfileobj(arquivo.file, destino, 1024 * 1024)
+
+    await executar_em_thread(copiar)
+    return caminho
+
+
+def _prazo() -> datetime:
+    return datetime.now() + timedelta(seconds=IMPORTACAO_PRAZO_SEGUNDOS)
+
+
+def _disponiveis(agora: datetime) -> dict:
+    # Pendentes, ou em andamento com a posse vencida (ou sem posse, de antes
+    # dela existir): o processo que as executava morreu no meio
+    return {
+        "$or": [
+            {"status": "pendente"},
+            {"status": "processando", "expira_em": {"$not": {"$gte": agora}}},
+        ]
+    }
+
+
+def remover_arquivos(caminhos: List[str]) -> None:
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+class ImportacaoService:
+    def __init__(self, db_connection: AsyncDBConnection = None):
+        self.db_connection = db_connection or AsyncDBConnection()
+
+    async def criar_importacao(
+        self,
+        usuario: dict,
+        tipo: str,
+        arquivos: List[str],
+        parametros: dict,
+        id: str = None,
+    ) -> Optional[dict]:
+        job = {
+            "id": id or str(uuid4()),
+            "usuario_id": usuario.get("info", {}).get("id"),
+            "tipo": tipo,
+            "status": "pendente",
+            "arquivos": arquivos,
+            "parametros": parametros,
+            "contadores": dict(CONTADORES_ZERADOS),
+            "falhas": [],
+            "erro": None,
+            "criado_em": datetime.now().isoformat(),
+            "iniciado_em": None,
+            "concluido_em": None,
+            "dono": None,
+            "expira_em": None,
+        }
+        if not await self.db_connection.insert_one("importacoes", dict(job)):
+            return None
+        return job
+
+    async def buscar_importacao(self, id: str, usuario: dict) -> Optional[dict]:
+        job = await self.db_connection.find_one(
+            "importacoes",
+            {"id": id, "usuario_id": usuario.get("info", {}).get("id")},
+            {"_id": 0, "arquivos": 0},
+        )
+        if job:
+            job["linhas_por_segundo"] = vazao(job)
+        return job
+
+    async def listar_importacoes(self, usuario: dict, limite: int = 20) -> list:
+        return await self.db_connection.find(
+            "importacoes",
+            {"usuario_id": usuario.get("info", {}).get("id")},
+            {"_id": 0, "arquivos": 0, "falhas": 0},
+            sort=[("criado_em", -1)],
+            limit=limite,
+        )
+
+    async def iniciar(self, id: str) -> Optional[dict]:
+        # Toma posse da importação de forma atômica, só se ninguém a tiver
+        # (pendente ou com a posse vencida): dois workers, do mesmo processo
+        # ou de processos diferentes, nunca a executam ao mesmo tempo
+        return await self.db_connection.find_one_and_update(
+            "importacoes",
+            {"id": id, **_disponiveis(datetime.now())},
+            {
+                "$set": {
+                    "status": "processando",
+                    "dono": DONO,
+                    "expira_em": _prazo(),
+                    "iniciado_em": datetime.now().isoformat(),
+                    "contadores": dict(CONTADORES_ZERADOS),
+                    "falhas": [],
+                }
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renovar(self, id: str) -> bool:
+        return bool(
+            await self.db_connection.update_one(
+                "importacoes",
+                {"id": id, "dono": DONO, "status": "processando"},
+                {"$set": {"expira_em": _prazo()}},
+            )
+        )
+
+    async def registrar_progresso(self, id: str, progresso: dict) -> None:
+        falhas = progresso.pop("falhas", [])
+        atualizacao = {
+            "$inc": {f"contadores.{campo}": v for campo, v in progresso.items()}
+        }
+        atualizacao["$inc"]["contadores.falhas"] = len(falhas)
+        if falhas:
+            atualizacao["$push"] = {
+                "falhas": {"$each": falhas[:LIMITE_FALHAS], "$slice": LIMITE_FALHAS}
+            }
+        await self.db_connection.update_one(
+            "importacoes", {"id": id, "dono": DONO}, atualizacao
+        )
+
+    async def finalizar(self, id: str, erro: str = None) -> bool:
+        # Sem efeito se a posse foi perdida para outro processo
+        return bool(
+            await self.db_connection.update_one(
+                "importacoes",
+                {"id": id, "dono": DONO},
+                {
+                    "$set": {
+                        "status": "erro" if erro else "concluido",
+                        "erro": erro,
+                        "concluido_em": datetime.now().isoformat(),
+                        "expira_em": None,
+                    }
+                },
+            )
+        )
+
+    async def vencidas(self) -> List[str]:
+        jobs = await self.db_connection.find(
+            "importacoes",
+            {"status": "processando", "expira_em": {"$lt": datetime.now()}},
+            {"_id": 0, "id": 1},
+        )
+        return [j["id"] for j in jobs]
+
+    async def pendentes(self) -> List[str]:
+        # Jobs sem dono vivo voltam para a fila; a deduplicação por hash torna
+        # o reprocessamento de um job interrompido seguro. Jobs que outro
+        # processo ainda executa (posse em dia) ficam com ele
+        jobs = await self.db_connection.find(
+            "importacoes",
+            _disponiveis(datetime.now()),
+            {"_id": 0, "id": 1},
+            sort=[("criado_em", 1)],
+        )
+        return [j["id"] for j in jobs]
+
+
+def vazao(job: dict) -> Optional[float]:
+    if not job.get("iniciado_em"):
+        return None
+    inicio = datetime.fromisoformat(job["iniciado_em"])
+    fim = (
+        datetime.fromisoformat(job["concluido_em"])
+        if job.get("concluido_em")
+        else datetime.now()
+    )
+    segundos = (fim - inicio).total_seconds()
+    if segundos <= 0:
+        return None
+    return round(job.get("contadores", {}).get("linhas_lidas", 0) / segundos, 1)
+
+
+_fila: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+def fila_importacao() -> asyncio.Queue:
+    global _fila
+    if _fila is None:
+        _fila = asyncio.Queue()
+    return _fila
+
+
+async def enfileirar(job_id: str) -> None:
+    await fila_importacao().put(job_id)
+
+
+async def iniciar_workers(quantidade: int = IMPORTACOES_SIMULTANEAS) -> None:
+    for job_id in await ImportacaoService().pendentes():
+        await enfileirar(job_id)
+    for _ in range(quantidade):
+        _workers.append(asyncio.create_task(_worker()))
+    _workers.append(asyncio.create_task(_recuperar_vencidas()))
+
+
+async def encerrar_workers() -> None:
+    global _fila
+    for tarefa in _workers:
+        tarefa.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _fila = None
+
+
+async def _manter_posse(id: str, service: ImportacaoService) -> None:
+    while True:
+        await asyncio.sleep(IMPORTACAO_PRAZO_SEGUNDOS / 3)
+        if not await service.renovar(id):
+            print(f"Importação {id}: posse não renovada")
+
+
+async def processar(job: dict, service: ImportacaoService) -> None:
+    processador = PROCESSADORES.get(job["tipo"])
+    usuario = {"info": {"id": job["usuario_id"]}}
+
+    async def progresso(dados: dict) -> None:
+        await service.registrar_progresso(job["id"], dados)
+
+    # Os arquivos só são removidos ao finalizar como dono: se o processo
+    # morrer no meio, a posse vence e o job volta para a fila de outro
+    posse = asyncio.create_task(_manter_posse(job["id"], service))
+    try:
+        if processador is None:
+            raise ValueError(f"Tipo de importação desconhecido: {job['tipo']}")
+        await processador(job, usuario, progresso)
+        finalizado = await service.finalizar(job["id"])
+    except Exception as e:
+        print(e)
+        finalizado = await service.finalizar(job["id"], str(e))
+    finally:
+        posse.cancel()
+    if finalizado:
+        remover_arquivos(job.get("arquivos", []))
+
+
+async def _recuperar_vencidas() -> None:
+    # Jobs de processos da API que morreram sem reiniciar; a posse em iniciar
+    # impede que um job ainda em dia seja executado de novo
+    service = ImportacaoService()
+    while True:
+        await asyncio.sleep(IMPORTACAO_PRAZO_SEGUNDOS)
+        try:
+            for job_id in await service.vencidas():
+                await enfileirar(job_id)
+        except Exception as e:
+            print(e)
+
+
+async def _worker() -> None:
+    service = ImportacaoService()
+    fila = fila_importacao()
+    while True:
+        job_id = await fila.get()
+        try:
+            job = await service.iniciar(job_id)
+            if job:
+                await processar(job, service)
+        finally:
+            fila.task_done()
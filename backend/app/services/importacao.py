@@ -0,0 +1,410 @@
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+import numpy as np
+import pandas as pd
+from utils.dinheiro import serie_para_centavos, texto_para_centavos
+from utils.settings import (
+    DESCRICOES_IGNORADAS_INTER,
+    DESCRICOES_IGNORADAS_NUBANK,
+    NOMES_TITULAR,
+)
+from utils.texto import normalizar_busca_serie, por_valor_distinto, trigramas_serie
+from app.services.categorizacao import categorizar
+from app.services.validacao import validar_dataframe
+
+
+def _lista(texto: str) -> List[str]:
+    return [t.strip() for t in texto.split(",") if t.strip()]
+
+
+NOMES_TITULAR_NUBANK = _lista(NOMES_TITULAR)
+
+# Regras de limpeza por banco; são compiladas uma única vez, na carga do
+# módulo (em cada processo do pool), e aplicadas com operações .str
+REGRAS_BANCO = {
+    "extrato_inter": {
+        "historicos_ignorados": ["Crédito Evento B3"],
+        "descricoes_ignoradas": [
+            "Fatura cartão Inter",
+            *_lista(DESCRICOES_IGNORADAS_INTER),
+        ],
+    },
+    "extrato_nubank": {
+        "descricoes_ignoradas": [
+            "pagamento de fatura",
+            *_lista(DESCRICOES_IGNORADAS_NUBANK),
+        ],
+        "nomes_titular": NOMES_TITULAR_NUBANK,
+    },
+    "fatura_nubank": {
+        # Prefixos de adquirentes removidos do título; "*" vira espaço
+        "substituicoes": [
+            ("*3", " "),
+            ("Ebn*", ""),
+            ("Hotmart*", ""),
+            ("Htm*", ""),
+            ("Unicef*", ""),
+            ('"', ""),
+            ("*", " "),
+        ],
+    },
+}
+
+# Bytes lidos do início do arquivo para reconhecer o formato
+TAMANHO_DETECCAO = 4 * 1024
+
+
+def compilar_substituicoes(pares: List[tuple]) -> tuple:
+    # Trocas de um caractere viram uma tabela de str.translate (aplicada por
+    # último); as demais viram uma única regex alternada com callback
+    longas = {de: para for de, para in pares if len(de) > 1}
+    tabela = str.maketrans({de: para for de, para in pares if len(de) == 1})
+    padrao = None
+    if longas:
+        padrao = re.compile(
+            "|".join(re.escape(de) for de in sorted(longas, key=len, reverse=True))
+        )
+    return padrao, longas, tabela
+
+
+def aplicar_substituicoes(serie: pd.Series, compiladas: tuple) -> pd.Series:
+    padrao, longas, tabela = compiladas
+    if padrao is not None:
+        serie = serie.str.replace(padrao, lambda m: longas[m.group(0)], regex=True)
+    return serie.str.translate(tabela)
+
+
+def compilar_termos(termos: List[str]) -> re.Pattern:
+    # Qualquer um dos termos, sem diferenciar maiúsculas; sem termos, nunca casa
+    if not termos:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(re.escape(t) for t in termos), re.IGNORECASE)
+
+
+_DESCRICOES_IGNORADAS_INTER = [
+    d.lower() for d in REGRAS_BANCO["extrato_inter"]["descricoes_ignoradas"]
+]
+_HISTORICOS_IGNORADOS_INTER = REGRAS_BANCO["extrato_inter"]["historicos_ignorados"]
+_IGNORADAS_NUBANK = compilar_termos(
+    REGRAS_BANCO["extrato_nubank"]["descricoes_ignoradas"]
+)
+_TITULAR_NUBANK = compilar_termos(REGRAS_BANCO["extrato_nubank"]["nomes_titular"])
+_SUBSTITUICOES_FATURA_NUBANK = compilar_substituicoes(
+    REGRAS_BANCO["fatura_nubank"]["substituicoes"]
+)
+
+
+def _texto(df: pd.DataFrame, coluna: str) -> pd.Series:
+    if coluna not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[coluna].fillna("").astype(str)
+
+
+def _data(df: pd.DataFrame, coluna: str) -> pd.Series:
+    data = _texto(df, coluna).str.strip()
+    return data.mask(data == "")
+
+
+def _colapsar_espacos(serie: pd.Series) -> pd.Series:
+    return serie.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _valor_brl(df: pd.DataFrame, coluna: str) -> pd.Series:
+    # Converte "R$ -1.234,56" em -123456 centavos; células vazias viram 0 e
+    # células inválidas viram <NA> (descartadas por quem chama)
+    if coluna not in df.columns:
+        return pd.Series(0, index=df.index, dtype="Int64")
+    serie = df[coluna]
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie_para_centavos(serie.fillna(0))
+    texto = (
+        serie.fillna("")
+        .astype(str)
+        .str.replace("R$", "", regex=False)
+        .str.replace("\xa0", "", regex=False)
+        .str.replace(" ", "", regex=False)
+        .str.replace(".", "", regex=False)
+    )
+    return texto_para_centavos(texto, decimal=",")
+
+
+def _valor_numerico(df: pd.DataFrame, coluna: str) -> pd.Series:
+    # Valores com ponto decimal ("-12.34") direto para centavos
+    if coluna not in df.columns:
+        return pd.Series(0, index=df.index, dtype="Int64")
+    serie = df[coluna]
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie_para_centavos(serie)
+    return texto_para_centavos(serie.fillna("").astype(str).str.strip())
+
+
+def _tipo_por_sinal(valor: pd.Series) -> np.ndarray:
+    negativo = (valor < 0).to_numpy(dtype=bool, na_value=False)
+    return np.where(negativo, "Saída", "Entrada")
+
+
+def _normalizar_categoria(serie: pd.Series) -> pd.Series:
+    return serie.where(serie.map(type) == str, "").str.capitalize()
+
+
+def _extrair_nome_nubank(desc: pd.Series) -> pd.Series:
+    return por_valor_distinto(desc, _extrair_nome_nubank_unicos)
+
+
+def _extrair_nome_nubank_unicos(desc: pd.Series) -> pd.Series:
+    # A primeira parte da descrição com o nome do titular, senão a segunda
+    # parte, senão a descrição inteira
+    partes = desc.str.split("-", expand=True)
+    if partes.empty:
+        return desc.str.strip()
+    partes = partes.fillna("")
+    nome = pd.Series(pd.NA, index=desc.index, dtype=object)
+    for coluna in partes.columns:
+        parte = partes[coluna]
+        encontrou = nome.isna() & parte.str.contains(_TITULAR_NUBANK)
+        nome = nome.mask(encontrou, parte)
+    padrao_nome = partes[1] if partes.shape[1] > 1 else partes[0]
+    padrao_nome = padrao_nome.where(desc.str.contains("-", regex=False), partes[0])
+    return nome.fillna(padrao_nome).astype(str).str.strip()
+
+
+def _limpar_title_fatura_nubank(title: pd.Series) -> pd.Series:
+    return aplicar_substituicoes(title, _SUBSTITUICOES_FATURA_NUBANK).str.strip()
+
+
+def _tratar_title_fatura_nubank(title: pd.Series) -> pd.DataFrame:
+    partes = title.str.partition("-")
+    fonte = por_valor_distinto(partes[0], _limpar_title_fatura_nubank)
+    observacao = partes[2].str.strip()
+    return pd.DataFrame({"fonte": fonte, "observacao": observacao})
+
+
+def _extrato_inter(df: pd.DataFrame) -> pd.DataFrame:
+    desc = _texto(df, "Descrição")
+    valor = _valor_brl(df, "Valor")
+    manter = (
+        ~_texto(df, "Histórico").isin(_HISTORICOS_IGNORADOS_INTER)
+        & ~_colapsar_espacos(desc).str.lower().isin(_DESCRICOES_IGNORADAS_INTER)
+    )
+    valor = valor[manter]
+    return pd.DataFrame(
+        {
+            "fonte": desc[manter].str.strip(),
+            "valor": valor.abs(),
+            "tipo": _tipo_por_sinal(valor),
+            "data": _data(df, "Data Lançamento")[manter],
+            "tag": "Inter PF",
+            "categoria": "Outros",
+            "observacao": None,
+        }
+    )
+
+
+def _fatura_inter(df: pd.DataFrame) -> pd.DataFrame:
+    valor = _valor_brl(df, "Valor")
+    categoria = (
+        df["Categoria"] if "Categoria" in df.columns else pd.Series("", index=df.index)
+    )
+    return pd.DataFrame(
+        {
+            "fonte": _colapsar_espacos(_texto(df, "Lançamento")),
+            "valor": valor.abs(),
+            "tipo": "Saída",
+            "data": _data(df, "Data"),
+            "tag": "Inter Cartão",
+            "categoria": _normalizar_categoria(categoria),
+            "observacao": _texto(df, "Tipo").str.strip(),
+        }
+    )
+
+
+def _extrato_nubank(df: pd.DataFrame) -> pd.DataFrame:
+    desc = _texto(df, "Descrição")
+    valor = _valor_numerico(df, "Valor")
+    manter = ~desc.str.contains(_IGNORADAS_NUBANK)
+    valor = valor[manter]
+    return pd.DataFrame(
+        {
+            "fonte": _extrair_nome_nubank(desc[manter]),
+            "valor": valor.abs(),
+            "tipo": _tipo_por_sinal(valor),
+            "data": _data(df, "Data")[manter],
+            "tag": "Nubank PF",
+            "categoria": "Outros",
+            "observacao": None,
+        }
+    )
+
+
+def _fatura_nubank(df: pd.DataFrame) -> pd.DataFrame:
+    valor = _valor_numerico(df, "amount")
+    # Valores negativos são pagamentos da fatura; valores ilegíveis seguem
+    # para a validação
+    manter = ~(valor < 0).fillna(False)
+    titulo = _tratar_title_fatura_nubank(_texto(df, "title")[manter])
+    return pd.DataFrame(
+        {
+            "fonte": titulo["fonte"],
+            "valor": valor[manter].abs(),
+            "tipo": "Saída",
+            "data": _data(df, "date")[manter],
+            "tag": "Nubank Cartão",
+            "categoria": "Outros",
+            "observacao": titulo["observacao"],
+        }
+    )
+
+
+@dataclass(frozen=True)
+class FormatoExtrato:
+    # Como ler e reconhecer o CSV exportado por um banco
+    nome: str
+    processador: Callable[[pd.DataFrame], pd.DataFrame]
+    assinatura: Tuple[str, ...]  # Colunas que identificam o cabeçalho
+    sep: str = ","
+    encoding: str = "utf-8-sig"
+    skiprows: int = 0  # Linhas antes do cabeçalho
+    dtypes: Dict[str, str] = field(default_factory=dict)
+
+    def reconhece(self, amostra: bytes) -> bool:
+        linhas = amostra.decode(self.encoding, errors="ignore").splitlines()
+        if len(linhas) <= self.skiprows:
+            return False
+        colunas = {c.strip().strip('"') for c in linhas[self.skiprows].split(self.sep)}
+        return set(self.assinatura) <= colunas
+
+
+FORMATOS: Dict[str, FormatoExtrato] = {}
+
+
+def registrar_formato(formato: FormatoExtrato) -> None:
+    FORMATOS[formato.nome] = formato
+
+
+registrar_formato(
+    FormatoExtrato(
+        nome="extrato_inter",
+        processador=_extrato_inter,
+        assinatura=("Data Lançamento", "Histórico", "Descrição", "Valor"),
+        sep=";",
+        skiprows=5,  # cabeçalho bagunçado
+        dtypes={
+            "Data Lançamento": "str",
+            "Histórico": "str",
+            "Descrição": "str",
+            "Valor": "str",
+            "Saldo": "str",
+        },
+    )
+)
+registrar_formato(
+    FormatoExtrato(
+        nome="fatura_inter",
+        processador=_fatura_inter,
+        assinatura=("Data", "Lançamento", "Categoria", "Tipo", "Valor"),
+        dtypes={
+            "Data": "str",
+            "Lançamento": "str",
+            "Categoria": "str",
+            "Tipo": "str",
+            "Valor": "str",
+        },
+    )
+)
+registrar_formato(
+    FormatoExtrato(
+        nome="extrato_nubank",
+        processador=_extrato_nubank,
+        assinatura=("Data", "Valor", "Identificador", "Descrição"),
+        dtypes={
+            "Data": "str",
+            "Valor": "str",
+            "Identificador": "str",
+            "Descrição": "str",
+        },
+    )
+)
+registrar_formato(
+    FormatoExtrato(
+        nome="fatura_nubank",
+        processador=_fatura_nubank,
+        assinatura=("date", "title", "amount"),
+        dtypes={"date": "str", "title": "str", "amount": "str"},
+    )
+)
+
+
+def processar_dataframe(
+    df: pd.DataFrame,
+    tipo_arquivo: str,
+    mes: str,
+    ano: int,
+    regras: Optional[List[dict]] = None,
+) -> Tuple[List[dict], List[int], List[dict]]:
+    # Devolve os documentos prontos para inserir, a linha de dados do arquivo
+    # de cada um (a mesma numeração dos erros de validação) e os erros. Linhas
+    # com valor ilegível chegam à validação como <NA> e são reportadas
+    formato = FORMATOS.get(tipo_arquivo)
+    if formato is None or df.empty:
+        return [], [], []
+
+    resultado = formato.processador(df)
+    resultado["mes"] = mes
+    resultado["ano"] = int(ano)
+    resultado, erros = validar_dataframe(resultado)
+    if resultado.empty:
+        return [], [], erros
+
+    resultado["fonte_busca"] = normalizar_busca_serie(resultado["fonte"])
+    resultado["fonte_trigramas"] = trigramas_serie(resultado["fonte_busca"])
+    if regras:
+        resultado["categoria"] = categorizar(resultado, regras)
+    resultado["id"] = [str(uuid4()) for _ in range(len(resultado))]
+    resultado["valor"] = resultado["valor"].astype(np.int64)
+    linhas = (resultado.index + 1).tolist()
+    resultado = resultado.astype(object).where(resultado.notna(), None)
+    return resultado.to_dict("records"), linhas, erros
+
+
+def detectar_formato(amostra: bytes) -> Optional[FormatoExtrato]:
+    for formato in FORMATOS.values():
+        if formato.reconhece(amostra):
+            return formato
+    return None
+
+
+def identificar_formato(
+    arquivo: BinaryIO, tipo_arquivo: Optional[str] = None
+) -> FormatoExtrato:
+    # Usa o formato informado ou reconhece pelo cabeçalho do arquivo
+    if tipo_arquivo:
+        if tipo_arquivo not in FORMATOS:
+            raise ValueError(f"Formato de arquivo desconhecido: {tipo_arquivo}")
+        return FORMATOS[tipo_arquivo]
+    amostra = arquivo.read(TAMANHO_DETECCAO)
+    arquivo.seek(0)
+    formato = detectar_formato(amostra)
+    if formato is None:
+        raise ValueError("Formato de arquivo não reconhecido")
+    return formato
+
+
+def ler_csv_em_lotes(
+    arquivo: BinaryIO, formato: FormatoExtrato, tamanho_lote: int
+) -> Iterator[pd.DataFrame]:
+    # Lê o arquivo em blocos com o parser C do pandas, com separador e tipos
+    # declarados pelo formato, sem carregar o conteúdo inteiro em memória
+    with pd.read_csv(
+        arquivo,
+        engine="c",
+        sep=formato.sep,
+        encoding=formato.encoding,
+        skiprows=formato.skiprows,
+        dtype=formato.dtypes,
+        chunksize=tamanho_lote,
+        skip_blank_lines=True,
+    ) as leitor:
+        for lote in leitor:
+            yield lote
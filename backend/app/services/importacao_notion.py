@@ -0,0 +1,76 @@
+from io import StringIO
+from typing import List, Tuple
+import pandas as pd
+from utils.dinheiro import para_centavos
+from app.models.balanco import TAGS
+
+MAPPING_MESES = {
+    "January": "Janeiro",
+    "February": "Fevereiro",
+    "March": "Março",
+    "April": "Abril",
+    "May": "Maio",
+    "June": "Junho",
+    "July": "Julho",
+    "August": "Agosto",
+    "September": "Setembro",
+    "October": "Outubro",
+    "November": "Novembro",
+    "December": "Dezembro",
+}
+
+
+def parse_csv(content: bytes, tipo: str) -> Tuple[List[dict], List[int]]:
+    # Devolve os registros e, para cada um, a linha de dados do arquivo
+    # (a partir de 1, sem o cabeçalho), usada para reportar as falhas
+    df = pd.read_csv(StringIO(content.decode("utf-8")))
+    registros = []
+    linhas = []
+
+    for indice, row in df.iterrows():
+        fonte = row.get("Source")
+        if pd.isna(fonte):
+            continue
+
+        mes_str = str(row.get("Month", "")).split(" ")[0]
+        mes = MAPPING_MESES.get(mes_str)
+        if not mes:
+            continue
+
+        try:
+            valor_str = str(row.get("Amount", "0")).replace("R$", "").replace(",", "")
+            valor = para_centavos(valor_str)
+        except ValueError:
+            continue
+
+        # A coluna Tags do Notion é texto livre; só as tags conhecidas passam
+        # na validação, as demais ficam sem tag em vez de derrubar a linha
+        tag = row.get("Tags")
+        registros.append(
+            {
+                "fonte": fonte,
+                "valor": valor,
+                "tipo": tipo,
+                "mes": mes,
+                "ano": 2025,
+                "tag": tag if tag in TAGS else None,
+                "observacao": "" if pd.isna(row.get("Obs")) else row.get("Obs"),
+            }
+        )
+        linhas.append(indice + 1)
+    return registros, linhas
+
+
+def ler_csv_notion(caminho: str, tipo: str) -> Tuple[List[dict], List[int]]:
+    with open(caminho, "rb") as arquivo:
+        return parse_csv(arquivo.read(), tipo)
+
+
+def falhas_por_linha(falhas: List[dict], origens: List[Tuple[str, int]]) -> List[dict]:
+    # Troca o índice na lista combinada (entradas + saídas) pelo arquivo e
+    # pela linha de origem, como na importação de extratos
+    resultado = []
+    for falha in falhas:
+        arquivo, linha = origens[falha["indice"]]
+        resultado.append({"arquivo": arquivo, "linha": linha, "erro": falha["erro"]})
+    return sorted(resultado, key=lambda f: (f["arquivo"], f["linha"]))
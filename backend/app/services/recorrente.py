@@ -1,28 +1,236 @@
-from database.database import DBConnection
+import asyncio
+from calendar import monthrange
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from database.database_async import AsyncDBConnection
+from database.indices import registrar_consulta, registrar_indices
+from pymongo import ASCENDING, IndexModel, UpdateOne
 from uuid import uuid4
+from utils.datas import indice_mes, indice_periodo, ler_data, periodo
+from utils.settings import BALANCO_TAMANHO_LOTE, RECORRENTE_INTERVALO
+from app.models.balanco import MESES
+from app.services.analise import calcular_projecao
+from app.services.balanco import PROJECAO_ANALISE, BalancoService
+
+registrar_indices(
+    "transacoes_recorrentes",
+    [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("usuario_id", ASCENDING)]),
+        IndexModel([("ultimo_periodo_gerado", ASCENDING)]),
+    ],
+)
+registrar_consulta(
+    "recorrentes do usuário", "transacoes_recorrentes", {"usuario_id": "x"}
+)
+registrar_consulta(
+    "recorrentes com ocorrências pendentes",
+    "transacoes_recorrentes",
+    {"ultimo_periodo_gerado": {"$lt": "2025-01"}},
+)
+registrar_consulta(
+    "recorrente por id", "transacoes_recorrentes", {"id": "x", "usuario_id": "x"}
+)
+
+# Chave de upsert das ocorrências geradas em balanco
+CHAVE_OCORRENCIA = ["recorrente_id", "ano", "mes"]
+
+
+def ocorrencias(recorrente: dict, ate: date) -> Tuple[List[date], Optional[str]]:
+    # Datas devidas desde o último período gerado até `ate`, com o dia
+    # limitado ao tamanho de cada mês e respeitando inicio/fim. Devolve
+    # também o novo último período: um mês só é fechado quando sua data já
+    # passou (ou está fora de inicio/fim). Sem histórico nem inicio, começa
+    # pelo mês de `ate`, como a geração manual sempre fez
+    inicio, fim = ler_data(recorrente.get("inicio")), ler_data(recorrente.get("fim"))
+    primeiro = indice_mes(ate.year, ate.month)
+    if recorrente.get("ultimo_periodo_gerado"):
+        primeiro = indice_periodo(recorrente["ultimo_periodo_gerado"]) + 1
+    elif inicio:
+        primeiro = indice_mes(inicio.year, inicio.month)
+    if inicio:
+        primeiro = max(primeiro, indice_mes(inicio.year, inicio.month))
+
+    datas, ultimo = [], recorrente.get("ultimo_periodo_gerado")
+    for indice in range(primeiro, indice_mes(ate.year, ate.month) + 1):
+        ano, mes = divmod(indice, 12)
+        dia = min(max(recorrente.get("dia") or 1, 1), monthrange(ano, mes + 1)[1])
+        data = date(ano, mes + 1, dia)
+        encerrada = fim is not None and data > fim
+        if data > ate and not encerrada:
+            break
+        if not encerrada and (inicio is None or data >= inicio):
+            datas.append(data)
+        ultimo = periodo(indice)
+    return datas, ultimo
+
+
+def registro_ocorrencia(recorrente: dict, data: date) -> dict:
+    descricao = recorrente["descricao"]
+    return {
+        "fonte": descricao,
+        "valor": recorrente["valor"],
+        "tipo": recorrente["tipo"],
+        "mes": MESES[data.month - 1],
+        "ano": data.year,
+        "data": data.strftime("%d/%m/%Y"),
+        "tag": recorrente.get("tag"),
+        "categoria": recorrente.get("categoria"),
+        "observacao": f"Gerado automaticamente da transação recorrente {descricao}",
+        "recorrente_id": recorrente["id"],
+    }
 
 
 class RecorrenteService:
-    def __init__(self):
-        self.db = DBConnection()
+    def __init__(
+        self,
+        db_connection: AsyncDBConnection = None,
+        balanco_service: BalancoService = None,
+    ):
+        self.db = db_connection or AsyncDBConnection()
+        self.balanco_service = balanco_service or BalancoService(self.db)
 
-    def criar_recorrente(self, data: dict, usuario: dict):
+    async def criar_recorrente(self, data: dict, usuario: dict):
         data["id"] = str(uuid4())
         data["usuario_id"] = usuario.get("info", {}).get("id")
-        return self.db.insert_one("transacoes_recorrentes", data)
+        return await self.db.insert_one("transacoes_recorrentes", data)
 
-    def editar_recorrente(self, id: str, data: dict, usuario: dict):
+    async def editar_recorrente(self, id: str, data: dict, usuario: dict):
         filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
-        return self.db.update_one("transacoes_recorrentes", filtro, {"$set": data})
+        return await self.db.update_one(
+            "transacoes_recorrentes", filtro, {"$set": data}
+        )
 
-    def deletar_recorrente(self, id: str, usuario: dict):
+    async def deletar_recorrente(self, id: str, usuario: dict):
         filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
-        return self.db.delete_one("transacoes_recorrentes", filtro)
+        return await self.db.delete_one("transacoes_recorrentes", filtro)
 
-    def listar_recorrentes(self, usuario: dict):
+    async def listar_recorrentes(self, usuario: dict):
         filtro = {"usuario_id": usuario.get("info", {}).get("id")}
-        return self.db.find("transacoes_recorrentes", filtro, {"_id": 0})
+        return await self.db.find("transacoes_recorrentes", filtro, {"_id": 0})
 
-    def buscar_recorrente(self, id: str, usuario: dict):
+    async def buscar_recorrente(self, id: str, usuario: dict):
         filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
-        return self.db.find_one("transacoes_recorrentes", filtro, {"_id": 0})
+        return await self.db.find_one("transacoes_recorrentes", filtro, {"_id": 0})
+
+    async def projecao(self, usuario: dict, meses: int = 12) -> dict:
+        # Regras e resumos mensais em duas consultas; a expansão das regras
+        # no horizonte é feita em NumPy
+        usuario_id = usuario.get("info", {}).get("id")
+        recorrentes = await self.listar_recorrentes(usuario)
+        await self.balanco_service.garantir_resumo(usuario_id)
+        resumos = await self.db.find(
+            "balanco_resumo", {"usuario_id": usuario_id}, PROJECAO_ANALISE
+        )
+        return calcular_projecao(recorrentes, resumos, date.today(), meses)
+
+    async def gerar_ocorrencias(
+        self,
+        ate: date = None,
+        usuario: dict = None,
+        tamanho_lote: int = BALANCO_TAMANHO_LOTE,
+    ) -> dict:
+        # Percorre, numa única consulta, só as recorrentes (de todos os
+        # usuários, ou de um) com algum mês ainda não gerado até `ate`. As
+        # ocorrências são gravadas por upsert em (recorrente_id, ano, mes),
+        # então repetir a geração não duplica lançamentos
+        ate = ate or date.today()
+        atual = periodo(indice_mes(ate.year, ate.month))
+        filtro = {
+            "$or": [
+                {"ultimo_periodo_gerado": {"$lt": atual}},
+                {"ultimo_periodo_gerado": None},
+            ]
+        }
+        if usuario:
+            filtro["usuario_id"] = usuario.get("info", {}).get("id")
+
+        resultado = {"recorrentes": 0, "inseridos": 0, "ignorados": 0, "falhas": []}
+        pendentes: Dict[str, List[tuple]] = {}
+        quantidade = 0
+        async for recorrente in self.db.iterar("transacoes_recorrentes", filtro):
+            datas, ultimo = ocorrencias(recorrente, ate)
+            resultado["recorrentes"] += 1
+            if not datas and ultimo == recorrente.get("ultimo_periodo_gerado"):
+                continue
+            pendentes.setdefault(recorrente["usuario_id"], []).append(
+                (recorrente, datas, ultimo)
+            )
+            quantidade += len(datas)
+            if quantidade >= tamanho_lote:
+                await self._gravar_ocorrencias(pendentes, resultado)
+                pendentes, quantidade = {}, 0
+        await self._gravar_ocorrencias(pendentes, resultado)
+        return resultado
+
+    async def _gravar_ocorrencias(
+        self, pendentes: Dict[str, List[tuple]], resultado: dict
+    ) -> None:
+        atualizacoes = []
+        for usuario_id, recorrentes in pendentes.items():
+            registros = [
+                registro_ocorrencia(recorrente, data)
+                for recorrente, datas, _ in recorrentes
+                for data in datas
+            ]
+            gravacao = await self.balanco_service.criar_balancos_em_lote(
+                registros,
+                {"info": {"id": usuario_id}},
+                validar=True,
+                chave=CHAVE_OCORRENCIA,
+            )
+            resultado["inseridos"] += gravacao["inseridos"]
+            resultado["ignorados"] += gravacao["ignorados"]
+
+            # Recorrentes com falha não avançam e são tentadas de novo
+            com_falha = set()
+            for falha in gravacao["falhas"]:
+                registro = registros[falha["indice"]]
+                com_falha.add(registro["recorrente_id"])
+                resultado["falhas"].append(
+                    {
+                        **{campo: registro[campo] for campo in CHAVE_OCORRENCIA},
+                        "erro": falha["erro"],
+                    }
+                )
+            atualizacoes.extend(
+                UpdateOne(
+                    {"id": recorrente["id"]},
+                    {"$max": {"ultimo_periodo_gerado": ultimo}},
+                )
+                for recorrente, _, ultimo in recorrentes
+                if ultimo and recorrente["id"] not in com_falha
+            )
+        await self.db.bulk_write("transacoes_recorrentes", atualizacoes)
+
+
+_agendador: Optional[asyncio.Task] = None
+
+
+async def _agendar(intervalo: int) -> None:
+    service = RecorrenteService()
+    while True:
+        try:
+            resultado = await service.gerar_ocorrencias()
+            if resultado["inseridos"] or resultado["falhas"]:
+                print(
+                    f"Recorrentes: {resultado['inseridos']} ocorrências geradas,"
+                    f" {len(resultado['falhas'])} falhas"
+                )
+        except Exception as e:
+            print(e)
+        await asyncio.sleep(intervalo)
+
+
+def iniciar_agendador(intervalo: int = RECORRENTE_INTERVALO) -> None:
+    global _agendador
+    if intervalo > 0 and _agendador is None:
+        _agendador = asyncio.create_task(_agendar(intervalo))
+
+
+async def encerrar_agendador() -> None:
+    global _agendador
+    if _agendador is not None:
+        _agendador.cancel()
+        await asyncio.gather(_agendador, return_exceptions=True)
+        _agendador = None
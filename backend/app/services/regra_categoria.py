@@ -0,0 +1,64 @@
+from datetime import datetime
+from uuid import uuid4
+from database.database_async import AsyncDBConnection
+from database.indices import registrar_consulta, registrar_indices
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from app.services.categorizacao import compilar_regras, validar_regex
+
+registrar_indices(
+    "regras_categoria",
+    [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("usuario_id", ASCENDING), ("prioridade", DESCENDING)]),
+    ],
+)
+registrar_consulta(
+    "regras do usuário", "regras_categoria", {"usuario_id": "x"}, [("prioridade", -1)]
+)
+
+
+def validar_regra(data: dict) -> None:
+    if data.get("modo") == "regex" and data.get("fonte"):
+        validar_regex(data["fonte"])
+    minimo, maximo = data.get("valor_min"), data.get("valor_max")
+    if minimo is not None and maximo is not None and minimo > maximo:
+        raise ValueError("valor_min maior que valor_max")
+
+
+class RegraCategoriaService:
+    def __init__(self, db_connection: AsyncDBConnection = None):
+        self.db = db_connection or AsyncDBConnection()
+
+    async def criar_regra(self, data: dict, usuario: dict):
+        validar_regra(data)
+        data["id"] = str(uuid4())
+        data["criado_em"] = datetime.now().isoformat()
+        data["usuario_id"] = usuario.get("info", {}).get("id")
+        if await self.db.insert_one("regras_categoria", data):
+            return data
+        return None
+
+    async def editar_regra(self, id: str, data: dict, usuario: dict):
+        filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
+        atual = await self.db.find_one("regras_categoria", filtro, {"_id": 0})
+        if not atual:
+            return None
+        validar_regra({**atual, **data})
+        return await self.db.update_one("regras_categoria", filtro, {"$set": data})
+
+    async def deletar_regra(self, id: str, usuario: dict):
+        filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
+        return await self.db.delete_one("regras_categoria", filtro)
+
+    async def listar_regras(self, usuario: dict):
+        filtro = {"usuario_id": usuario.get("info", {}).get("id")}
+        return await self.db.find(
+            "regras_categoria", filtro, {"_id": 0}, sort=[("prioridade", -1)]
+        )
+
+    async def buscar_regra(self, id: str, usuario: dict):
+        filtro = {"id": id, "usuario_id": usuario.get("info", {}).get("id")}
+        return await self.db.find_one("regras_categoria", filtro, {"_id": 0})
+
+    async def regras_compiladas(self, usuario: dict):
+        return compilar_regras(await self.listar_regras(usuario))
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import os
+import weakref
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from database.database_async import AsyncDBConnection
+from utils.dinheiro import para_reais
+from utils.executores import executar_em_thread
+from utils.settings import (
+    SNAPSHOT_DIRETORIO,
+    SNAPSHOT_MARGEM_SEGUNDOS,
+    SNAPSHOT_RETENCAO_DIAS,
+)
+from app.services.exportacao import em_lotes, lote_arrow, pa
+
+try:
+    import pyarrow.compute as pc
+except ImportError:
+    pc = None
+
+COLUNAS_SNAPSHOT = [
+    "id",
+    "fonte",
+    "valor",
+    "mes",
+    "ano",
+    "tipo",
+    "tag",
+    "categoria",
+    "data",
+    "criado_em",
+]
+CAMPOS_AGRUPAVEIS = ["fonte", "categoria", "tag", "mes", "ano", "tipo"]
+PROJECAO_SNAPSHOT = {"_id": 0, **dict.fromkeys(COLUNAS_SNAPSHOT, 1)}
+
+# Uma trava por usuário enquanto houver quem a use; sai do dicionário sozinha
+_travas: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def snapshot_disponivel() -> bool:
+    return pa is not None and bool(SNAPSHOT_DIRETORIO)
+
+
+def esquema_snapshot():
+    # Snapshots antigos, com valor em float64, não batem com o esquema e são
+    # reconstruídos na próxima leitura
+    tipos = {"valor": pa.int64(), "ano": pa.int64()}
+    return pa.schema([(c, tipos.get(c, pa.string())) for c in COLUNAS_SNAPSHOT])
+
+
+def caminho_snapshot(usuario_id: str) -> str:
+    nome = hashlib.sha256(str(usuario_id).encode()).hexdigest()[:32]
+    return os.path.join(SNAPSHOT_DIRETORIO, f"{nome}.arrow")
+
+
+def ler_snapshot(caminho: str) -> Optional[Tuple["pa.Table", str]]:
+    # Leitura por memory map: as colunas apontam direto para as páginas do
+    # arquivo, sem cópia, e só o que a consulta toca é carregado
+    if not os.path.exists(caminho):
+        return None
+    with pa.memory_map(caminho) as fonte:
+        tabela = pa.ipc.open_file(fonte).read_all()
+    marca = (tabela.schema.metadata or {}).get(b"marca")
+    if marca is None or not tabela.schema.equals(esquema_snapshot()):
+        return None
+    return tabela, marca.decode()
+
+
+def escrever_snapshot(caminho: str, tabela: "pa.Table", marca: str) -> None:
+    # Escrita num arquivo temporário seguida de rename atômico; leitores com
+    # o arquivo anterior mapeado continuam válidos
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tabela = tabela.replace_schema_metadata({"marca": marca})
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with pa.OSFile(temporario, "wb") as destino:
+        with pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(temporario, caminho)
+
+
+def mesclar(
+    tabela: Optional["pa.Table"], novos: List["pa.RecordBatch"], removidos: List[str]
+) -> "pa.Table":
+    # Linhas alteradas ou removidas saem do snapshot; as versões novas entram
+    # no fim
+    novos = pa.Table.from_batches(novos, schema=esquema_snapshot())
+    if tabela is None:
+        return novos.combine_chunks()
+    descartar = pa.concat_arrays(
+        [novos["id"].combine_chunks(), pa.array(removidos, type=pa.string())]
+    )
+    if len(descartar):
+        tabela = tabela.filter(pc.invert(pc.is_in(tabela["id"], value_set=descartar)))
+    return pa.concat_tables([tabela, novos]).combine_chunks()
+
+
+def agrupar_tabela(tabela: "pa.Table", campos: List[str], filtros: dict) -> List[dict]:
+    mascara = None
+    for campo, valor in filtros.items():
+        condicao = pc.equal(tabela[campo], valor)
+        mascara = condicao if mascara is None else pc.and_(mascara, condicao)
+    if mascara is not None:
+        tabela = tabela.filter(mascara)
+    grupos = tabela.group_by(campos).aggregate([("valor", "sum"), ("valor", "count")])
+    nomes = {"valor_sum": "total", "valor_count": "quantidade"}
+    grupos = grupos.rename_columns([nomes.get(c, c) for c in grupos.column_names])
+    grupos = grupos.sort_by([("total", "descending")]).to_pylist()
+    for grupo in grupos:
+        grupo["total"] = para_reais(grupo["total"])
+    return grupos
+
+
+class SnapshotService:
+    def __init__(self, db_connection: AsyncDBConnection = None):
+        self.db_connection = db_connection or AsyncDBConnection()
+
+    async def atualizar(self, usuario_id: str) -> "pa.Table":
+        # Relê do Mongo só o que mudou desde a marca do snapshot (atualizado_em
+        # e balanco_removidos); sem snapshot, ou com um mais antigo que a
+        # retenção das remoções, reconstrói a partir de todos os documentos.
+        # A releitura recua SNAPSHOT_MARGEM_SEGUNDOS antes da marca; o que já
+        # estava no snapshot é substituído por id em mesclar
+        trava = _travas.get(usuario_id)
+        if trava is None:
+            trava = _travas.setdefault(usuario_id, asyncio.Lock())
+        async with trava:
+            caminho = caminho_snapshot(usuario_id)
+            atual = await executar_em_thread(ler_snapshot, caminho)
+            marca = datetime.now()
+            limite = marca - timedelta(days=SNAPSHOT_RETENCAO_DIAS)
+            filtro = {"usuario_id": usuario_id}
+            removidos = []
+            tabela = None
+            if atual and datetime.fromisoformat(atual[1]) > limite:
+                tabela, anterior = atual
+                desde = datetime.fromisoformat(anterior) - timedelta(
+                    seconds=SNAPSHOT_MARGEM_SEGUNDOS
+                )
+                filtro["atualizado_em"] = {"$gte": desde.isoformat()}
+                removidos = [
+                    d["id"]
+                    for d in await self.db_connection.find(
+                        "balanco_removidos",
+                        {
+                            "usuario_id": usuario_id,
+                            "removido_em": {"$gte": desde},
+                        },
+                        {"_id": 0, "id": 1},
+                    )
+                ]
+
+            esquema = esquema_snapshot()
+            novos = []
+            cursor = self.db_connection.iterar("balanco", filtro, PROJECAO_SNAPSHOT)
+            async for lote in em_lotes(cursor):
+                novos.append(await executar_em_thread(lote_arrow, lote, esquema))
+            if tabela is not None and not novos and not removidos:
+                return tabela
+
+            tabela = await executar_em_thread(mesclar, tabela, novos, removidos)
+            await executar_em_thread(
+                escrever_snapshot, caminho, tabela, marca.isoformat()
+            )
+            return tabela
+
+    async def agrupar(
+        self, usuario_id: str, campos: List[str], filtros: dict
+    ) -> List[dict]:
+        tabela = await self.atualizar(usuario_id)
+        return await executar_em_thread(agrupar_tabela, tabela, campos, filtros)
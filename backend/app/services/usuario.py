@@ -2,49 +2,79 @@ import jwt
 import base64
 from datetime import datetime, timezone, timedelta
 from uuid import uuid4
-from database.database import DBConnection
-from utils.settings import SECRET_KEY_JWT
+from database.database_async import AsyncDBConnection
+from database.indices import registrar_consulta, registrar_indices
+from pymongo import ASCENDING, IndexModel
+from utils.cache import CacheTTL
+from utils.settings import SECRET_KEY_JWT, USUARIO_CACHE_TAMANHO, USUARIO_CACHE_TTL
+
+registrar_indices(
+    "usuarios",
+    [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+)
+registrar_consulta("usuário por e-mail", "usuarios", {"email": "x"})
+registrar_consulta("usuário por id", "usuarios", {"id": "x"})
+
+# Usuários decodificados do token, por e-mail (subject do JWT)
+cache_usuarios = CacheTTL(USUARIO_CACHE_TAMANHO, USUARIO_CACHE_TTL)
+
+
+def invalidar_usuario(id: str) -> int:
+    return cache_usuarios.invalidar_onde(
+        lambda usuario: usuario.get("info", {}).get("id") == id
+    )
 
 
 class UsuarioService:
-    def __init__(self):
-        self.db_connection = DBConnection()
+    def __init__(self, db_connection: AsyncDBConnection = None):
+        self.db_connection = db_connection or AsyncDBConnection()
         return
 
-    def criar_usuario(self, data):
+    async def criar_usuario(self, data):
         data["id"] = str(uuid4())
         data["criado_em"] = datetime.now().isoformat()
         data["senha"] = base64.b64encode(bytes(data["senha"], "utf-8"))
-        self.db_connection.insert_one("usuarios", data)
+        await self.db_connection.insert_one("usuarios", data)
         return data
 
-    def listar_usuarios(self, email):
+    async def listar_usuarios(self, email):
         query = {}
         if email:
             query["email"] = email
-        return self.db_connection.find("usuarios", query, {"_id": 0, "senha": 0})
+        return await self.db_connection.find("usuarios", query, {"_id": 0, "senha": 0})
 
-    def listar_usuario(self, id):
-        return self.db_connection.find_one(
+    async def listar_usuario(self, id):
+        return await self.db_connection.find_one(
             "usuarios", {"id": id}, {"_id": 0, "senha": 0}
         )
 
-    def editar_usuario_put(self, id, data):
+    async def editar_usuario_put(self, id, data):
         if data.get("senha") == "" or not data.get("senha"):
             data.pop("senha")
-        return self.db_connection.update_one("usuarios", {"id": id}, {"$set": data})
+        resultado = await self.db_connection.update_one(
+            "usuarios", {"id": id}, {"$set": data}
+        )
+        invalidar_usuario(id)
+        return resultado
 
-    def editar_usuario_patch(self, id, email):
-        return self.db_connection.update_one(
+    async def editar_usuario_patch(self, id, email):
+        resultado = await self.db_connection.update_one(
             "usuarios", {"id": id}, {"$set": {"email": email}}
         )
+        invalidar_usuario(id)
+        return resultado
 
-    def deletar_usuario(self, id):
-        return self.db_connection.delete_one("usuarios", {"id": id})
+    async def deletar_usuario(self, id):
+        resultado = await self.db_connection.delete_one("usuarios", {"id": id})
+        invalidar_usuario(id)
+        return resultado
 
-    def login(self, data):
+    async def login(self, data):
         try:
-            usuario = self.db_connection.find_one(
+            usuario = await self.db_connection.find_one(
                 "usuarios", {"email": data.email}, {"_id": 0}
             )
             senha = base64.b64decode(usuario["senha"]).decode("ascii")
@@ -68,12 +98,15 @@ class UsuarioService:
             print(e)
             return False
 
-    def decodificar_token(self, decoded):
+    async def decodificar_token(self, decoded):
         email = decoded["user"]
-        usuario = self.db_connection.find_one(
-            "usuarios", {"email": email}, {"_id": 0, "senha": 0}
-        )
-        if usuario:
-            return {"info": usuario}
-        else:
-            return False
+        usuario = cache_usuarios.obter(email)
+        if usuario is None:
+            usuario = await self.db_connection.find_one(
+                "usuarios", {"email": email}, {"_id": 0, "senha": 0}
+            )
+            if not usuario:
+                return False
+            cache_usuarios.definir(email, {"info": usuario})
+            return {"info": dict(usuario)}
+        return {"info": dict(usuario["info"])}
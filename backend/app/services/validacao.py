@@ -0,0 +1,53 @@
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+from app.models.balanco import MESES, TAGS, TIPOS, BalancoRegistro
+
+_REGISTROS = TypeAdapter(List[BalancoRegistro])
+
+
+def validar_registros(registros: List[dict]) -> Tuple[List[dict], List[dict]]:
+    # Valida a lista inteira numa única chamada ao núcleo do pydantic e
+    # devolve dicts prontos para inserir, mais os erros por índice
+    try:
+        return _REGISTROS.validate_python(registros), []
+    except ValidationError as e:
+        erros = {}
+        for erro in e.errors():
+            indice, *campo = erro["loc"]
+            erros.setdefault(
+                indice, f"{'.'.join(str(c) for c in campo)}: {erro['msg']}"
+            )
+    validos = [r for i, r in enumerate(registros) if i not in erros]
+    return _REGISTROS.validate_python(validos), [
+        {"indice": i, "erro": mensagem} for i, mensagem in sorted(erros.items())
+    ]
+
+
+def validar_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[dict]]:
+    # Checagens por coluna sobre o lote inteiro; cada linha inválida é
+    # reportada pela primeira checagem em que falhou, com o número da linha
+    # de dados do arquivo (a partir de 1, sem o cabeçalho)
+    valor = pd.to_numeric(df["valor"], errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    checagens = [
+        ("valor inválido", pd.Series(~np.isfinite(valor), index=df.index)),
+        ("mes inválido", ~df["mes"].isin(MESES)),
+        ("tipo inválido", ~df["tipo"].isin(TIPOS)),
+        ("tag inválida", df["tag"].notna() & ~df["tag"].isin(TAGS)),
+    ]
+    invalido = pd.Series(False, index=df.index)
+    mensagens = pd.Series(None, index=df.index, dtype=object)
+    for mensagem, mascara in checagens:
+        mensagens[mascara & ~invalido] = mensagem
+        invalido |= mascara
+
+    if not invalido.any():
+        return df, []
+    erros = [
+        {"linha": int(linha) + 1, "erro": mensagem}
+        for linha, mensagem in mensagens[invalido].items()
+    ]
+    return df[~invalido], erros
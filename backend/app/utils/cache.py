@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class CacheTTL:
+    # Cache LRU local ao processo, com expiração por tempo e contadores de uso
+    def __init__(self, tamanho_maximo: int, ttl_segundos: float) -> None:
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave: Hashable) -> None:
+        with self._lock:
+            if self._itens.pop(chave, None) is not None:
+                self.invalidacoes += 1
+
+    def invalidar_onde(self, predicado: Callable[[Any], bool]) -> int:
+        with self._lock:
+            chaves = [c for c, (_, valor) in self._itens.items() if predicado(valor)]
+            for chave in chaves:
+                del self._itens[chave]
+            self.invalidacoes += len(chaves)
+            return len(chaves)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "tamanho_maximo": self.tamanho_maximo,
+                "ttl_segundos": self.ttl_segundos,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "expirados": self.expirados,
+                "invalidacoes": self.invalidacoes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
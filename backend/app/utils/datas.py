@@ -0,0 +1,33 @@
+from datetime import date, datetime
+from typing import Optional
+
+FORMATOS_DATA = ["%Y-%m-%d", "%d/%m/%Y"]
+
+
+def ler_data(valor) -> Optional[date]:
+    if not valor:
+        return None
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(str(valor)[:10], formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def indice_mes(ano: int, mes: int) -> int:
+    # Meses corridos desde o ano 0, para aritmética de períodos
+    return ano * 12 + mes - 1
+
+
+def periodo(indice: int) -> str:
+    ano, mes = divmod(indice, 12)
+    return f"{ano:04d}-{mes + 1:02d}"
+
+
+def indice_periodo(valor: Optional[str]) -> int:
+    # Inverso de periodo ("AAAA-MM"); -1 quando ausente
+    if not valor:
+        return -1
+    ano, mes = map(int, valor.split("-"))
+    return indice_mes(ano, mes)
@@ -0,0 +1,64 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Valores monetários são gravados em centavos inteiros; a API recebe e
+# devolve reais
+CENTAVOS = 100
+
+
+def para_centavos(valor) -> Optional[int]:
+    # Sem passar por float: "0.1" e 0.1 viram exatamente 10
+    if valor is None:
+        return None
+    try:
+        reais = Decimal(str(valor).strip())
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {valor!r}")
+    if not reais.is_finite():
+        raise ValueError(f"Valor inválido: {valor!r}")
+    return int(reais.quantize(Decimal("0.01"), ROUND_HALF_UP) * CENTAVOS)
+
+
+def para_reais(centavos) -> Optional[float]:
+    if centavos is None:
+        return None
+    return centavos / CENTAVOS
+
+
+def texto_para_centavos(texto: pd.Series, decimal: str = ".") -> pd.Series:
+    # Converte a coluna de texto já limpa (sem símbolo e sem separador de
+    # milhar) em centavos Int64; vazios viram 0 e textos inválidos viram <NA>
+    if decimal != ".":
+        texto = texto.str.replace(decimal, ".", regex=False)
+    return serie_para_centavos(pd.to_numeric(texto.replace("", "0"), errors="coerce"))
+
+
+def serie_para_centavos(serie: pd.Series) -> pd.Series:
+    # O float é só intermediário: com até duas casas decimais e abaixo de
+    # 2**53 centavos, arredondar reais * 100 recupera o inteiro exato. Fora
+    # disso (infinito, estouro) o valor vira <NA>
+    centavos = serie.astype(float) * CENTAVOS
+    validos = np.isfinite(centavos) & (centavos.abs() < 2**53)
+    return centavos.where(validos).round().astype("Int64")
+
+
+def registro_em_reais(
+    registro: Optional[dict], campos: Tuple[str, ...] = ("valor",)
+) -> Optional[dict]:
+    # Documento lido do banco, com os campos monetários convertidos para a API
+    if registro:
+        for campo in campos:
+            if registro.get(campo) is not None:
+                registro[campo] = para_reais(registro[campo])
+    return registro
+
+
+def registro_em_centavos(dados: dict, campos: Tuple[str, ...] = ("valor",)) -> dict:
+    # Dados recebidos pela API, com os campos monetários presentes convertidos
+    # para gravação
+    for campo in campos:
+        if dados.get(campo) is not None:
+            dados[campo] = para_centavos(dados[campo])
+    return dados
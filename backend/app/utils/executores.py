@@ -0,0 +1,61 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional
+from utils.settings import IMPORTACAO_PROCESSOS, IMPORTACAO_THREADS
+
+_processos: Optional[ProcessPoolExecutor] = None
+_threads: Optional[ThreadPoolExecutor] = None
+_FIM = object()
+
+
+def pool_processos() -> ProcessPoolExecutor:
+    # spawn evita herdar o MongoClient do processo principal via fork
+    global _processos
+    if _processos is None:
+        _processos = ProcessPoolExecutor(
+            max_workers=IMPORTACAO_PROCESSOS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _processos
+
+
+def pool_threads() -> ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(
+            max_workers=IMPORTACAO_THREADS, thread_name_prefix="importacao"
+        )
+    return _threads
+
+
+async def executar_em_processo(funcao: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        pool_processos(), partial(funcao, *args, **kwargs)
+    )
+
+
+async def executar_em_thread(funcao: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool_threads(), partial(funcao, *args, **kwargs))
+
+
+async def iterar_em_thread(iterador: Iterator) -> AsyncIterator:
+    # Consome um iterador bloqueante (ex.: leitor de CSV) sem travar o event loop
+    while True:
+        item = await executar_em_thread(next, iterador, _FIM)
+        if item is _FIM:
+            break
+        yield item
+
+
+def encerrar_executores() -> None:
+    global _processos, _threads
+    if _processos is not None:
+        _processos.shutdown(cancel_futures=True)
+        _processos = None
+    if _threads is not None:
+        _threads.shutdown(cancel_futures=True)
+        _threads = None
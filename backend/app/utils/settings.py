@@ -2,4 +2,44 @@ from os import getenv
 
 MONGO_URL: str = getenv('MONGO_URL')
 MONGO_ENVIROMENT: str = getenv('MONGO_ENVIROMENT')
+MONGO_MAX_POOL_SIZE: int = int(getenv('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE: int = int(getenv('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_CONNECT_TIMEOUT_MS: int = int(getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(
+    getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')
+)
+MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+MONGO_READ_PREFERENCE: str = getenv('MONGO_READ_PREFERENCE', 'primary')
 SECRET_KEY_JWT: str = getenv('SECRET_KEY_JWT')
+
+UPLOAD_TAMANHO_LOTE: int = int(getenv('UPLOAD_TAMANHO_LOTE', '5000'))
+IMPORTACAO_PROCESSOS: int = int(getenv('IMPORTACAO_PROCESSOS', '2'))
+IMPORTACAO_THREADS: int = int(getenv('IMPORTACAO_THREADS', '4'))
+IMPORTACOES_SIMULTANEAS: int = int(getenv('IMPORTACOES_SIMULTANEAS', '2'))
+IMPORTACAO_DIRETORIO: str = getenv('IMPORTACAO_DIRETORIO', '/tmp/importacoes')
+# Posse (lease) de uma importação em andamento, renovada enquanto o processo
+# que a executa estiver vivo; vencida, o job volta para a fila
+IMPORTACAO_PRAZO_SEGUNDOS: int = int(getenv('IMPORTACAO_PRAZO_SEGUNDOS', '120'))
+USUARIO_CACHE_TAMANHO: int = int(getenv('USUARIO_CACHE_TAMANHO', '1024'))
+USUARIO_CACHE_TTL: int = int(getenv('USUARIO_CACHE_TTL', '60'))
+BALANCO_TAMANHO_LOTE: int = int(getenv('BALANCO_TAMANHO_LOTE', '1000'))
+EXPORTACAO_TAMANHO_LOTE: int = int(getenv('EXPORTACAO_TAMANHO_LOTE', '10000'))
+REGRA_REGEX_TAMANHO_MAXIMO: int = int(getenv('REGRA_REGEX_TAMANHO_MAXIMO', '200'))
+# Listas separadas por vírgula para a limpeza dos extratos; vazias desativam.
+# Descrições do titular ignoradas no extrato Inter (exatas) e no Nubank
+# (trechos), e palavras do nome do titular na descrição do Nubank
+DESCRICOES_IGNORADAS_INTER: str = getenv(
+    'DESCRICOES_IGNORADAS_INTER', 'Petruitis,Luan Rodrigues Petruitis'
+)
+DESCRICOES_IGNORADAS_NUBANK: str = getenv(
+    'DESCRICOES_IGNORADAS_NUBANK', 'luan rodrigues petruitis'
+)
+NOMES_TITULAR: str = getenv('NOMES_TITULAR', 'daniel,luan,petruitis')
+# Intervalo (s) da geração periódica de transações recorrentes; 0 desativa
+RECORRENTE_INTERVALO: int = int(getenv('RECORRENTE_INTERVALO', '3600'))
+# Snapshots colunares (Arrow IPC) por usuário para relatórios; vazio desativa
+SNAPSHOT_DIRETORIO: str = getenv('SNAPSHOT_DIRETORIO', '/tmp/snapshots')
+SNAPSHOT_RETENCAO_DIAS: int = int(getenv('SNAPSHOT_RETENCAO_DIAS', '30'))
+# Folga na releitura incremental, para escritas carimbadas antes da marca do
+# snapshot mas confirmadas depois da leitura
+SNAPSHOT_MARGEM_SEGUNDOS: int = int(getenv('SNAPSHOT_MARGEM_SEGUNDOS', '60'))
@@ -0,0 +1,51 @@
+import re
+import unicodedata
+from typing import Callable, List
+import pandas as pd
+
+_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar_busca(texto: str) -> str:
+    # Minúsculas, sem acentos e com espaços colapsados
+    if not isinstance(texto, str):
+        return ""
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore")
+    return _ESPACOS.sub(" ", sem_acentos.decode("ascii")).strip().lower()
+
+
+def trigramas(texto_normalizado: str) -> List[str]:
+    return sorted(
+        {texto_normalizado[i : i + 3] for i in range(len(texto_normalizado) - 2)}
+    )
+
+
+def normalizar_busca_serie(serie: pd.Series) -> pd.Series:
+    return (
+        serie.fillna("")
+        .astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def por_valor_distinto(
+    serie: pd.Series, funcao: Callable[[pd.Series], pd.Series]
+) -> pd.Series:
+    # Fontes se repetem muito nos extratos: aplica a função (vetorizada) uma
+    # vez por valor distinto e espalha o resultado pelas linhas
+    codigos, unicos = pd.factorize(serie.fillna(""))
+    calculados = funcao(pd.Series(unicos, dtype=object))
+    return pd.Series(
+        calculados.to_numpy()[codigos] if len(unicos) else [],
+        index=serie.index,
+        dtype=object,
+    )
+
+
+def trigramas_serie(serie_normalizada: pd.Series) -> pd.Series:
+    return por_valor_distinto(serie_normalizada, lambda unicos: unicos.map(trigramas))
@@ -2,9 +2,11 @@ import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from utils.settings import SECRET_KEY_JWT
+from app.services.usuario import UsuarioService
 
 
 token_auth_scheme = HTTPBearer()
+usuario_service = UsuarioService()
 
 
 def validador_rota(
@@ -25,3 +27,15 @@ def validador_rota(
         )
 
     return decoded_token
+
+
+async def usuario_autenticado(decoded_token: dict = Depends(validador_rota)):
+    # Decodifica o token uma vez por requisição (o FastAPI reaproveita o
+    # resultado entre dependências) e resolve o usuário pelo cache
+    usuario = await usuario_service.decodificar_token(decoded_token)
+    if not usuario:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"error": "Usuário não autenticado!"},
+        )
+    return usuario
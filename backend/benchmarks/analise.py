@@ -0,0 +1,149 @@
+# Mede o cálculo de séries, médias móveis e variações de
+# app/services/analise.py sobre N anos de resumos mensais, contra um laço
+# em Python puro que percorre mês a mês.
+#
+# Uso: python benchmarks/analise.py
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.models.balanco import MESES  # noqa: E402
+from app.services.analise import JANELAS, SERIES, calcular_analise  # noqa: E402
+from utils.dinheiro import CENTAVOS  # noqa: E402
+
+ANOS = [1, 5, 20]
+CATEGORIAS = 30
+REPETICOES = 50
+
+
+def gerar_resumos(anos: int) -> list:
+    rng = np.random.default_rng(42)
+    resumos = []
+    for ano in range(2024 - anos + 1, 2025):
+        for mes in MESES:
+            # Em centavos, como em balanco_resumo
+            saidas = rng.integers(0, 50_000, CATEGORIAS)
+            entradas = int(rng.integers(300_000, 800_000))
+            resumos.append(
+                {
+                    "ano": ano,
+                    "mes": mes,
+                    "entradas": entradas,
+                    "saidas": int(saidas.sum()),
+                    "liquido": entradas - int(saidas.sum()),
+                    "categorias": {
+                        f"Categoria {i}": {"entradas": 0, "saidas": int(v)}
+                        for i, v in enumerate(saidas)
+                    },
+                }
+            )
+    return resumos
+
+
+def _reais(valor):
+    return None if valor is None else round(valor / CENTAVOS, 2)
+
+
+def _medias(valores: list, janela: int) -> list:
+    medias, soma = [], 0
+    for i, valor in enumerate(valores):
+        soma += valor
+        if i >= janela:
+            soma -= valores[i - janela]
+        medias.append(soma / janela if i >= janela - 1 else None)
+    return medias
+
+
+def _variacao(valores: list, defasagem: int) -> list:
+    return [
+        valores[i] - valores[i - defasagem] if i >= defasagem else None
+        for i in range(len(valores))
+    ]
+
+
+def analise_por_laco(resumos: list) -> dict:
+    # Mesma saída de calcular_analise, montada mês a mês em Python puro
+    resumos = [r for r in resumos if r.get("mes") in MESES and r.get("ano")]
+    posicoes = [r["ano"] * 12 + MESES.index(r["mes"]) for r in resumos]
+    inicio = min(posicoes)
+    meses = max(posicoes) - inicio + 1
+
+    series = {c: [0] * meses for c in SERIES}
+    categorias = {}
+    for r, posicao in zip(resumos, posicoes):
+        i = posicao - inicio
+        for c in SERIES:
+            series[c][i] += round(r.get(c) or 0)
+        for categoria, detalhe in (r.get("categorias") or {}).items():
+            mensal = categorias.setdefault(categoria, [0] * meses)
+            mensal[i] += round(detalhe.get("saidas") or 0)
+    saidas = series["saidas"]
+
+    return {
+        "periodos": [
+            {"ano": p // 12, "mes": MESES[p % 12]}
+            for p in range(inicio, inicio + meses)
+        ],
+        "series": {c: [_reais(v) for v in series[c]] for c in SERIES},
+        "medias_moveis": {
+            str(janela): {
+                c: [_reais(v) for v in _medias(series[c], janela)] for c in SERIES
+            }
+            for janela in JANELAS
+        },
+        "variacao_mensal": {
+            c: [_reais(v) for v in _variacao(series[c], 1)] for c in SERIES
+        },
+        "variacao_anual": {
+            c: [_reais(v) for v in _variacao(series[c], 12)] for c in SERIES
+        },
+        "participacao_categorias": {
+            categoria: [
+                round(v / saidas[i], 2) if saidas[i] > 0 else None
+                for i, v in enumerate(mensal)
+            ]
+            for categoria, mensal in categorias.items()
+        },
+    }
+
+
+def diferenca(a, b) -> float:
+    # Maior diferença entre as duas saídas; round() do Python e np.round podem
+    # divergir na última casa decimal
+    if isinstance(a, dict):
+        assert a.keys() == b.keys()
+        return max([diferenca(a[k], b[k]) for k in a] or [0.0])
+    if isinstance(a, list):
+        assert len(a) == len(b)
+        return max([diferenca(x, y) for x, y in zip(a, b)] or [0.0])
+    if isinstance(a, float) or isinstance(b, float):
+        assert (a is None) == (b is None)
+        return abs(a - b)
+    assert a == b
+    return 0.0
+
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(*args)
+    return (time.perf_counter() - inicio) / REPETICOES * 1000
+
+
+def main():
+    print(f"{'anos':>6}{'laço (ms)':>14}{'numpy (ms)':>14}")
+    for anos in ANOS:
+        resumos = gerar_resumos(anos)
+        assert diferenca(analise_por_laco(resumos), calcular_analise(resumos)) < 0.011
+        laco = medir(analise_por_laco, resumos)
+        vetorizado = medir(calcular_analise, resumos)
+        print(f"{anos:>6}{laco:>14.2f}{vetorizado:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
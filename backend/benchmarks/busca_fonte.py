@@ -0,0 +1,82 @@
+# Mede a latência da busca por fonte em 1M de lançamentos: $regex sem
+# âncora com "i" (antigo) contra prefixo, trigramas e índice de texto.
+#
+# Uso: MONGO_URL=mongodb://localhost:27017 python benchmarks/busca_fonte.py
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+os.environ.setdefault("MONGO_ENVIROMENT", "benchmark_controle_financeiro")
+
+from app.services.balanco import BalancoService, campos_busca  # noqa: E402
+from database.indices import criar_indices  # noqa: E402
+
+QUANTIDADE = int(os.getenv("QUANTIDADE", "1000000"))
+USUARIO = {"info": {"id": "benchmark-busca"}}
+PREFIXOS = ["Supermercado", "Padaria", "Posto", "Farmácia", "Restaurante", "Loja"]
+NOMES = ["São João", "Central", "Bom Preço", "Avenida", "da Esquina", "Irmãos"]
+TERMOS = ["super", "preço", "esquina", "farmacia central"]
+
+
+async def popular(service: BalancoService) -> None:
+    colecao = service.db_connection._connection["balanco"]
+    await colecao.delete_many({"usuario_id": USUARIO["info"]["id"]})
+    aleatorio = random.Random(42)
+    lote = []
+    for i in range(QUANTIDADE):
+        fonte = f"{aleatorio.choice(PREFIXOS)} {aleatorio.choice(NOMES)} {i % 997}"
+        lote.append(
+            {
+                "id": f"busca-{i}",
+                "usuario_id": USUARIO["info"]["id"],
+                "fonte": fonte,
+                "valor": 1000,
+                "criado_em": f"2025-01-01T00:00:{i:07d}",
+                **campos_busca(fonte),
+            }
+        )
+        if len(lote) == 10_000:
+            await colecao.insert_many(lote)
+            lote = []
+    if lote:
+        await colecao.insert_many(lote)
+
+
+async def medir(service: BalancoService, filtros: dict) -> float:
+    inicio = time.perf_counter()
+    await service.listar_balanco(filtros, limite=100).to_list(None)
+    return (time.perf_counter() - inicio) * 1000
+
+
+async def main():
+    service = BalancoService()
+    await criar_indices(service.db_connection)
+    await popular(service)
+
+    print(f"{'termo':<20}{'regex i (ms)':>14}{'prefixo':>10}{'contem':>10}{'texto':>10}")
+    for termo in TERMOS:
+        antigo = {
+            "usuario_id": USUARIO["info"]["id"],
+            "fonte": {"$regex": termo, "$options": "i"},
+        }
+        tempos = [await medir(service, antigo)]
+        for busca in ["prefixo", "contem", "texto"]:
+            filtros = service.montar_filtros(USUARIO, fonte=termo, busca=busca)
+            tempos.append(await medir(service, filtros))
+        print(
+            f"{termo:<20}{tempos[0]:>14.1f}"
+            + "".join(f"{t:>10.1f}" for t in tempos[1:])
+        )
+
+    await service.db_connection._connection["balanco"].delete_many(
+        {"usuario_id": USUARIO["info"]["id"]}
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
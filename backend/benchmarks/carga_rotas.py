@@ -0,0 +1,71 @@
+# Mede requisições por segundo das rotas de leitura com 50, 200 e 1000
+# clientes simultâneos, para comparar a camada síncrona com a assíncrona.
+#
+# Requer httpx e uma API rodando:
+#   API_URL=http://localhost API_TOKEN=<jwt> python benchmarks/carga_rotas.py
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+API_URL = os.getenv("API_URL", "http://localhost")
+API_TOKEN = os.getenv("API_TOKEN", "")
+DURACAO = float(os.getenv("DURACAO", "10"))
+CONCORRENCIAS = [50, 200, 1000]
+ROTAS = [
+    ("/me", {}),
+    ("/balance/", {"ano": 2025, "limite": 50}),
+    ("/balance/resumo_mensal", {"ano": 2025}),
+]
+
+
+async def cliente_virtual(cliente: httpx.AsyncClient, fim: float, rota, params):
+    latencias, erros = [], 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        try:
+            resposta = await cliente.get(rota, params=params)
+            if resposta.status_code >= 400:
+                erros += 1
+        except httpx.HTTPError:
+            erros += 1
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias, erros
+
+
+async def medir(rota: str, params: dict, concorrencia: int) -> None:
+    cabecalhos = {"Authorization": f"Bearer {API_TOKEN}"}
+    limites = httpx.Limits(max_connections=concorrencia)
+    async with httpx.AsyncClient(
+        base_url=API_URL, headers=cabecalhos, limits=limites, timeout=60
+    ) as cliente:
+        fim = time.perf_counter() + DURACAO
+        resultados = await asyncio.gather(
+            *[
+                cliente_virtual(cliente, fim, rota, params)
+                for _ in range(concorrencia)
+            ]
+        )
+    latencias = sorted(l for r, _ in resultados for l in r)
+    erros = sum(e for _, e in resultados)
+    p95 = latencias[int(len(latencias) * 0.95) - 1] if latencias else 0.0
+    mediana = statistics.median(latencias) if latencias else 0.0
+    print(
+        f"{rota:<24}{concorrencia:>6}{len(latencias) / DURACAO:>10.0f} req/s "
+        f"p50={mediana:8.1f} ms p95={p95:8.1f} ms erros={erros}"
+    )
+
+
+async def main():
+    if not API_TOKEN:
+        sys.exit("Defina API_TOKEN com um JWT válido")
+    for rota, params in ROTAS:
+        for concorrencia in CONCORRENCIAS:
+            await medir(rota, params, concorrencia)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
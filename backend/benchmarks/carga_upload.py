@@ -0,0 +1,82 @@
+# Mede a latência de GET /balance/ antes e durante importações simultâneas
+# em POST /balance/upload (acompanhadas em /imports), para confirmar que o
+# event loop não trava.
+#
+# Requer httpx e uma API rodando:
+#   API_URL=http://localhost API_TOKEN=<jwt> python benchmarks/carga_upload.py
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from upload_csv import gerar_dataframe
+
+API_URL = os.getenv("API_URL", "http://localhost")
+API_TOKEN = os.getenv("API_TOKEN", "")
+LINHAS_POR_ARQUIVO = int(os.getenv("LINHAS_POR_ARQUIVO", "200000"))
+IMPORTACOES = int(os.getenv("IMPORTACOES", "2"))
+AMOSTRAS = int(os.getenv("AMOSTRAS", "50"))
+
+
+async def medir_listagem(cliente: httpx.AsyncClient, amostras: int) -> list:
+    latencias = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        resposta = await cliente.get("/balance/", params={"ano": 1900})
+        resposta.raise_for_status()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        await asyncio.sleep(0.05)
+    return latencias
+
+
+async def importar(cliente: httpx.AsyncClient, conteudo: bytes) -> float:
+    inicio = time.perf_counter()
+    resposta = await cliente.post(
+        "/balance/upload",
+        files={"file": ("fatura.csv", conteudo, "text/csv")},
+        data={"tipo_arquivo": "fatura_nubank", "mes": "Janeiro", "ano": "1900"},
+        timeout=None,
+    )
+    resposta.raise_for_status()
+    # O upload só enfileira a importação; acompanha o job até terminar
+    job_id = resposta.json()["job_id"]
+    while True:
+        job = (await cliente.get(f"/imports/{job_id}")).json()
+        if job["status"] in ("concluido", "erro"):
+            return time.perf_counter() - inicio
+        await asyncio.sleep(0.5)
+
+
+def resumir(nome: str, latencias: list) -> None:
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+    print(
+        f"{nome:<22} p50={statistics.median(ordenadas):8.1f} ms "
+        f"p95={p95:8.1f} ms max={ordenadas[-1]:8.1f} ms"
+    )
+
+
+async def main():
+    if not API_TOKEN:
+        sys.exit("Defina API_TOKEN com um JWT válido")
+
+    conteudo = gerar_dataframe("fatura_nubank", LINHAS_POR_ARQUIVO).to_csv(index=False)
+    cabecalhos = {"Authorization": f"Bearer {API_TOKEN}"}
+    async with httpx.AsyncClient(base_url=API_URL, headers=cabecalhos) as cliente:
+        resumir("sem importação", await medir_listagem(cliente, AMOSTRAS))
+
+        importacoes = [
+            asyncio.create_task(importar(cliente, conteudo.encode()))
+            for _ in range(IMPORTACOES)
+        ]
+        await asyncio.sleep(0.5)
+        resumir(f"{IMPORTACOES} importações", await medir_listagem(cliente, AMOSTRAS))
+        duracoes = await asyncio.gather(*importacoes)
+        print(f"importações concluídas em {max(duracoes):.1f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+# Mede a vazão do motor de regras de categoria (regras x linhas): laço por
+# linha testando cada regra contra a aplicação vetorizada de
+# app/services/categorizacao.py.
+#
+# Uso: python benchmarks/categorizacao.py
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.services.categorizacao import categorizar, compilar_regras  # noqa: E402
+from utils.texto import normalizar_busca_serie  # noqa: E402
+
+LINHAS = [10_000, 100_000, 1_000_000]
+REGRAS = [10, 100, 500]
+FONTES_DISTINTAS = 2_000
+LIMITE_LACO = 100_000  # o laço por linha fica lento demais acima disso
+
+
+def gerar_regras(quantidade: int) -> list:
+    modos = ["contem", "prefixo", "regex"]
+    return [
+        {
+            "categoria": f"Categoria {i}",
+            "fonte": f"loja {i}" if i % 3 != 2 else rf"loja {i}\b",
+            "modo": modos[i % 3],
+            # Em centavos, como em regras_categoria
+            "valor_max": 50_000 if i % 5 == 0 else None,
+            "prioridade": quantidade - i,
+        }
+        for i in range(quantidade)
+    ]
+
+
+def gerar_dataframe(linhas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    fontes = np.array([f"Loja {i} Centro" for i in range(FONTES_DISTINTAS)])
+    df = pd.DataFrame(
+        {
+            "fonte": fontes[rng.integers(0, FONTES_DISTINTAS, linhas)],
+            "valor": rng.integers(100, 100_000, linhas),
+            "tag": "Nubank Cartão",
+            "categoria": "Outros",
+        }
+    )
+    df["fonte_busca"] = normalizar_busca_serie(df["fonte"])
+    return df
+
+
+def categorizar_por_linha(df: pd.DataFrame, regras: list) -> list:
+    categorias = []
+    for linha in df.itertuples(index=False):
+        categoria = linha.categoria
+        for regra in regras:
+            alvo = linha.fonte if regra["campo"] == "fonte" else linha.fonte_busca
+            if regra["padrao"] is not None and not regra["padrao"].search(alvo):
+                continue
+            if regra["valor_max"] is not None and linha.valor > regra["valor_max"]:
+                continue
+            categoria = regra["categoria"]
+            break
+        categorias.append(categoria)
+    return categorias
+
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    print(f"{'regras':>8}{'linhas':>12}{'por linha (s)':>16}{'vetorizado (s)':>16}")
+    for quantidade in REGRAS:
+        regras = compilar_regras(gerar_regras(quantidade))
+        for linhas in LINHAS:
+            df = gerar_dataframe(linhas)
+            vetorizado = medir(categorizar, df, regras)
+            por_linha = (
+                f"{medir(categorizar_por_linha, df, regras):>16.2f}"
+                if linhas <= LIMITE_LACO
+                else f"{'-':>16}"
+            )
+            print(f"{quantidade:>8}{linhas:>12}{por_linha}{vetorizado:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
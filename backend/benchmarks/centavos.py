@@ -0,0 +1,95 @@
+# Compara valores em reais (float64) com centavos inteiros (int64), como
+# gravados agora em balanco: conversão do texto "R$ -1.234,56" dos extratos,
+# soma de milhões de lançamentos (tempo e erro em relação à soma exata) e
+# tamanho do documento BSON.
+#
+# Uso: python benchmarks/centavos.py [linhas]
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import bson
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from utils.dinheiro import CENTAVOS, texto_para_centavos  # noqa: E402
+
+LINHAS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+LINHAS_TEXTO = min(LINHAS, 1_000_000)
+REPETICOES = 5
+
+
+def medir(funcao, *args, repeticoes: int = REPETICOES):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000, resultado
+
+
+def texto_brl(centavos: np.ndarray) -> pd.Series:
+    reais = pd.Series(np.abs(centavos) // CENTAVOS).map("{:,}".format)
+    fracao = pd.Series(np.abs(centavos) % CENTAVOS).map("{:02d}".format)
+    sinal = np.where(centavos < 0, "-", "")
+    return sinal + reais.str.replace(",", ".", regex=False) + "," + fracao
+
+
+def reais_por_float(texto: pd.Series) -> pd.Series:
+    # Caminho anterior: troca os separadores e converte para float
+    texto = texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto.replace("", "0"), errors="coerce")
+
+
+def centavos_por_texto(texto: pd.Series) -> pd.Series:
+    return texto_para_centavos(texto.str.replace(".", "", regex=False), decimal=",")
+
+
+def main():
+    rng = np.random.default_rng(42)
+    centavos = rng.integers(-500_000, 500_000, LINHAS, dtype=np.int64)
+    exato = int(centavos.sum())
+
+    texto = texto_brl(centavos[:LINHAS_TEXTO])
+    tempo_float, reais = medir(reais_por_float, texto, repeticoes=1)
+    tempo_int, convertidos = medir(centavos_por_texto, texto, repeticoes=1)
+    assert (convertidos.to_numpy(dtype=np.int64) == centavos[:LINHAS_TEXTO]).all()
+    print(f"conversão de {LINHAS_TEXTO} textos BRL")
+    print(f"{'float64 (ms)':>16}{'int64 (ms)':>14}")
+    print(f"{tempo_float:>16.1f}{tempo_int:>14.1f}")
+
+    # Soma sequencial (como o $sum do Mongo e o laço de agregação) e a soma
+    # pairwise do NumPy, que acumula menos erro mas também não é exata
+    valores = centavos / CENTAVOS
+    print(f"\nsoma de {LINHAS} lançamentos (exata: {Decimal(exato) / CENTAVOS})")
+    print(f"{'método':>22}{'tempo (ms)':>12}{'erro (R$)':>14}")
+    for nome, funcao, dados in [
+        ("float64 sequencial", np.cumsum, valores),
+        ("float64 numpy.sum", np.sum, valores),
+        ("int64 sequencial", np.cumsum, centavos),
+        ("int64 numpy.sum", np.sum, centavos),
+    ]:
+        tempo, soma = medir(funcao, dados)
+        soma = soma[-1] if np.ndim(soma) else soma
+        if dados.dtype == np.int64:
+            erro = Decimal(int(soma) - exato) / CENTAVOS
+        else:
+            erro = Decimal(float(soma)) - Decimal(exato) / CENTAVOS
+        print(f"{nome:>22}{tempo:>12.1f}{float(erro):>14.2e}")
+
+    documento = {"valor": 1234.56, "ano": 2024}
+    print("\ntamanho BSON do campo valor (documento de exemplo, bytes)")
+    print(f"{'float64':>10}{'int32':>8}{'int64':>8}")
+    print(
+        f"{len(bson.encode(documento)):>10}"
+        f"{len(bson.encode({**documento, 'valor': 123456})):>8}"
+        f"{len(bson.encode({**documento, 'valor': bson.Int64(123456)})):>8}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Mede tempo e pico de memória da exportação (app/services/exportacao.py) a
+# partir de um cursor sintético de 1M de linhas, e falha se o pico passar de
+# LIMITE_MB: a memória deve depender do tamanho do lote, não do total.
+#
+# Uso: python benchmarks/exportacao.py [linhas]
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.services.exportacao import (  # noqa: E402
+    EXPORTADORES,
+    pa,
+    verificar_formato,
+)
+from utils.executores import encerrar_executores  # noqa: E402
+
+LINHAS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+# O openpyxl é bem mais lento; o xlsx usa uma amostra menor. Os tempos
+# incluem o custo do tracemalloc e servem só para comparação entre formatos
+LINHAS_XLSX = min(LINHAS, 20_000)
+LIMITE_MB = 64
+COLUNAS = [
+    "id",
+    "fonte",
+    "valor",
+    "mes",
+    "ano",
+    "tipo",
+    "tag",
+    "categoria",
+    "observacao",
+    "data",
+    "criado_em",
+]
+
+
+async def cursor_sintetico(linhas: int):
+    meses = ["Janeiro", "Fevereiro", "Março", "Abril"]
+    for i in range(linhas):
+        yield {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "fonte": f"Compra no estabelecimento {i % 5000}",
+            "valor": (i % 10000) / 7,
+            "mes": meses[i % 4],
+            "ano": 2020 + i % 5,
+            "tipo": "Saída" if i % 3 else "Entrada",
+            "tag": "Nubank Cartão",
+            "categoria": "Outros",
+            "observacao": None,
+            "data": "01/01/2024",
+            "criado_em": "2024-01-01T00:00:00",
+        }
+
+
+async def exportar(formato: str, linhas: int) -> int:
+    total = 0
+    async for bloco in EXPORTADORES[formato](cursor_sintetico(linhas), COLUNAS):
+        total += len(bloco)
+    return total
+
+
+def medir(formato: str, linhas: int) -> tuple:
+    if pa is not None:
+        pa.default_memory_pool().release_unused()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    tamanho = asyncio.run(exportar(formato, linhas))
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Buffers do Arrow não passam pelo alocador do Python
+    if pa is not None:
+        pico += pa.default_memory_pool().max_memory() or 0
+    return duracao, tamanho / 1024**2, pico / 1024**2
+
+
+def main():
+    print(
+        f"{'formato':>8}{'linhas':>10}{'tempo (s)':>12}"
+        f"{'arquivo (MB)':>14}{'pico (MB)':>12}"
+    )
+    excedeu = False
+    for formato in EXPORTADORES:
+        if verificar_formato(formato):
+            print(f"{formato:>8}  {verificar_formato(formato)}")
+            continue
+        linhas = LINHAS_XLSX if formato == "xlsx" else LINHAS
+        duracao, tamanho, pico = medir(formato, linhas)
+        excedeu |= pico > LIMITE_MB
+        print(f"{formato:>8}{linhas:>10}{duracao:>12.2f}{tamanho:>14.1f}{pico:>12.1f}")
+    encerrar_executores()
+    if excedeu:
+        sys.exit(f"Pico de memória acima de {LIMITE_MB} MB")
+
+
+if __name__ == "__main__":
+    main()
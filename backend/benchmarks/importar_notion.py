@@ -0,0 +1,76 @@
+# Compara a importação de um export do Notion com 50k linhas gravando um
+# documento por vez (criar_balanco) e em lote (criar_balancos_em_lote).
+#
+# Uso: MONGO_URL=mongodb://localhost:27017 python benchmarks/importar_notion.py
+import asyncio
+import io
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+os.environ.setdefault("MONGO_ENVIROMENT", "benchmark_controle_financeiro")
+
+from app.services.balanco import BalancoService  # noqa: E402
+from app.services.importacao_notion import MAPPING_MESES, parse_csv  # noqa: E402
+from database.indices import criar_indices  # noqa: E402
+
+LINHAS = int(os.getenv("LINHAS", "50000"))
+USUARIO = {"info": {"id": "benchmark-notion"}}
+
+
+def gerar_export(linhas: int) -> bytes:
+    aleatorio = random.Random(42)
+    meses = list(MAPPING_MESES)
+    df = pd.DataFrame(
+        {
+            "Source": [f"Fonte {aleatorio.randint(1, 500)}" for _ in range(linhas)],
+            "Month": [f"{aleatorio.choice(meses)} 2025" for _ in range(linhas)],
+            "Amount": [f"R${aleatorio.uniform(1, 5000):,.2f}" for _ in range(linhas)],
+            "Tags": "Inter PF",
+            "Obs": "",
+        }
+    )
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode()
+
+
+async def limpar(service: BalancoService) -> None:
+    for collection in ["balanco", "balanco_resumo"]:
+        await service.db_connection._connection[collection].delete_many(
+            {"usuario_id": USUARIO["info"]["id"]}
+        )
+
+
+async def main():
+    service = BalancoService()
+    await criar_indices(service.db_connection)
+    conteudo = gerar_export(LINHAS)
+
+    await limpar(service)
+    registros, _ = parse_csv(conteudo, tipo="Saída")
+    inicio = time.perf_counter()
+    for registro in registros:
+        await service.criar_balanco(registro, USUARIO)
+    um_a_um = time.perf_counter() - inicio
+
+    await limpar(service)
+    registros, _ = parse_csv(conteudo, tipo="Saída")
+    inicio = time.perf_counter()
+    resultado = await service.criar_balancos_em_lote(registros, USUARIO)
+    em_lote = time.perf_counter() - inicio
+    await limpar(service)
+
+    print(f"linhas: {len(registros)} (falhas no lote: {len(resultado['falhas'])})")
+    print(f"um a um: {um_a_um:8.2f} s ({len(registros) / um_a_um:10,.0f} linhas/s)")
+    print(f"em lote: {em_lote:8.2f} s ({len(registros) / em_lote:10,.0f} linhas/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
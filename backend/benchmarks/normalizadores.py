@@ -0,0 +1,90 @@
+# Micro-benchmarks dos normalizadores de descrição: implementação antiga
+# (replace encadeado / laço por linha) contra as tabelas compiladas e a
+# memoização por valor distinto de app/services/importacao.py.
+#
+# Uso: python benchmarks/normalizadores.py [linhas ...]
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.services.importacao import (  # noqa: E402
+    NOMES_TITULAR_NUBANK,
+    _extrair_nome_nubank,
+    _tratar_title_fatura_nubank,
+)
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+COMERCIANTES = 500
+
+
+def titulo_antigo(title: pd.Series) -> pd.Series:
+    return (
+        title.str.partition("-")[0]
+        .str.replace("*3", " ", regex=False)
+        .str.replace("Ebn*", "", regex=False)
+        .str.replace("Hotmart*", "", regex=False)
+        .str.replace("Htm*", "", regex=False)
+        .str.replace("Unicef*", "", regex=False)
+        .str.replace('"', "", regex=False)
+        .str.replace("*", " ", regex=False)
+        .str.strip()
+    )
+
+
+def nome_antigo(desc: pd.Series) -> pd.Series:
+    def extrair(d):
+        partes = d.split("-")
+        for p in partes:
+            if any(n in p.lower() for n in NOMES_TITULAR_NUBANK):
+                return p.strip()
+        return (partes[1] if len(partes) > 1 else partes[0]).strip()
+
+    return desc.map(extrair)
+
+
+def gerar_series(linhas: int) -> tuple:
+    rng = np.random.default_rng(42)
+    indices = rng.integers(0, COMERCIANTES, linhas)
+    prefixos = np.array(["Ebn*", "Hotmart*", "Htm*", "", "Ifood*3"])
+    titulos = pd.Series(
+        [f'{prefixos[i % 5]}Loja "{i}" - Parcela 1/3' for i in indices]
+    )
+    descricoes = pd.Series(
+        [f"Transferência enviada pelo Pix - Comércio {i} - 000{i}" for i in indices]
+    )
+    return titulos, descricoes
+
+
+def medir(funcao, *args, repeticoes: int = 3) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def main():
+    tamanhos = [int(a) for a in sys.argv[1:]] or TAMANHOS_PADRAO
+    print(f"{'normalizador':<22}{'linhas':>10}{'antigo (ms)':>14}{'novo (ms)':>12}")
+    for linhas in tamanhos:
+        titulos, descricoes = gerar_series(linhas)
+        casos = [
+            ("title fatura", titulo_antigo, _tratar_title_fatura_nubank, titulos),
+            ("nome extrato", nome_antigo, _extrair_nome_nubank, descricoes),
+        ]
+        for nome, antigo, novo, serie in casos:
+            print(
+                f"{nome:<22}{linhas:>10}{medir(antigo, serie):>14.1f}"
+                f"{medir(novo, serie):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Mede a projeção de fluxo de caixa de app/services/analise.py (regras x
+# meses em NumPy) contra a expansão mês a mês de cada regra em Python puro.
+#
+# Uso: python benchmarks/projecao.py
+import sys
+import time
+from calendar import monthrange
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.services.analise import calcular_projecao  # noqa: E402
+
+REGRAS = [10, 100, 500]
+HORIZONTES = [12, 60, 120]
+REPETICOES = 10
+
+
+def gerar_recorrentes(quantidade: int) -> list:
+    rng = np.random.default_rng(42)
+    return [
+        {
+            "descricao": f"Recorrente {i}",
+            "tipo": "Entrada" if i % 5 == 0 else "Saída",
+            # Em centavos, como em transacoes_recorrentes
+            "valor": int(rng.integers(1_000, 200_000)),
+            "dia": int(rng.integers(1, 32)),
+            "categoria": f"Categoria {i % 25}",
+            "inicio": "2020-01-01",
+            "fim": "2040-12-31" if i % 3 == 0 else None,
+        }
+        for i in range(quantidade)
+    ]
+
+
+def projecao_por_laco(recorrentes: list, inicio: date, meses: int) -> dict:
+    saidas = [0] * meses
+    entradas = [0] * meses
+    categorias = {}
+    fim_padrao = date.max.isoformat()
+    for r in recorrentes:
+        for i in range(meses):
+            ano, mes = divmod(inicio.year * 12 + inicio.month - 1 + i, 12)
+            dia = min(r["dia"], monthrange(ano, mes + 1)[1])
+            data = date(ano, mes + 1, dia).isoformat()
+            if not r["inicio"] <= data <= (r["fim"] or fim_padrao):
+                continue
+            if r["tipo"] == "Entrada":
+                entradas[i] += r["valor"]
+            else:
+                saidas[i] += r["valor"]
+                categorias.setdefault(r["categoria"], [0] * meses)[i] += r["valor"]
+    return {"entradas": entradas, "saidas": saidas, "categorias": categorias}
+
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(*args)
+    return (time.perf_counter() - inicio) / REPETICOES * 1000
+
+
+def main():
+    hoje = date.today()
+    print(f"{'regras':>8}{'meses':>8}{'laço (ms)':>14}{'numpy (ms)':>14}")
+    for quantidade in REGRAS:
+        recorrentes = gerar_recorrentes(quantidade)
+        for meses in HORIZONTES:
+            laco = medir(projecao_por_laco, recorrentes, hoje, meses)
+            vetorizado = medir(calcular_projecao, recorrentes, [], hoje, meses)
+            print(f"{quantidade:>8}{meses:>8}{laco:>14.2f}{vetorizado:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
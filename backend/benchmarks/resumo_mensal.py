@@ -0,0 +1,98 @@
+# Compara o resumo mensal somado em Python (find + laço) com o pipeline
+# $match/$group executado no Mongo, em bases de 10k, 100k e 1M documentos.
+#
+# Uso: MONGO_URL=mongodb://localhost:27017 python benchmarks/resumo_mensal.py
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+os.environ.setdefault("MONGO_ENVIROMENT", "benchmark_controle_financeiro")
+
+from app.models.balanco import MESES  # noqa: E402
+from app.services.balanco import BalancoService  # noqa: E402
+from database.indices import criar_indices  # noqa: E402
+
+TAMANHOS = [10_000, 100_000, 1_000_000]
+USUARIO = {"info": {"id": "benchmark"}}
+ANO = 2025
+
+
+async def popular(service: BalancoService, quantidade: int) -> None:
+    colecao = service.db_connection._connection["balanco"]
+    await colecao.delete_many({"usuario_id": USUARIO["info"]["id"]})
+    aleatorio = random.Random(42)
+    lote = []
+    for i in range(quantidade):
+        lote.append(
+            {
+                "id": f"bench-{i}",
+                "usuario_id": USUARIO["info"]["id"],
+                "ano": ANO,
+                "mes": aleatorio.choice(MESES),
+                "tipo": aleatorio.choice(["Entrada", "Saída"]),
+                "valor": aleatorio.randint(100, 100_000),
+                "categoria": aleatorio.choice(["Mercado", "Transporte", "Lazer"]),
+                "tag": aleatorio.choice(["Inter PF", "Nubank PF"]),
+                "fonte": "benchmark",
+            }
+        )
+        if len(lote) == 10_000:
+            await colecao.insert_many(lote)
+            lote = []
+    if lote:
+        await colecao.insert_many(lote)
+
+
+async def resumo_em_python(service: BalancoService) -> dict:
+    registros = await service.db_connection.find(
+        "balanco", {"usuario_id": USUARIO["info"]["id"], "ano": ANO}, {"_id": 0}
+    )
+    resumo = {mes: {"entradas": 0, "saidas": 0, "liquido": 0} for mes in MESES}
+    for r in registros:
+        if r["tipo"] == "Entrada":
+            resumo[r["mes"]]["entradas"] += r["valor"]
+        else:
+            resumo[r["mes"]]["saidas"] += r["valor"]
+    return resumo
+
+
+async def medir(funcao, *args, repeticoes: int = 3) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        await funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+async def main():
+    service = BalancoService()
+    await criar_indices(service.db_connection)
+    print(
+        f"{'documentos':>12}{'python (ms)':>14}{'aggregate (ms)':>16}"
+        f"{'+detalhes (ms)':>16}{'materializado (ms)':>20}"
+    )
+    for quantidade in TAMANHOS:
+        await popular(service, quantidade)
+        python = await medir(resumo_em_python, service)
+        agregado = await medir(service.resumo_agregado, USUARIO, ANO)
+        detalhado = await medir(service.resumo_agregado, USUARIO, ANO, True, True)
+        await service.reconstruir_resumo(USUARIO["info"]["id"])
+        materializado = await medir(service.resumo_mensal, USUARIO, ANO, True, True)
+        print(
+            f"{quantidade:>12}{python:>14.1f}{agregado:>16.1f}"
+            f"{detalhado:>16.1f}{materializado:>20.1f}"
+        )
+    for collection in ["balanco", "balanco_resumo", "balanco_resumo_controle"]:
+        await service.db_connection._connection[collection].delete_many(
+            {"usuario_id": USUARIO["info"]["id"]}
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+# Compara o relatório agrupado (fonte/categoria/tag/mes) feito por $group no
+# Mongo com o mesmo agrupamento em Arrow sobre o snapshot colunar mapeado em
+# memória, em bases de 100k e 1M documentos. Mede também a construção
+# completa do snapshot e a atualização incremental após 1.000 alterações.
+#
+# Uso: MONGO_URL=mongodb://localhost:27017 python benchmarks/snapshot.py
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+os.environ.setdefault("MONGO_ENVIROMENT", "benchmark_controle_financeiro")
+os.environ.setdefault("SNAPSHOT_DIRETORIO", "/tmp/benchmark_snapshots")
+
+from app.models.balanco import MESES  # noqa: E402
+from app.services.balanco import BalancoService  # noqa: E402
+from app.services.snapshot import SnapshotService, caminho_snapshot  # noqa: E402
+from database.indices import criar_indices  # noqa: E402
+from utils.executores import encerrar_executores  # noqa: E402
+
+TAMANHOS = [100_000, 1_000_000]
+ALTERACOES = 1_000
+AGRUPAMENTOS = [["categoria"], ["ano", "mes", "tipo"], ["fonte", "tag"]]
+USUARIO = {"info": {"id": "benchmark"}}
+
+
+async def popular(service: BalancoService, quantidade: int) -> None:
+    # Vários anos de histórico, com 2.000 fontes distintas
+    colecao = service.db_connection._connection["balanco"]
+    await colecao.delete_many({"usuario_id": USUARIO["info"]["id"]})
+    aleatorio = random.Random(42)
+    agora = datetime.now().isoformat()
+    lote = []
+    for i in range(quantidade):
+        lote.append(
+            {
+                "id": f"bench-{i}",
+                "usuario_id": USUARIO["info"]["id"],
+                "ano": aleatorio.randint(2015, 2025),
+                "mes": aleatorio.choice(MESES),
+                "tipo": aleatorio.choice(["Entrada", "Saída"]),
+                "valor": aleatorio.randint(100, 100_000),
+                "categoria": aleatorio.choice(["Mercado", "Transporte", "Lazer"]),
+                "tag": aleatorio.choice(["Inter PF", "Nubank PF"]),
+                "fonte": f"Estabelecimento {aleatorio.randrange(2000)}",
+                "criado_em": agora,
+                "atualizado_em": agora,
+            }
+        )
+        if len(lote) == 10_000:
+            await colecao.insert_many(lote)
+            lote = []
+    if lote:
+        await colecao.insert_many(lote)
+
+
+async def medir(funcao, *args, repeticoes: int = 3) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        await funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+async def alterar(service: BalancoService, quantidade: int) -> None:
+    colecao = service.db_connection._connection["balanco"]
+    await colecao.update_many(
+        {"id": {"$in": [f"bench-{i}" for i in range(quantidade)]}},
+        {"$set": {"valor": 100, "atualizado_em": datetime.now().isoformat()}},
+    )
+
+
+async def main():
+    service = BalancoService()
+    snapshot = SnapshotService(service.db_connection)
+    await criar_indices(service.db_connection)
+    print(
+        f"{'documentos':>12}{'agrupar por':>16}{'aggregate (ms)':>16}"
+        f"{'snapshot (ms)':>15}"
+    )
+    for quantidade in TAMANHOS:
+        await popular(service, quantidade)
+        caminho = caminho_snapshot(USUARIO["info"]["id"])
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+        inicio = time.perf_counter()
+        await snapshot.atualizar(USUARIO["info"]["id"])
+        construcao = time.perf_counter() - inicio
+        await alterar(service, ALTERACOES)
+        inicio = time.perf_counter()
+        await snapshot.atualizar(USUARIO["info"]["id"])
+        incremental = time.perf_counter() - inicio
+
+        for campos in AGRUPAMENTOS:
+            agregado = await medir(service.relatorio, USUARIO, campos, {}, "aggregate")
+            colunar = await medir(service.relatorio, USUARIO, campos, {}, "snapshot")
+            print(
+                f"{quantidade:>12}{','.join(campos):>16}"
+                f"{agregado:>16.1f}{colunar:>15.1f}"
+            )
+        print(
+            f"{'':>12}construção completa {construcao * 1000:.0f} ms, "
+            f"incremental ({ALTERACOES} alterações) {incremental * 1000:.0f} ms"
+        )
+    await service.db_connection._connection["balanco"].delete_many(
+        {"usuario_id": USUARIO["info"]["id"]}
+    )
+    encerrar_executores()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+# Compara o processamento linha a linha (iterrows) com o processamento
+# vetorizado de app/services/importacao.py em arquivos sintéticos.
+#
+# Uso: python benchmarks/upload_csv.py [linhas ...]
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.services.importacao import processar_dataframe  # noqa: E402
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000, 1_000_000]
+FONTES = ["Pix Enviado Mercado", "Compra Padaria", "Pix Recebido Daniel", "Uber"]
+TITULOS = ["Ebn*Spotify", "Hotmart*Curso - Parcela 1/3", "Ifood*3Restaurante", "Uber"]
+
+
+def gerar_dataframe(tipo_arquivo: str, linhas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    valores = rng.normal(0, 500, linhas).round(2)
+    indices = rng.integers(0, len(FONTES), linhas)
+    if tipo_arquivo == "extrato_inter":
+        return pd.DataFrame(
+            {
+                "Data Lançamento": "01/01/2025",
+                "Histórico": "Pix",
+                "Descrição": np.array(FONTES)[indices],
+                "Valor": [f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".") for v in valores],
+            }
+        )
+    if tipo_arquivo == "fatura_inter":
+        return pd.DataFrame(
+            {
+                "Data": "01/01/2025",
+                "Lançamento": np.array(FONTES)[indices],
+                "Categoria": "SUPERMERCADO",
+                "Tipo": "Compra à vista",
+                "Valor": [f"R$\xa0{abs(v):.2f}".replace(".", ",") for v in valores],
+            }
+        )
+    if tipo_arquivo == "extrato_nubank":
+        return pd.DataFrame(
+            {
+                "Data": "01/01/2025",
+                "Valor": valores,
+                "Identificador": "x",
+                "Descrição": [f"Transferência - {f} - 000" for f in np.array(FONTES)[indices]],
+            }
+        )
+    return pd.DataFrame(
+        {
+            "date": "2025-01-01",
+            "title": np.array(TITULOS)[indices],
+            "amount": valores,
+        }
+    )
+
+
+def processar_linha_a_linha(df: pd.DataFrame, tipo_arquivo: str) -> list:
+    # Reprodução simplificada do laço original (antes da vetorização)
+    registros = []
+    for _, row in df.iterrows():
+        try:
+            if tipo_arquivo in ("extrato_inter", "fatura_inter"):
+                valor_str = (
+                    str(row.get("Valor", "0"))
+                    .replace("R$", "")
+                    .replace("\xa0", "")
+                    .replace(".", "")
+                    .replace(",", ".")
+                    .strip()
+                )
+                valor = float(valor_str) if valor_str else 0.0
+                fonte = " ".join(str(row.get("Descrição", row.get("Lançamento", ""))).split())
+            else:
+                valor = float(row.get("Valor", row.get("amount", 0)))
+                fonte = str(row.get("Descrição", row.get("title", ""))).split("-")[0].strip()
+            registros.append(
+                {
+                    "id": str(uuid4()),
+                    "fonte": fonte,
+                    "valor": abs(valor),
+                    "tipo": "Saída" if valor < 0 else "Entrada",
+                }
+            )
+        except Exception:
+            continue
+    return registros
+
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def main(tamanhos):
+    print(f"{'formato':<16}{'linhas':>10}{'antes (l/s)':>16}{'depois (l/s)':>16}{'ganho':>8}")
+    for tipo_arquivo in ["extrato_inter", "fatura_inter", "extrato_nubank", "fatura_nubank"]:
+        for linhas in tamanhos:
+            df = gerar_dataframe(tipo_arquivo, linhas)
+            antes = medir(processar_linha_a_linha, df, tipo_arquivo)
+            depois = medir(processar_dataframe, df, tipo_arquivo, "Janeiro", 2025)
+            print(
+                f"{tipo_arquivo:<16}{linhas:>10}{linhas / antes:>16,.0f}"
+                f"{linhas / depois:>16,.0f}{antes / depois:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANHOS_PADRAO)
@@ -0,0 +1,71 @@
+# Compara a validação linha a linha (BalancoModel(...).model_dump()) com a
+# validação em lote: TypeAdapter sobre a lista de dicts e checagens por
+# coluna no DataFrame.
+#
+# Uso: python benchmarks/validacao.py [linhas ...]
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+from app.models.balanco import MESES, TAGS, BalancoModel  # noqa: E402
+from app.services.validacao import validar_dataframe, validar_registros  # noqa: E402
+
+TAMANHOS_PADRAO = [10_000, 100_000, 500_000]
+
+
+def gerar_dataframe(linhas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(
+        {
+            "fonte": [f"Loja {i % 500}" for i in range(linhas)],
+            "valor": rng.integers(100, 100_000, linhas),
+            "mes": np.array(MESES)[rng.integers(0, 12, linhas)],
+            "ano": 2025,
+            "tipo": np.where(rng.random(linhas) < 0.5, "Entrada", "Saída"),
+            "tag": np.array(TAGS)[rng.integers(0, len(TAGS), linhas)],
+            "categoria": "Outros",
+            "observacao": None,
+            "data": "2025-01-01",
+        }
+    )
+
+
+def por_linha(registros: list) -> list:
+    validos = []
+    for r in registros:
+        try:
+            validos.append(BalancoModel(**r).model_dump())
+        except Exception:
+            continue
+    return validos
+
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main(tamanhos):
+    print(
+        f"{'linhas':>10}{'por linha (ms)':>16}{'TypeAdapter (ms)':>18}"
+        f"{'colunas (ms)':>14}"
+    )
+    for linhas in tamanhos:
+        df = gerar_dataframe(linhas)
+        registros = df.to_dict("records")
+        print(
+            f"{linhas:>10}{medir(por_linha, registros):>16.1f}"
+            f"{medir(validar_registros, registros):>18.1f}"
+            f"{medir(validar_dataframe, df):>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(t) for t in sys.argv[1:]] or TAMANHOS_PADRAO)
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(RAIZ), str(RAIZ / "app")]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--lento", action="store_true", help="roda também os testes marcados lento"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "lento: teste demorado, só roda com --lento")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--lento"):
+        return
+    pular = pytest.mark.skip(reason="teste lento; use --lento")
+    for item in items:
+        if "lento" in item.keywords:
+            item.add_marker(pular)
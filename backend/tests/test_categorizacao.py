@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from app.services.categorizacao import categorizar, compilar_regras, validar_regex
+from utils.texto import normalizar_busca_serie
+
+
+def categorias(fontes, regras, valores=None):
+    df = pd.DataFrame(
+        {
+            "fonte": fontes,
+            "valor": valores or [1000] * len(fontes),
+            "categoria": "Outros",
+        }
+    )
+    df["fonte_busca"] = normalizar_busca_serie(df["fonte"])
+    return categorizar(df, compilar_regras(regras)).tolist()
+
+
+def test_regex_com_referencia_numerada_fora_da_regex_combinada():
+    regras = [
+        {"categoria": "Repetido", "modo": "regex", "fonte": r"(ab)\1"},
+        {"categoria": "Mercado", "modo": "regex", "fonte": "mercado"},
+        {"categoria": "Uber", "modo": "regex", "fonte": "^uber"},
+    ]
+
+    assert categorias(["ABAB pagamento", "Mercado X", "Uber trip", "ab"], regras) == [
+        "Repetido",
+        "Mercado",
+        "Uber",
+        "Outros",
+    ]
+
+
+def test_grupos_nomeados_repetidos_entre_regras():
+    regras = [
+        {"categoria": "Pix", "modo": "regex", "fonte": r"(?P<tipo>pix) enviado"},
+        {"categoria": "Ted", "modo": "regex", "fonte": r"(?P<tipo>ted) enviada"},
+        {"categoria": "Farmácia", "modo": "regex", "fonte": "drogasil"},
+        {"categoria": "Posto", "modo": "regex", "fonte": "posto"},
+    ]
+
+    assert categorias(
+        ["Pix enviado", "TED enviada", "Drogasil", "Posto Shell", "Outro"], regras
+    ) == ["Pix", "Ted", "Farmácia", "Posto", "Outros"]
+
+
+@pytest.mark.parametrize(
+    "fonte", [r"(a+)+$", r"(\w*)*x", r"(?:x|y+)*z", r"((ab)+c)*", "a" * 201, "(a"]
+)
+def test_validar_regex_recusa(fonte):
+    with pytest.raises(ValueError):
+        validar_regex(fonte)
+
+
+@pytest.mark.parametrize(
+    "fonte", [r"^uber\s+\w+", r"(ab)\1", r"(?P<x>pix)+", r"(a{1,3})+", r"(?i)ifood"]
+)
+def test_validar_regex_aceita(fonte):
+    validar_regex(fonte)
+
+
+def test_limites_de_valor_em_centavos():
+    regras = [
+        {"categoria": "Grande", "fonte": "loja", "valor_min": 100_000},
+        {"categoria": "Pequena", "fonte": "loja", "valor_max": 1_050},
+    ]
+
+    assert categorias(["Loja", "Loja", "Loja"], regras, [150_000, 1_050, 5_000]) == [
+        "Grande",
+        "Pequena",
+        "Outros",
+    ]
@@ -0,0 +1,16 @@
+from utils.dinheiro import registro_em_centavos, registro_em_reais
+
+
+def test_campos_monetarios_ida_e_volta():
+    campos = ("valor_min", "valor_max")
+    regra = {"categoria": "Mercado", "valor_min": 10.1, "valor_max": None}
+
+    gravada = registro_em_centavos(dict(regra), campos)
+    assert gravada == {"categoria": "Mercado", "valor_min": 1010, "valor_max": None}
+    assert registro_em_reais(gravada, campos) == regra
+
+
+def test_edicao_parcial_so_converte_campos_presentes():
+    assert registro_em_centavos({"dia": 5}) == {"dia": 5}
+    assert registro_em_centavos({"valor": 0.1}) == {"valor": 10}
+    assert registro_em_reais(None) is None
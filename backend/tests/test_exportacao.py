@@ -0,0 +1,94 @@
+import asyncio
+import tracemalloc
+import pytest
+from app.services import exportacao
+from app.services.exportacao import EXPORTADORES, pa, verificar_formato
+
+LIMITE_MB = 64
+# Lotes menores que os de produção deixam o teste rápido (o openpyxl é
+# lento) sem mudar o que ele verifica: o pico segue o lote, não o total
+TAMANHO_LOTE = 1000
+COLUNAS = [
+    "id",
+    "fonte",
+    "valor",
+    "mes",
+    "ano",
+    "tipo",
+    "tag",
+    "categoria",
+    "observacao",
+    "data",
+    "criado_em",
+]
+FORMATOS = [
+    pytest.param(
+        formato,
+        marks=pytest.mark.skipif(
+            verificar_formato(formato) is not None,
+            reason=str(verificar_formato(formato)),
+        ),
+    )
+    for formato in EXPORTADORES
+]
+
+
+async def cursor_sintetico(linhas: int):
+    meses = ["Janeiro", "Fevereiro", "Março", "Abril"]
+    for i in range(linhas):
+        yield {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "fonte": f"Compra no estabelecimento {i % 5000}",
+            "valor": (i % 10000) / 7,
+            "mes": meses[i % 4],
+            "ano": 2020 + i % 5,
+            "tipo": "Saída" if i % 3 else "Entrada",
+            "tag": "Nubank Cartão",
+            "categoria": "Outros",
+            "observacao": None,
+            "data": "01/01/2024",
+            "criado_em": "2024-01-01T00:00:00",
+        }
+
+
+async def exportar(formato: str, linhas: int) -> int:
+    # Buffers do Arrow não passam pelo alocador do Python; o maior volume
+    # alocado entre os blocos enviados entra no pico
+    arrow = 0
+    async for _ in EXPORTADORES[formato](cursor_sintetico(linhas), COLUNAS):
+        if pa is not None:
+            arrow = max(arrow, pa.total_allocated_bytes())
+    return arrow
+
+
+def pico_mb(formato: str, linhas: int) -> float:
+    asyncio.run(exportar(formato, 10))  # imports e pools fora da medida
+    tracemalloc.start()
+    try:
+        arrow = asyncio.run(exportar(formato, linhas))
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (pico + arrow) / 1024**2
+
+
+@pytest.mark.parametrize("formato", FORMATOS)
+def test_pico_de_memoria_nao_cresce_com_o_total(formato, monkeypatch):
+    monkeypatch.setattr(exportacao.em_lotes, "__defaults__", (TAMANHO_LOTE,))
+
+    pequeno = pico_mb(formato, 2 * TAMANHO_LOTE)
+    grande = pico_mb(formato, 10 * TAMANHO_LOTE)
+
+    # Folga de 1 MB: o xlsx pronto é lido em blocos de até 1 MB
+    assert grande < LIMITE_MB
+    assert grande < pequeno * 1.25 + 1
+
+
+@pytest.mark.lento
+@pytest.mark.parametrize("formato", FORMATOS)
+def test_pico_de_memoria_com_um_milhao_de_linhas(formato):
+    # Lotes de produção; o openpyxl é bem mais lento e o xlsx usa uma
+    # amostra menor
+    linhas = 50_000 if formato == "xlsx" else 1_000_000
+
+    assert pico_mb(formato, linhas) < LIMITE_MB
@@ -0,0 +1,55 @@
+import pandas as pd
+from app.services.importacao import (
+    REGRAS_BANCO,
+    _extrair_nome_nubank,
+    _extrato_inter,
+    _extrato_nubank,
+)
+
+
+def test_regras_padrao_do_titular():
+    inter = REGRAS_BANCO["extrato_inter"]["descricoes_ignoradas"]
+    nubank = REGRAS_BANCO["extrato_nubank"]
+
+    assert inter == ["Fatura cartão Inter", "Petruitis", "Luan Rodrigues Petruitis"]
+    assert nubank["descricoes_ignoradas"] == [
+        "pagamento de fatura",
+        "luan rodrigues petruitis",
+    ]
+    assert nubank["nomes_titular"] == ["daniel", "luan", "petruitis"]
+
+
+def test_transferencias_entre_contas_do_titular_ignoradas():
+    inter = pd.DataFrame(
+        {
+            "Descrição": [
+                "Luan  Rodrigues Petruitis",
+                "Padaria",
+                "Fatura cartão Inter",
+            ],
+            "Histórico": ["Pix enviado", "Compra", "Pagamento"],
+            "Valor": ["-100,00", "-12,50", "-900,00"],
+            "Data Lançamento": ["01/02/2025", "02/02/2025", "03/02/2025"],
+        }
+    )
+    nubank = pd.DataFrame(
+        {
+            "Descrição": [
+                "Transferência enviada - LUAN RODRIGUES PETRUITIS - NU PAGAMENTOS",
+                "Transferência recebida - Daniel Souza - Banco X",
+                "Pagamento de fatura",
+            ],
+            "Valor": [-100.0, 50.0, -900.0],
+            "Data": ["01/02/2025", "02/02/2025", "03/02/2025"],
+        }
+    )
+
+    assert _extrato_inter(inter)["fonte"].tolist() == ["Padaria"]
+    # Só o nome completo ignora a linha; a palavra "daniel" só acha a contraparte
+    assert _extrato_nubank(nubank)["fonte"].tolist() == ["Daniel Souza"]
+
+
+def test_nome_da_contraparte_pelas_palavras_do_titular():
+    desc = pd.Series(["Pix - Mercado - Luan Silva - Agência 1", "Pix - Mercado"])
+
+    assert _extrair_nome_nubank(desc).tolist() == ["Luan Silva", "Mercado"]
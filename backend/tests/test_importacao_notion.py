@@ -0,0 +1,39 @@
+from app.services.importacao_notion import falhas_por_linha, parse_csv
+from app.services.validacao import validar_registros
+
+CSV = b"""Source,Month,Amount,Tags,Obs
+Mercado,January 2025,"R$1,234.56",Nubank,
+,January 2025,R$10.00,,
+Padaria,Fevereiro,R$5.00,,
+Uber,February 2025,R$23.40,Nubank Cart\xc3\xa3o,corrida
+Cinema,March 2025,R$40.00,,
+"""
+
+
+def test_parse_csv_tag_fora_da_lista_fica_sem_tag():
+    registros, linhas = parse_csv(CSV, "Saída")
+
+    assert [r["fonte"] for r in registros] == ["Mercado", "Uber", "Cinema"]
+    assert [r["tag"] for r in registros] == [None, "Nubank Cartão", None]
+    assert registros[0]["valor"] == 123456
+    assert linhas == [1, 4, 5]
+    validos, falhas = validar_registros(registros)
+    assert falhas == []
+    assert len(validos) == 3
+
+
+def test_falhas_por_linha_do_arquivo_de_origem():
+    origens = [("entradas", 1), ("entradas", 3), ("saidas", 2), ("saidas", 7)]
+    falhas = [
+        {"indice": 3, "erro": "duplicado"},
+        {"indice": 1, "erro": "fonte: Input should be a valid string"},
+    ]
+
+    assert falhas_por_linha(falhas, origens) == [
+        {
+            "arquivo": "entradas",
+            "linha": 3,
+            "erro": "fonte: Input should be a valid string",
+        },
+        {"arquivo": "saidas", "linha": 7, "erro": "duplicado"},
+    ]
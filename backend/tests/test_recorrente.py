@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date
+from app.services.balanco import BalancoService
+from app.services.recorrente import RecorrenteService
+
+
+class BancoFalso:
+    # Só o que gerar_ocorrencias toca, em memória
+    def __init__(self, recorrentes):
+        self.colecoes = {"transacoes_recorrentes": recorrentes, "balanco": []}
+
+    async def iterar(self, colecao, filtro, projecao=None):
+        atual = filtro["$or"][0]["ultimo_periodo_gerado"]["$lt"]
+        for doc in list(self.colecoes[colecao]):
+            ultimo = doc.get("ultimo_periodo_gerado")
+            if ultimo is None or ultimo < atual:
+                yield dict(doc)
+
+    async def upsert_lote(self, colecao, operacoes):
+        docs = self.colecoes[colecao]
+        upsertados = set()
+        for i, operacao in enumerate(operacoes):
+            filtro = operacao._filter
+            if not any(all(d.get(k) == v for k, v in filtro.items()) for d in docs):
+                docs.append(dict(operacao._doc["$setOnInsert"]))
+                upsertados.add(i)
+        return upsertados, []
+
+    async def bulk_write(self, colecao, operacoes):
+        for operacao in operacoes:
+            for doc in self.colecoes[colecao]:
+                if doc["id"] == operacao._filter["id"]:
+                    novo = operacao._doc["$max"]["ultimo_periodo_gerado"]
+                    atual = doc.get("ultimo_periodo_gerado")
+                    doc["ultimo_periodo_gerado"] = max(atual or novo, novo)
+        return None
+
+
+def servico(recorrentes):
+    banco = BancoFalso(recorrentes)
+    balanco = BalancoService(banco)
+
+    async def atualizar_resumo(gravados):
+        return None
+
+    balanco.atualizar_resumo = atualizar_resumo
+    return banco, RecorrenteService(banco, balanco)
+
+
+def recorrente(**campos):
+    return {
+        "id": "r1",
+        "usuario_id": "u1",
+        "descricao": "Aluguel",
+        "valor": 150050,
+        "tipo": "Saída",
+        "dia": 31,
+        "inicio": "2026-01-10",
+        "ultimo_periodo_gerado": None,
+        **campos,
+    }
+
+
+def test_gerar_ocorrencias_em_centavos_ate_a_data():
+    banco, service = servico([recorrente()])
+
+    resultado = asyncio.run(service.gerar_ocorrencias(ate=date(2026, 3, 31)))
+
+    assert resultado == {
+        "recorrentes": 1,
+        "inseridos": 3,
+        "ignorados": 0,
+        "falhas": [],
+    }
+    balanco = banco.colecoes["balanco"]
+    assert [(d["mes"], d["data"]) for d in balanco] == [
+        ("Janeiro", "31/01/2026"),
+        ("Fevereiro", "28/02/2026"),
+        ("Março", "31/03/2026"),
+    ]
+    assert {d["valor"] for d in balanco} == {150050}
+    assert {d["recorrente_id"] for d in balanco} == {"r1"}
+    regra = banco.colecoes["transacoes_recorrentes"][0]
+    assert regra["ultimo_periodo_gerado"] == "2026-03"
+
+
+def test_gerar_ocorrencias_nao_duplica_ao_repetir():
+    banco, service = servico([recorrente(ultimo_periodo_gerado="2026-01")])
+
+    primeira = asyncio.run(service.gerar_ocorrencias(ate=date(2026, 3, 15)))
+    # Volta a marca: a geração repetida cai no upsert e é ignorada
+    banco.colecoes["transacoes_recorrentes"][0]["ultimo_periodo_gerado"] = "2026-01"
+    segunda = asyncio.run(service.gerar_ocorrencias(ate=date(2026, 3, 15)))
+
+    # Março ainda não venceu (dia 31) e fica para a próxima execução
+    assert primeira["inseridos"] == 1
+    assert segunda["inseridos"] == 0
+    assert segunda["ignorados"] == 1
+    assert len(banco.colecoes["balanco"]) == 1
+    regra = banco.colecoes["transacoes_recorrentes"][0]
+    assert regra["ultimo_periodo_gerado"] == "2026-02"
+
+
+def test_projecao_com_valores_em_centavos():
+    from app.services.analise import calcular_projecao
+
+    projecao = calcular_projecao(
+        [recorrente(dia=5, inicio="2026-01-01")], [], date(2026, 1, 1), 2
+    )
+
+    assert projecao["saidas"] == [1500.5, 1500.5]
+    assert projecao["categorias"] == {"Sem categoria": [1500.5, 1500.5]}
@@ -1,4 +1,4 @@
-import React, { useCallback, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { SubmitHandler } from 'react-hook-form';
 import { Button } from '../../components/Button';
 import { ContentBody } from '../../components/Content';
@@ -25,11 +25,97 @@ const legends = {
     '9': 'text-red-500',
 };
 
+interface IImportJob {
+    status: 'pendente' | 'processando' | 'concluido' | 'erro';
+    contadores?: {
+        linhas_lidas: number;
+        inseridos: number;
+        ignorados: number;
+        falhas: number;
+    };
+    falhas?: { arquivo?: string; linha?: number; erro: string }[];
+    erro?: string | null;
+}
+
+// The upload is processed in the background; its job is polled until done
+const IMPORT_POLL_INTERVAL = 2000;
+const IMPORT_FAILURES_SHOWN = 5;
+
+function notifyImportResult(job: IImportJob) {
+    if (job.status === 'erro') {
+        showNotification({
+            message: `Erro na importação: ${job.erro || 'erro desconhecido'}`,
+            type: 'error',
+        });
+        return;
+    }
+
+    const { inseridos = 0, ignorados = 0, falhas = 0 } = job.contadores || {};
+    const summary =
+        `Importação concluída: ${inseridos} inseridos, ` +
+        `${ignorados} já existentes, ${falhas} com erro.`;
+    if (!falhas) {
+        showNotification({ message: summary, type: 'success' });
+        return;
+    }
+    showNotification({
+        message: (
+            <div>
+                <p>{summary}</p>
+                <ul>
+                    {(job.falhas || [])
+                        .slice(0, IMPORT_FAILURES_SHOWN)
+                        .map(falha => (
+                            <li
+                                key={`${falha.arquivo}-${falha.linha}-${falha.erro}`}
+                            >
+                                Linha {falha.linha}
+                                {falha.arquivo && ` (${falha.arquivo})`}:{' '}
+                                {falha.erro}
+                            </li>
+                        ))}
+                </ul>
+            </div>
+        ),
+        type: 'warning',
+    });
+}
+
 const baseRoute = '/balance';
 export default function Balance() {
     const [files, setFiles] = useState<FormData>();
     const [filters, setFilters] = useState({});
     const [loading, setLoading] = useState(false);
+    const [importing, setImporting] = useState(false);
+    const pollTimeout = useRef<ReturnType<typeof setTimeout>>();
+
+    useEffect(() => () => clearTimeout(pollTimeout.current), []);
+
+    const pollImportJob = useCallback((jobId: string) => {
+        const check = async () => {
+            try {
+                const { data: job } = await api.get<IImportJob>(
+                    `/imports/${jobId}`,
+                );
+                if (job.status === 'pendente' || job.status === 'processando') {
+                    pollTimeout.current = setTimeout(
+                        check,
+                        IMPORT_POLL_INTERVAL,
+                    );
+                    return;
+                }
+                notifyImportResult(job);
+            } catch {
+                showNotification({
+                    message: 'Não foi possível acompanhar a importação.',
+                    type: 'error',
+                });
+            }
+            setImporting(false);
+        };
+        setImporting(true);
+        pollTimeout.current = setTimeout(check, IMPORT_POLL_INTERVAL);
+    }, []);
 
     const [isNewOrderModalIfOpen, setisNewOrderModalIfOpen] = useState(false);
 
@@ -55,8 +141,12 @@ export default function Balance() {
             files.append('ano', String(data.ano));
             files.append('tipo_arquivo', data.tipo_arquivo);
 
-            await api.post('/balance/upload', files);
-            showNotification({ message: 'Importação concluída com sucesso.' });
+            const { data: job } = await api.post('/balance/upload', files);
+            showNotification({
+                message: 'Arquivo recebido. Importação em andamento...',
+                type: 'info',
+            });
+            pollImportJob(job.job_id);
         } catch (error: any) {
             showNotification({
                 message:
@@ -147,7 +237,7 @@ export default function Balance() {
                         </div>
                         <Table
                             route={baseRoute}
-                            reload={isNewOrderModalIfOpen}
+                            reload={isNewOrderModalIfOpen || importing}
                             filter={filters}
                             formatData={formatData}
                             afterLoad={handleAfterLoad}